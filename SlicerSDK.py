@@ -1,21 +1,26 @@
-from typing import Dict
-import matplotlib.pyplot as plt
-import matplotlib
+from typing import Dict, TYPE_CHECKING
 import numpy as np
+import requests
 import yaml
-from ipyleaflet import Map
 import pickle
 from utils import to_camel_case
-from utils.server import APIService
-from utils.ui import MobilityMap
+from utils.instrumentation import instrumentation
+from utils.links import LinkSerializer
 import copy
 
 yaml.Dumper.ignore_aliases = lambda *args: True
 from FogifySDK.FogifySDK import ExceptionFogifySDK
 from FogifySDK import FogifySDK
 import networks
+from networks.snapshot import LazySlices, SliceSnapshot
+from networks.timeline import QoSTimeline
 from enum import Enum, unique
 
+# The plotting, the map UI and the API service are imported when they are first used
+if TYPE_CHECKING:
+    from ipyleaflet import Map
+    from utils.server import APIService
+
 
 class SlicerSDK(FogifySDK):
     """
@@ -24,7 +29,8 @@ class SlicerSDK(FogifySDK):
 
     slices: Dict[str, networks.Slice]
     locations: Dict
-    _server: APIService
+    _server: "APIService"
+    link_serializer: LinkSerializer
 
     @unique
     class LocationType(Enum):
@@ -34,10 +40,14 @@ class SlicerSDK(FogifySDK):
 
     location_maps: Dict = {}
 
+    # The number of processes that generate the links of a slice (the number of CPUs if it is None)
+    link_processes: int = None
+
     def __init__(self, url: str, docker_compose: str = None):
         self.slices: Dict[str, networks.Slice] = {}
         self.locations = {}
-        self._server = APIService(self)
+        self._server = None
+        self.link_serializer = LinkSerializer()
         FogifySDK.__init__(self, url, docker_compose)
 
     def add_RU_to_slice(self, slice_name: str, lat: float, lon: float, alt: float = None) -> None:
@@ -94,12 +104,24 @@ class SlicerSDK(FogifySDK):
             self.__generate_links(network)
 
     def __generate_links(self, network):
-        for from_label, from_location in network.get_nodes().items():
-            for to_label, to_location in network.get_nodes().items():
-                qos = network.get_qos_between_nodes(from_label, to_label)
-                if not qos: continue
-                self.add_link(network.get_name(), from_label, to_label,
-                              dict(properties=qos.get_formatted_bidirectional_qos()), bidirectional=False)
+        """
+        Adds the links between all pairs of the slice's nodes (the same with add_link, but in bulk), which are
+        generated across link_processes processes. The links of the same QoS share the interned properties of the
+        link serializer, so they are read-only (altering them would alter the links of all pairs with the same QoS)
+        """
+        self.check_docker_swarm_existence()
+        fogify_network = next((i for i in self.networks if i['name'] == network.get_name()), None)
+        if fogify_network is None:
+            raise ExceptionFogifySDK("The network does not exist")
+        table = network.get_link_table(self.link_processes)
+        properties = [self.link_serializer.format_values(values) for values in table.values]
+        links = fogify_network.get('links', [])
+        nodes = table.nodes
+        links.extend({"from_node": nodes[from_node], "to_node": nodes[to_node], "bidirectional": False,
+                      "properties": properties[qos]}
+                     for from_node, to_node, qos in zip(table.from_node.tolist(), table.to_node.tolist(),
+                                                        table.qos.tolist()))
+        fogify_network['links'] = links
 
     def __import_mobile_nodes(self):
         for node in self.topology:
@@ -146,22 +168,21 @@ class SlicerSDK(FogifySDK):
             if label == label_node: continue
             old_value_delay[f"{label_node}-{label}"] = network_obj.get_qos_between_nodes(label_node, label).get_delay()
 
-        network_obj.set_node_location(label, lat, lon, alt)
+        rebalanced = network_obj.set_node_location(label, lat, lon, alt)
         links = []
         for label_node in network_obj.get_nodes():
             if label == label_node: continue
             qos = network_obj.get_qos_between_nodes(label, label_node)
             if qos:
-                links.append(dict(from_node=label, to_node=label_node,
-                              parameters={'properties': qos.get_formatted_bidirectional_qos()},
-                              bidirectional=False))
+                links.append(self.link_serializer.get_link(label, label_node, qos))
             if old_value_delay[f"{label_node}-{label}"] != network_obj.get_qos_between_nodes(label_node, label).get_delay():
                 qos = network_obj.get_qos_between_nodes(label_node, label)
                 if qos:
-                    links.append(dict(from_node=label_node, to_node=label,
-                                  parameters={'properties': qos.get_formatted_bidirectional_qos()},
-                                  bidirectional=False))
-        self.update_map(slice)
+                    links.append(self.link_serializer.get_link(label_node, label, qos))
+        # the UEs that got the resources (e.g. MIMO antennas) released by the moving node
+        links += self.__get_links(network_obj, rebalanced, {(i['from_node'], i['to_node']) for i in links},
+                                  self.link_serializer)
+        self.update_map(slice, [label] + rebalanced)
         return self.update_links(slice, links)
 
     def move_nodes_to_locations(self, slice: str, list_of_nodes: list):
@@ -173,28 +194,130 @@ class SlicerSDK(FogifySDK):
         if slice not in self.slices: raise ExceptionFogifySDK(f"The {slice} is not mobile network.")
         network_obj = self.slices[slice]
         links = []
+        rebalanced = []
         for node in list_of_nodes:
             node_name = node.get('label')
             lat = node.get('lat')
             lon = node.get('lon')
-            alt = node.get('alt')
+            alt = node.get('alt', 0.0)
             has_all_properties = lat and lon and node_name
             if not has_all_properties: raise ExceptionFogifySDK(f"The {node} is not formatted properly.")
-            network_obj.set_node_location(node_name, lat, lon, alt)
+            rebalanced += network_obj.set_node_location(node_name, lat, lon, alt)
             for label in network_obj.get_nodes():
                 qos = network_obj.get_qos_between_nodes(node_name, label)
                 if not qos: continue
-                links.append(dict(from_node=node_name, to_node=label,
-                                  parameters={'properties': qos.get_formatted_bidirectional_qos()},
-                                  bidirectional=False))
-        self.update_map(slice)
+                links.append(self.link_serializer.get_link(node_name, label, qos))
+        rebalanced = list(dict.fromkeys(rebalanced))
+        links += self.__get_links(network_obj, rebalanced, {(i['from_node'], i['to_node']) for i in links},
+                                  self.link_serializer)
+        self.update_map(slice, [node.get('label') for node in list_of_nodes] + rebalanced)
         return self.update_links(slice, links)
 
+    def insert_RU(self, slice: str, lat: float, lon: float, alt: float = None):
+        """
+        Introduces a new RU to a running slice and updates only the links of the UEs that are connected to it
+        :param slice: The slice name
+        :param lat: latitude of the RU
+        :param lon: longitude of the RU
+        :param alt: altitude in meters of the RU
+        """
+        if slice not in self.slices: raise ExceptionFogifySDK(f"The {slice} is not mobile network.")
+        return self.__update_reattached_nodes(slice, self.slices[slice].add_RU(lat, lon, alt))
+
+    def remove_RU(self, slice: str, RU: str):
+        """
+        Removes an RU from a running slice (e.g. an outage) and updates only the links of its UEs
+        :param slice: The slice name
+        :param RU: The RU's identifier
+        """
+        if slice not in self.slices: raise ExceptionFogifySDK(f"The {slice} is not mobile network.")
+        return self.__update_reattached_nodes(slice, self.slices[slice].remove_RU(RU))
+
+    def __update_reattached_nodes(self, slice, labels):
+        if len(labels) == 0: return
+        links = self.__get_links(self.slices[slice], labels, serializer=self.link_serializer)
+        self.update_map(slice, labels)
+        return self.update_links(slice, links)
+
+    @staticmethod
+    def __get_links(network_obj, labels, pairs: set = None, serializer: LinkSerializer = None) -> list:
+        """
+        :param network_obj: The slice
+        :param labels: The nodes whose connection changed
+        :param pairs: The (from_node, to_node) pairs that are already updated
+        :param serializer: The serializer that interns the properties of the links
+        :return: The links from and to the nodes
+        """
+        links = []
+        pairs = set() if pairs is None else pairs
+        serializer = LinkSerializer() if serializer is None else serializer
+        for node_name in labels:
+            for label in network_obj.get_nodes():
+                for from_node, to_node in [(node_name, label), (label, node_name)]:
+                    if (from_node, to_node) in pairs: continue
+                    pairs.add((from_node, to_node))
+                    qos = network_obj.get_qos_between_nodes(from_node, to_node)
+                    if not qos: continue
+                    links.append(serializer.get_link(from_node, to_node, qos))
+        return links
+
+    def update_links(self, network_name: str, links: list):
+        """
+        Sends the updated links of a slice to the Fogify controller (their payload size is instrumented).
+        The links are grouped by their source node as Fogify does, but they are not copied, and their payloads are
+        encoded by the link serializer
+        :param network_name: The slice name
+        :param links: The updated links
+        :return: The response (or the exception) of every source node
+        """
+        if instrumentation.enabled:
+            instrumentation.increment('links', len(links))
+            instrumentation.observe('link_payload_bytes', len(self.link_serializer.encode(links)),
+                                    instrumentation.size_buckets)
+        grouped_links = {}
+        for link in links:
+            if 'from_node' not in link: raise ExceptionFogifySDK("A link should have the 'from_node' parameter")
+            if 'to_node' not in link: raise ExceptionFogifySDK("A link should have the 'to_node' parameter")
+            grouped_links.setdefault(link['from_node'], []).append(link)
+            if link.get('bidirectional'):
+                grouped_links.setdefault(link['to_node'], []).append(link)
+        responses = {}
+        for instance_type, instance_links in grouped_links.items():
+            try:
+                responses[instance_type] = self.action(FogifySDK.Action_type.UPDATE_LINKS.value, network=network_name,
+                                                       links=instance_links, instance_type=instance_type,
+                                                       instances=1000)
+            except Exception as ex:
+                responses[instance_type] = ex
+        return responses
+
+    def send_payload(self, path: str, payload: bytes) -> dict:
+        """
+        Posts an encoded action to the Fogify controller
+        :param path: The path of the action (e.g. /actions/links/)
+        :param payload: The JSON payload
+        :return: The response of the controller
+        """
+        res = requests.request("POST", self.get_url(path), data=payload,
+                               headers={'Content-Type': 'application/json; charset=utf-8'}).json()
+        if "message" in res and res["message"].upper() == "OK":
+            return res
+        raise ExceptionFogifySDK(f"The API did not return proper response for that action ({str(res)})")
+
     def action(self, action_type: str , **kwargs) -> None:
         """
-        Updated version of action method to handle also moving actions
+        Updated version of action method to handle also moving actions, i.e. MOVE for a single node
+        (instance_type, lat, lon) and MOVE_NODES for a batch of nodes (a list of nodes with label, lat, lon),
+        as well as ADD_RU (lat, lon) and REMOVE_RU (RU) for changes of the RUs.
+        If the instrumentation is enabled, the operations of every such action are logged as a tick
         :return:
         """
+        res = self.__action(action_type, **kwargs)
+        if instrumentation.enabled and action_type.upper() in ["MOVE", "MOVE_NODES", "ADD_RU", "REMOVE_RU"]:
+            instrumentation.log_tick(f"{action_type.upper()} {kwargs.get('slice')}")
+        return res
+
+    def __action(self, action_type: str, **kwargs):
         if action_type.upper() == "MOVE":
             slice = kwargs.get('slice')
             instance_type = kwargs.get('instance_type')
@@ -205,31 +328,91 @@ class SlicerSDK(FogifySDK):
             if not instance_type: raise ExceptionFogifySDK("Mobility action needs a specific instance")
             if not lat: raise ExceptionFogifySDK("Mobility action needs a specific latitude")
             if not lon: raise ExceptionFogifySDK("Mobility action needs a specific longitude")
-            self.move_node_to_location(slice, instance_type, lat, lon, alt)
-
+            return self.move_node_to_location(slice, instance_type, lat, lon, alt)
+        elif action_type.upper() == "MOVE_NODES":
+            slice = kwargs.get('slice')
+            nodes = kwargs.get('nodes')
+            if not slice: raise ExceptionFogifySDK("Mobility action needs a specific networks")
+            if not nodes: raise ExceptionFogifySDK("Mobility action needs a list of nodes")
+            return self.move_nodes_to_locations(slice, nodes)
+        elif action_type.upper() == "ADD_RU":
+            slice = kwargs.get('slice')
+            if not slice: raise ExceptionFogifySDK("RU action needs a specific networks")
+            if not kwargs.get('lat') or not kwargs.get('lon'):
+                raise ExceptionFogifySDK("RU action needs a specific latitude and longitude")
+            return self.insert_RU(slice, kwargs.get('lat'), kwargs.get('lon'), kwargs.get('alt'))
+        elif action_type.upper() == "REMOVE_RU":
+            slice = kwargs.get('slice')
+            if not slice: raise ExceptionFogifySDK("RU action needs a specific networks")
+            if not kwargs.get('RU'): raise ExceptionFogifySDK("RU action needs a specific RU")
+            return self.remove_RU(slice, kwargs.get('RU'))
+        elif action_type == FogifySDK.Action_type.UPDATE_LINKS.value:
+            return self.send_payload("/actions/links/", self.link_serializer.encode(dict(params=kwargs)))
         else:
-            FogifySDK.action(self, action_type, **kwargs)
+            return self.__controller_action(action_type, **kwargs)
+
+    def __controller_action(self, action_type: str, **kwargs):
+        # the actions of the Fogify controller (their round trip is instrumented here, not on the FogifySDK class)
+        return FogifySDK.action(self, action_type, **kwargs)
 
-    def generate_map(self, slice_name: str) -> Map:
+    def dry_run(self, scenario_name: str = None) -> Dict[str, QoSTimeline]:
+        """
+        Replays the moving actions (MOVE and MOVE_NODES) of a scenario against the generated slices without
+        a Fogify deployment, so the QoS of an experiment can be validated before its execution
+        :param scenario_name: The name of the scenario (the first scenario if it is None)
+        :return: The QoS timeline of every slice that has moving actions
+        """
+        if len(self.slices) == 0: raise ExceptionFogifySDK("The slices should be generated before a dry run")
+        scenarios = [i for i in self.scenarios if scenario_name is None or i.get('name') == scenario_name]
+        if len(scenarios) == 0: raise ExceptionFogifySDK(f"There is no scenario with {scenario_name} as name")
+        moves = {}
+        current_time = 0
+        for action in sorted(scenarios[0]['actions'], key=lambda x: x['position']):
+            current_time += int(action['time'])
+            action_type = action.get('action', {}).get('type', '').upper()
+            params = action.get('action', {}).get('parameters', {})
+            if action_type == "MOVE":
+                nodes = [dict(label=action.get('instance_type') or params.get('instance_type'), lat=params.get('lat'),
+                              lon=params.get('lon'), alt=params.get('alt', 0.0))]
+            elif action_type == "MOVE_NODES":
+                nodes = params.get('nodes', [])
+            else:
+                continue
+            self.check_slice(params.get('slice'))
+            slice_moves = moves.setdefault(params.get('slice'), [])
+            slice_moves.extend([(current_time, node.get('label'), node.get('lat'), node.get('lon'),
+                                 node.get('alt', 0.0)) for node in nodes])
+        res = {}
+        for slice_name, slice_moves in moves.items():
+            times, labels, lats, lons, alts = zip(*slice_moves)
+            res[slice_name] = self.slices[slice_name].get_qos_timeline(times, labels, lats, lons, alts)
+        return res
+
+    def generate_map(self, slice_name: str, mode: str = 'auto') -> "Map":
         """
         Generates and displays the interactive map
         :param slice_name: The slice name that it will be depicted on the map
+        :param mode: Rendering mode of the map ('markers', 'cluster', 'lod' or 'auto' that picks based on slice's size)
         :return: The interactive Map object
         """
         self.check_slice(slice_name)
         network = self.slices.get(slice_name)
-        self.location_maps[slice_name] = MobilityMap.generate_map(network, self)
+        from utils.ui import MobilityMap
+        self.location_maps[slice_name] = MobilityMap.generate_map(network, self, mode)
         return self.location_maps[slice_name]
 
-    def update_map(self, slice_name: str)->None:
+    def update_map(self, slice_name: str, labels: list = None, force: bool = False)->None:
         """
         Updates the interactive map with current positions
         :param slice_name: The network slice of the map
+        :param labels: The labels of the moved nodes (all nodes are updated if it is None)
+        :param force: Redraws the map even if the frame rate limit is reached
         """
         try:
             self.check_location_maps(slice_name)
             self.check_slice(slice_name)
-            MobilityMap.update_map(self.location_maps[slice_name], self.slices[slice_name])
+            from utils.ui import MobilityMap
+            MobilityMap.update_map(self.location_maps[slice_name], self.slices[slice_name], labels, force)
         except Exception:
             return
 
@@ -251,7 +434,8 @@ class SlicerSDK(FogifySDK):
         """
         Deploys the stored model to the fogify and starts the API service for the 5G mobile services
         """
-        self._server.stop()
+        from utils.server import APIService
+        if self._server: self._server.stop()
         FogifySDK.deploy(self, timeout)
         self._server = APIService(self)
         self._server.start()
@@ -261,9 +445,11 @@ class SlicerSDK(FogifySDK):
         Destroys the deployment
         """
         FogifySDK.undeploy(self, timeout)
-        self._server.stop()
+        if self._server: self._server.stop()
     
     def profile(self, label, network_slice, energy_model = None, max_energy_consumption=None, last=None):
+        import matplotlib
+        import matplotlib.pyplot as plt
         in_prefix = 'network_rx_'
         out_prefix = 'network_tx_'
         df = self.get_metrics_from(label).sort_values(by="count")
@@ -310,12 +496,61 @@ class SlicerSDK(FogifySDK):
         ax.grid(True)
         plt.show()
     
+    @staticmethod
+    def set_instrumentation(enabled: bool = True, reset: bool = False) -> None:
+        """
+        Enables (or disables) the instrumentation of the slices' and the SDK's operations in this process
+        :param enabled: If it is False, the instrumented methods are restored, so they have no overhead
+        :param reset: Clears the collected metrics
+        """
+        if reset: instrumentation.reset()
+        if enabled:
+            instrumentation.enable()
+        else:
+            instrumentation.disable()
+
+    @staticmethod
+    def get_instrumentation_metrics(output_format: str = 'dict'):
+        """
+        Returns the counters and latency histograms of the instrumented operations, i.e. attach, move, path_qos,
+        link_table, RU_sorting and radio (of the slices), generate_slices, sdk_move, sdk_batch_move and update_links
+        (of the SDK), controller_round_trip (every request to the Fogify controller) and link_payload_bytes
+        (its name differs from FogifySDK.get_metrics, which returns the monitoring metrics of the services)
+        :param output_format: 'dict' or 'prometheus' (text exposition format)
+        :return: The metrics
+        """
+        if output_format == 'prometheus':
+            return instrumentation.to_prometheus()
+        return instrumentation.get_metrics()
+
     def store(self, filename='slicerSDK'):
-        filename+=".pickle"
+        """
+        Stores the model along with a snapshot of every slice (the API service and the maps are not stored)
+        :param filename: The name of the file (without the .pickle extension)
+        """
+        state = {key: value for key, value in self.__dict__.items() if key not in ['slices', '_server', 'link_serializer']}
+        snapshots = {}
+        for slice_name in self.slices:
+            snapshot = self.slices.snapshots.get(slice_name) if isinstance(self.slices, LazySlices) else None
+            snapshots[slice_name] = (snapshot or SliceSnapshot.from_slice(self.slices[slice_name])).to_bytes()
+        filename += ".pickle"
         with open(filename, 'wb') as f:
-            pickle.dump(self, f)
+            pickle.dump(dict(version=SliceSnapshot.version, state=state, snapshots=snapshots), f)
 
     def load(self, filename='slicerSDK'):
+        """
+        Loads a stored model. The slices are restored on their first access
+        :param filename: The name of the file (without the .pickle extension)
+        """
         filename += ".pickle"
         with open(filename, 'rb') as f:
-            self = pickle.load(f)
\ No newline at end of file
+            data = pickle.load(f)
+        self.__dict__.update(data['state'])
+        self.slices = LazySlices({slice_name: SliceSnapshot.from_bytes(snapshot)
+                                  for slice_name, snapshot in data['snapshots'].items()})
+
+
+instrumentation.register(SlicerSDK, dict(generate_slices='generate_slices', move_node_to_location='sdk_move',
+                                         move_nodes_to_locations='sdk_batch_move', update_links='update_links',
+                                         send_payload='controller_round_trip',
+                                         _SlicerSDK__controller_action='controller_round_trip'))
@@ -0,0 +1,116 @@
+import copy
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+# The parameters of every wireless model in the synthetic slices
+WIRELESS_MODELS = dict(
+    LinearDegradation=dict(
+        best_qos={'latency': {'delay': '5.0ms', 'deviation': '2.0ms'}, 'bandwidth': '10.0mbps', 'error_rate': '1.0%'},
+        worst_qos={'latency': {'delay': '100.0ms', 'deviation': '20.0ms'}, 'bandwidth': '5.0mbps',
+                   'error_rate': '2.0%'}, radius="1km"),
+    Log2Degradation=dict(
+        best_qos={'latency': {'delay': '5.0ms', 'deviation': '2.0ms'}, 'bandwidth': '10.0mbps', 'error_rate': '1.0%'},
+        worst_qos={'latency': {'delay': '100.0ms', 'deviation': '20.0ms'}, 'bandwidth': '5.0mbps',
+                   'error_rate': '2.0%'}, radius="1km"),
+    Log10Degradation=dict(
+        best_qos={'latency': {'delay': '5.0ms', 'deviation': '2.0ms'}, 'bandwidth': '10.0mbps', 'error_rate': '1.0%'},
+        worst_qos={'latency': {'delay': '100.0ms', 'deviation': '20.0ms'}, 'bandwidth': '5.0mbps',
+                   'error_rate': '2.0%'}, radius="1km"),
+    MultiRangeNetwork=dict(
+        radius="1km",
+        bins={"0.3km": {'latency': {'delay': '5.0ms', 'deviation': '1.0ms'}, 'bandwidth': '10.0mbps'},
+              "0.6km": {'latency': {'delay': '20.0ms', 'deviation': '5.0ms'}, 'bandwidth': '7.0mbps'},
+              "1km": {'latency': {'delay': '50.0ms', 'deviation': '10.0ms'}, 'bandwidth': '5.0mbps'}}),
+    FlatWirelessNetwork=dict(
+        radius="1km", qos={'latency': {'delay': '5.0ms', 'deviation': '1.0ms'}, 'bandwidth': '10.0mbps'}),
+    SISO=dict(),
+    MIMO=dict(),
+    SINR=dict(interference_radius=2),
+)
+
+
+@dataclass
+class SyntheticCity:
+    """
+    Synthetic city-scale topology, i.e. RUs on a square grid and UEs that are uniformly spread over it,
+    along with an EDGE node (colocated with the first RU) and a CLOUD node
+    """
+    num_of_RUs: int = 10
+    num_of_UEs: int = 10
+    wireless_connection_type: str = 'LinearDegradation'
+    spacing: float = 1.0  # in km, the distance between neighbouring RUs
+    center: tuple = (35.15, 33.38)
+    seed: int = 0
+    slice_name: str = 'city-slice'
+
+    backhaul_qos = {'latency': {'delay': '30.0ms', 'deviation': '1.0ms'}, 'bandwidth': '100.0mbps'}
+    midhaul_qos = {'latency': {'delay': '3.0ms', 'deviation': '1.0ms'}, 'bandwidth': '100.0mbps'}
+
+    def get_steps(self) -> (float, float):
+        """
+        :return: The distance between neighbouring RUs in degrees of latitude and longitude
+        """
+        return self.spacing / 111.32, self.spacing / (111.32 * math.cos(math.radians(self.center[0])))
+
+    def get_RUs(self) -> list:
+        """
+        :return: The RUs (dicts with lat and lon) on a square grid around the center
+        """
+        side = int(math.ceil(math.sqrt(self.num_of_RUs)))
+        lat_step, lon_step = self.get_steps()
+        res = []
+        for i in range(self.num_of_RUs):
+            row, column = divmod(i, side)
+            res.append(dict(lat=round(self.center[0] + (row - (side - 1) / 2) * lat_step, 6),
+                            lon=round(self.center[1] + (column - (side - 1) / 2) * lon_step, 6)))
+        return res
+
+    def get_bounds(self) -> tuple:
+        """
+        :return: The south-west and north-east corners of the city (the RUs' grid along with a margin of spacing/2)
+        """
+        RUs = self.get_RUs()
+        lat_step, lon_step = self.get_steps()
+        lats, lons = [i['lat'] for i in RUs], [i['lon'] for i in RUs]
+        return (min(lats) - lat_step / 2, min(lons) - lon_step / 2), (max(lats) + lat_step / 2, max(lons) + lon_step / 2)
+
+    def get_UEs(self, seed: int = None) -> list:
+        """
+        :param seed: The seed of the positions (the seed of the city if it is None)
+        :return: The UEs (dicts with label, lat and lon)
+        """
+        (south, west), (north, east) = self.get_bounds()
+        random = np.random.default_rng(self.seed if seed is None else seed)
+        lats = random.uniform(south, north, self.num_of_UEs)
+        lons = random.uniform(west, east, self.num_of_UEs)
+        return [dict(label=f"ue-{i}", lat=round(float(lat), 6), lon=round(float(lon), 6))
+                for i, (lat, lon) in enumerate(zip(lats, lons))]
+
+    def get_network(self) -> dict:
+        """
+        :return: The slice as network of the Fogify model
+        """
+        return dict(name=self.slice_name, network_type='slice', backhaul_qos=copy.deepcopy(self.backhaul_qos),
+                    midhaul_qos=copy.deepcopy(self.midhaul_qos), wireless_connection_type=self.wireless_connection_type,
+                    parameters=copy.deepcopy(WIRELESS_MODELS[self.wireless_connection_type]), RUs=self.get_RUs())
+
+    def get_model(self) -> dict:
+        """
+        :return: The docker-compose representation (with the x-fogify section) of the city
+        """
+        RU = self.get_RUs()[0]
+        topology = [dict(label='cloud-server', service='cloud-service', node='cloud-node', replicas=1,
+                         networks=[self.slice_name], location=dict(location_type='CLOUD')),
+                    dict(label='mec-server', service='edge-service', node='edge-node', replicas=1,
+                         networks=[self.slice_name], location=dict(lat=RU['lat'], lon=RU['lon'], location_type='EDGE'))]
+        for UE in self.get_UEs():
+            topology.append(dict(label=UE['label'], service='ue-service', node='ue-node', replicas=1,
+                                 networks=[self.slice_name], location=dict(lat=UE['lat'], lon=UE['lon'])))
+        nodes = [dict(name=name, capabilities=dict(processor=dict(cores=cores, clock_speed=1400), memory=memory))
+                 for name, cores, memory in [('cloud-node', 4, '4G'), ('edge-node', 2, '2G'), ('ue-node', 1, '0.5G')]]
+        return {'version': '3.7',
+                'services': {name: dict(image='slicer-benchmark:0.0.1') for name in
+                             ['cloud-service', 'edge-service', 'ue-service']},
+                'x-fogify': dict(networks=[self.get_network()], nodes=nodes, topology=topology, scenarios=[])}
@@ -0,0 +1,51 @@
+import copy
+import json
+
+import yaml
+
+from FogifySDK import FogifySDK
+from FogifySDK.FogifySDK import ExceptionFogifySDK
+from SlicerSDK import SlicerSDK
+
+
+class LocalSlicerSDK(SlicerSDK):
+    """
+    SlicerSDK whose Fogify controller is a local stand-in. The requests of the actions are encoded as they would be
+    sent to the controller and they are counted along with the size of their payloads, but they are always accepted
+    """
+
+    def __init__(self, model: dict):
+        """
+        :param model: The docker-compose representation (with the x-fogify section) of the experiment
+        """
+        SlicerSDK.__init__(self, 'http://localhost:5000')
+        # the same with parse_docker_swarm, but the model is not dumped and parsed again
+        self.docker_compose = yaml.safe_dump({'services': model['services']})
+        self.docker_swarm_rep = copy.deepcopy(model)
+        fogify = self.docker_swarm_rep.get('x-fogify', {})
+        self.networks = fogify.get('networks', [])
+        self.nodes = fogify.get('nodes', [])
+        self.scenarios = fogify.get('scenarios', [])
+        self.topology = fogify.get('topology', [])
+        self.services = list(self.docker_swarm_rep['services'])
+        self.requests = 0
+        self.payload_bytes = 0
+
+    def action(self, action_type: str, **kwargs):
+        if action_type.upper() in ["MOVE", "MOVE_NODES", "ADD_RU", "REMOVE_RU"] or \
+                action_type == FogifySDK.Action_type.UPDATE_LINKS.value:
+            return SlicerSDK.action(self, action_type, **kwargs)
+        if action_type not in [e.value for e in FogifySDK.Action_type]:
+            raise ExceptionFogifySDK("The action type %s is not defined." % action_type)
+        return self.send_payload("", json.dumps({"params": kwargs}).encode('utf-8'))
+
+    def send_payload(self, path: str, payload: bytes) -> dict:
+        self.requests += 1
+        self.payload_bytes += len(payload)
+        return {"message": "OK"}
+
+    def get_statistics(self) -> dict:
+        """
+        :return: The requests that are sent to the controller and the total size of their payloads (in bytes)
+        """
+        return dict(requests=self.requests, payload_bytes=self.payload_bytes)
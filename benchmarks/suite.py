@@ -0,0 +1,328 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Callable, List, Tuple
+
+import numpy as np
+
+from benchmarks.city import SyntheticCity, WIRELESS_MODELS
+from benchmarks.controller import LocalSlicerSDK
+from networks.slicing import SliceConceptualGraph
+
+# The (RUs, UEs) of the synthetic cities of every size
+SIZES = dict(small=[(10, 10), (10, 100)], medium=[(100, 100), (100, 1000)], large=[(1000, 1000), (1000, 5000)])
+
+# The benchmarked operations
+CASES = ['import', 'build', 'generate_slices', 'move', 'batch_move', 'raster']
+
+# The modules whose import time is measured (by the import case)
+IMPORTS = ['networks', 'SlicerSDK']
+
+# The optional heavy dependencies that should not be loaded by the imports
+HEAVY_MODULES = ['ns', 'geopy', 'matplotlib', 'ipyleaflet', 'ipywidgets', 'flask', 'sklearn']
+
+# The root directory of the repository (the imported modules are resolved from it)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@dataclass
+class BenchmarkSuite:
+    """
+    Times the import of the main modules in a fresh interpreter (import), the construction of slices (build), the
+    generation of the Fogify model with all-pairs links (generate_slices), the moves of single UEs (move) and of
+    batches of UEs (batch_move) through a local stand-in of the Fogify controller, and the evaluation of coverage
+    heatmaps (raster), for synthetic cities of different sizes and every wireless model. The import case does not
+    depend on the cities, so its model is the imported module and it also reports the loaded heavy dependencies.
+    Every operation is timed repeatedly and its memory peak is recorded in an extra (traced) run, so the results can
+    be stored as JSON and compared with previous ones
+    """
+    sizes: List[Tuple[int, int]] = field(default_factory=lambda: SIZES['small'] + SIZES['medium'])
+    models: List[str] = field(default_factory=lambda: list(WIRELESS_MODELS))
+    cases: List[str] = field(default_factory=lambda: list(CASES))
+    repeats: int = 3
+    moves: int = 10  # the single moves of every repetition of the move case
+    batch_fraction: float = 0.1  # the fraction of UEs that are moved at once by the batch_move case
+    max_links: int = 2000000  # the generate_slices case is skipped for cities with more links
+    max_pixels: int = 1000000  # the resolution of the raster case is limited to this number of pixels
+    memory: bool = True
+    seed: int = 0
+    imports: List[str] = field(default_factory=lambda: list(IMPORTS))
+
+    def run(self, callback: Callable[[dict], None] = None) -> dict:
+        """
+        Runs all cases for every size and wireless model
+        :param callback: A function that is called with every result (e.g. for progress reporting)
+        :return: The metadata of the run and a list with the results
+        """
+        results = []
+        if 'import' in self.cases:
+            for module in self.imports:
+                row = dict(case='import', model=module, RUs=0, UEs=0)
+                try:
+                    row.update(self.benchmark_import(module))
+                except Exception as ex:
+                    row['error'] = repr(ex)
+                results.append(row)
+                if callback: callback(row)
+        for num_of_RUs, num_of_UEs in self.sizes:
+            for model in self.models:
+                city = SyntheticCity(num_of_RUs, num_of_UEs, model, seed=self.seed)
+                for row in self.run_city(city):
+                    results.append(row)
+                    if callback: callback(row)
+        return dict(metadata=self.get_metadata(), results=results)
+
+    def run_city(self, city: SyntheticCity) -> List[dict]:
+        """
+        Runs the cases of a city. The moves and the raster share a slice that is built once
+        :param city: The synthetic city
+        :return: The results of the cases
+        """
+        res = []
+        network = None
+        for case in self.cases:
+            if case == 'import': continue
+            row = dict(case=case, model=city.wireless_connection_type, RUs=city.num_of_RUs, UEs=city.num_of_UEs)
+            try:
+                if case == 'generate_slices' and (city.num_of_UEs + 2) ** 2 > self.max_links:
+                    row['skipped'] = f"more than {self.max_links} links"
+                elif case in ['build', 'generate_slices']:
+                    row.update(getattr(self, f'benchmark_{case}')(city))
+                else:
+                    network = network or self.build(city)
+                    row.update(getattr(self, f'benchmark_{case}')(city, network))
+            except Exception as ex:
+                row['error'] = repr(ex)
+            res.append(row)
+        return res
+
+    def measure(self, run: Callable, setup: Callable = None) -> dict:
+        """
+        Times a function (its setup is not timed or traced)
+        :param run: The function, that takes the result of the setup as argument
+        :param setup: The function that prepares every run
+        :return: The minimum, median and mean time in seconds and the memory peak in bytes
+        """
+        times = []
+        for _ in range(self.repeats):
+            state = setup() if setup else None
+            start = time.perf_counter()
+            run(state)
+            times.append(time.perf_counter() - start)
+        res = dict(repeats=self.repeats, min=min(times), median=statistics.median(times),
+                   mean=statistics.mean(times))
+        if self.memory:
+            state = setup() if setup else None
+            tracemalloc.start()
+            try:
+                run(state)
+                res['peak_memory'] = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+        return res
+
+    @staticmethod
+    def import_module(module: str, trace: bool = False) -> dict:
+        """
+        Imports a module in a fresh interpreter
+        :param module: The name of the module
+        :param trace: Records the memory peak of the import
+        :return: The time of the import in seconds, the loaded heavy modules and the memory peak in bytes (if traced)
+        """
+        code = "\n".join([
+            "import json, sys, time, tracemalloc",
+            "tracemalloc.start()" if trace else "",
+            "start = time.perf_counter()",
+            f"import {module}",
+            "res = dict(seconds=time.perf_counter() - start)",
+            "res['peak_memory'] = tracemalloc.get_traced_memory()[1]" if trace else "",
+            f"res['heavy_modules'] = [name for name in {HEAVY_MODULES!r} if name in sys.modules]",
+            "print(json.dumps(res))"])
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [ROOT, env.get('PYTHONPATH')]))
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True, env=env,
+                                cwd=ROOT).stdout
+        return json.loads(output.strip().splitlines()[-1])
+
+    def benchmark_import(self, module: str) -> dict:
+        runs = [self.import_module(module) for _ in range(self.repeats)]
+        times = [run['seconds'] for run in runs]
+        res = dict(repeats=self.repeats, min=min(times), median=statistics.median(times),
+                   mean=statistics.mean(times), heavy_modules=runs[-1]['heavy_modules'])
+        if self.memory:
+            res['peak_memory'] = self.import_module(module, trace=True)['peak_memory']
+        return res
+
+    @staticmethod
+    def build(city: SyntheticCity, topology: List[dict] = None) -> SliceConceptualGraph:
+        """
+        Builds the slice of a city along with its nodes
+        :param city: The synthetic city
+        :param topology: The topology nodes of the city's model (generated if it is None)
+        :return: The slice
+        """
+        network = SliceConceptualGraph(**city.get_network())
+        for node in topology or city.get_model()['x-fogify']['topology']:
+            network.add_node(node['label'], **node['location'])
+        return network
+
+    def benchmark_build(self, city: SyntheticCity) -> dict:
+        topology = city.get_model()['x-fogify']['topology']
+        return self.measure(lambda _: self.build(city, topology))
+
+    def benchmark_generate_slices(self, city: SyntheticCity) -> dict:
+        model = city.get_model()
+        slicer_sdks = []
+
+        def setup():
+            slicer_sdks.append(LocalSlicerSDK(model))
+            return slicer_sdks[-1]
+
+        res = self.measure(lambda slicer_sdk: slicer_sdk.generate_slices(), setup)
+        res['links'] = len([link for network in slicer_sdks[-1].networks for link in network.get('links', [])])
+        return res
+
+    def get_slicer_sdk(self, network: SliceConceptualGraph) -> LocalSlicerSDK:
+        slicer_sdk = LocalSlicerSDK(dict(services={}))
+        slicer_sdk.slices[network.get_name()] = network
+        return slicer_sdk
+
+    def benchmark_move(self, city: SyntheticCity, network: SliceConceptualGraph) -> dict:
+        slicer_sdk = self.get_slicer_sdk(network)
+        UEs = city.get_UEs(seed=self.seed + 1)
+        random = np.random.default_rng(self.seed)
+
+        def run(_):
+            for i in random.integers(0, len(UEs), self.moves):
+                slicer_sdk.move_node_to_location(network.get_name(), f"ue-{i}", UEs[i]['lat'], UEs[i]['lon'])
+
+        res = self.measure(run)
+        for name in ['min', 'median', 'mean']:
+            res[f'{name}_per_move'] = res[name] / self.moves
+        moves = (self.repeats + int(self.memory)) * self.moves
+        res.update({f'{name}_per_move': value / moves for name, value in slicer_sdk.get_statistics().items()})
+        return res
+
+    def benchmark_batch_move(self, city: SyntheticCity, network: SliceConceptualGraph) -> dict:
+        slicer_sdk = self.get_slicer_sdk(network)
+        size = max(1, int(len(city.get_UEs()) * self.batch_fraction))
+        runs = self.repeats + int(self.memory)
+        batches = [city.get_UEs(seed=self.seed + i + 2)[:size] for i in range(runs)]
+        res = self.measure(lambda batch: slicer_sdk.move_nodes_to_locations(network.get_name(), batch),
+                           lambda: batches.pop())
+        res['batch_size'] = size
+        res.update({f'{name}_per_batch': value / runs for name, value in slicer_sdk.get_statistics().items()})
+        return res
+
+    def benchmark_raster(self, city: SyntheticCity, network: SliceConceptualGraph) -> dict:
+        bounds = city.get_bounds()
+        (south, west), (north, east) = bounds
+        area = (north - south) * 111.32 * (east - west) * 111.32 * np.cos(np.radians(city.center[0]))
+        resolution = max(0.01, float(np.sqrt(area / self.max_pixels)))
+
+        def setup():
+            network.rasterizer.tiles = {}  # the tiles of the previous runs are not reused
+
+        res = self.measure(lambda _: network.get_qos_raster(bounds, resolution), setup)
+        res['resolution'] = resolution
+        res['pixels'] = int(np.prod(network.get_qos_raster(bounds, resolution).shape))
+        return res
+
+    @staticmethod
+    def get_metadata() -> dict:
+        try:
+            revision = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True).stdout.strip()
+        except OSError:
+            revision = None
+        return dict(created=datetime.datetime.now().isoformat(), revision=revision or None,
+                    python=platform.python_version(), numpy=np.__version__, platform=platform.platform())
+
+    @staticmethod
+    def save(results: dict, filename: str) -> None:
+        with open(filename, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    @staticmethod
+    def load(filename: str) -> dict:
+        with open(filename) as f:
+            return json.load(f)
+
+    @staticmethod
+    def compare(results: dict, baseline: dict, threshold: float = 0.2, metric: str = 'min') -> List[dict]:
+        """
+        Finds the regressions of a run compared to a previous one
+        :param results: The results of the run
+        :param baseline: The results of the previous run
+        :param threshold: The relative slowdown (e.g. 0.2 for 20%) that is considered as regression
+        :param metric: The compared time (min, median or mean)
+        :return: The cases whose time increased more than the threshold along with their times and ratio
+        """
+        def key(row):
+            return row['case'], row['model'], row['RUs'], row['UEs']
+
+        previous = {key(row): row for row in baseline['results'] if metric in row}
+        res = []
+        for row in results['results']:
+            if metric not in row or key(row) not in previous: continue
+            ratio = row[metric] / previous[key(row)][metric] if previous[key(row)][metric] > 0 else float('inf')
+            if ratio > 1 + threshold:
+                res.append(dict(zip(['case', 'model', 'RUs', 'UEs'], key(row)), baseline=previous[key(row)][metric],
+                                current=row[metric], ratio=ratio))
+        return res
+
+
+def parse_sizes(value: str) -> List[Tuple[int, int]]:
+    """
+    :param value: Comma separated sizes (small, medium, large) or RUs x UEs (e.g. 100x1000)
+    :return: The (RUs, UEs) pairs
+    """
+    res = []
+    for size in value.split(','):
+        if size in SIZES:
+            res.extend(SIZES[size])
+        else:
+            RUs, UEs = size.lower().split('x')
+            res.append((int(RUs), int(UEs)))
+    return res
+
+
+def main(args: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks of the slices' construction, links and mobility")
+    parser.add_argument('--sizes', default='small', help="small, medium, large or RUsxUEs (e.g. 100x1000)")
+    parser.add_argument('--models', default=','.join(WIRELESS_MODELS), help="The wireless models")
+    parser.add_argument('--cases', default=','.join(CASES), help="The benchmarked operations")
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--no-memory', action='store_true', help="Do not record the memory peaks")
+    parser.add_argument('--output', default='benchmarks.json', help="The JSON file of the results")
+    parser.add_argument('--baseline', help="The JSON file of previous results that are compared with the new ones")
+    parser.add_argument('--threshold', type=float, default=0.2, help="The relative slowdown of a regression")
+    args = parser.parse_args(args)
+
+    suite = BenchmarkSuite(parse_sizes(args.sizes), args.models.split(','), args.cases.split(','), args.repeats,
+                           memory=not args.no_memory)
+
+    def report(row):
+        status = row.get('skipped') or row.get('error') or f"{row['min']:.4f}s"
+        print(f"{row['case']:>16} {row['model']:>20} {row['RUs']:>5} RUs {row['UEs']:>5} UEs: {status}", flush=True)
+
+    results = suite.run(report)
+    suite.save(results, args.output)
+    if args.baseline:
+        regressions = suite.compare(results, suite.load(args.baseline), args.threshold)
+        for row in regressions:
+            print(f"Regression of {row['case']} ({row['model']}, {row['RUs']} RUs, {row['UEs']} UEs): "
+                  f"{row['baseline']:.4f}s -> {row['current']:.4f}s ({row['ratio']:.2f}x)")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
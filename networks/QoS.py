@@ -33,17 +33,22 @@ class QoS:
         Returns the QoS as formatted bidirectional QoS (latency and error divided by half)
         :return: A dict representation of QoS
         """
-        delay = self.get_delay() / 2 if self.get_delay() else None
-        deviation = self.get_deviation() / 2 if self.get_deviation() else None
-        error_rate = self.get_error_rate() / 2 if self.get_error_rate() else None
-        bandwidth = self.get_bandwidth()
-        return self.__format_qos(delay, deviation, bandwidth, error_rate)
+        return self.format_qos(*self.get_bidirectional_values())
+
+    def get_bidirectional_values(self) -> tuple:
+        """
+        Every parameter is parsed once
+        :return: The (delay, deviation, bandwidth, error_rate) of the formatted bidirectional QoS (None if not set)
+        """
+        delay, deviation, error_rate = self.get_delay(), self.get_deviation(), self.get_error_rate()
+        return delay / 2 if delay else None, deviation / 2 if deviation else None, self.get_bandwidth(), \
+            error_rate / 2 if error_rate else None
 
     def get_formated_qos(self) -> dict:
-        return self.__format_qos(self.get_delay(), self.get_deviation(), self.get_bandwidth(), self.get_error_rate())
+        return self.format_qos(self.get_delay(), self.get_deviation(), self.get_bandwidth(), self.get_error_rate())
 
     @staticmethod
-    def __format_qos(delay, deviation, bandwidth, error_rate) -> dict:
+    def format_qos(delay, deviation, bandwidth, error_rate) -> dict:
         """
         Formats the QoS as a dict
         :param delay: Delay in milliseconds
@@ -0,0 +1,123 @@
+import math
+from typing import Dict, List
+
+import numpy as np
+
+from networks.QoS import QoS
+
+
+class CellLoad(object):
+    """
+    Shares the capacity (air time) of every RU among its served UEs. The radio bandwidth of a UE is its data rate
+    when it has all the air time of its RU, and its share depends on the policy:
+    - equal: every UE of the RU gets the same data rate (max-min fairness), i.e. 1 / sum(1 / bandwidth) of the UEs
+    - proportional_fair: every UE gets an equal share of the air time, i.e. its radio bandwidth / number of UEs
+    The served UEs (the ones with radio bandwidth) are kept in attachment sets per RU, so an attach or a detach
+    changes only the shares of the UEs of the affected RUs
+    """
+
+    class CellLoadException(Exception): pass
+
+    policies = ['equal', 'proportional_fair']
+
+    def __init__(self, policy: str = 'equal'):
+        """
+        :param policy: How the capacity of an RU is shared (equal or proportional_fair)
+        """
+        if policy not in self.policies:
+            raise CellLoad.CellLoadException(f"{policy} is not a cell load policy. The policies are {self.policies}")
+        self.policy = policy
+        self.members: Dict[str, Dict[str, QoS]] = {}  # the radio QoS of the served UEs of every RU
+        self.RUs: Dict[str, str] = {}  # the RU of every served UE
+
+    def get_params(self) -> Dict[str, str]:
+        return dict(policy=self.policy)
+
+    def attach(self, UE: str, RU: str, qos: QoS) -> List[str]:
+        """
+        Updates the RU and the radio QoS of a UE (a UE without bandwidth is not served)
+        :param UE: The UE's identifier
+        :param RU: The RU's identifier
+        :param qos: The radio QoS of the UE's connection
+        :return: The RUs whose shares changed
+        """
+        res = self.detach(UE)
+        if qos.get_bandwidth() > 0:
+            self.members.setdefault(RU, {})[UE] = qos
+            self.RUs[UE] = RU
+            res = [i for i in res if i != RU] + [RU]
+        return res
+
+    def detach(self, UE: str) -> List[str]:
+        """
+        :param UE: The UE's identifier
+        :return: The RU that the UE left (if it was served)
+        """
+        RU = self.RUs.pop(UE, None)
+        if RU is None:
+            return []
+        del self.members[RU][UE]
+        if len(self.members[RU]) == 0:
+            del self.members[RU]
+        return [RU]
+
+    def remove_RU(self, RU: str) -> None:
+        """
+        Drops the UEs of a removed RU (they should be attached again to other RUs)
+        """
+        for UE in self.members.pop(RU, {}):
+            del self.RUs[UE]
+
+    def get_load(self, RU: str) -> (int, float):
+        """
+        :param RU: The RU's identifier
+        :return: The number of served UEs and the sum of their inverse radio bandwidths (independent of their order)
+        """
+        members = self.members.get(RU, {})
+        return len(members), math.fsum(1 / qos.get_bandwidth() for qos in members.values())
+
+    def get_qos(self, RU: str) -> Dict[str, QoS]:
+        """
+        :param RU: The RU's identifier
+        :return: The QoS of every served UE of the RU with its share of the RU's capacity
+        """
+        count, inverse_sum = self.get_load(RU)
+        res = {}
+        for UE, qos in self.members.get(RU, {}).items():
+            shared = QoS(qos.get_params())
+            shared.set_bandwidth(float(self.share(qos.get_bandwidth(), count, inverse_sum)))
+            res[UE] = shared
+        return res
+
+    def share(self, bandwidth, count, inverse_sum):
+        """
+        Vectorized share of a UE's radio bandwidth
+        :param bandwidth: The radio bandwidth of the UE (or an array of them)
+        :param count: The number of served UEs of the RU (along with the UE)
+        :param inverse_sum: The sum of the inverse radio bandwidths of the RU's UEs (along with the UE)
+        :return: The data rate of the UE
+        """
+        if self.policy == 'equal':
+            return np.round(1 / np.asarray(inverse_sum, dtype=np.float64), 3)
+        return np.round(np.asarray(bandwidth, dtype=np.float64) / count, 3)
+
+    def share_with_new_UE(self, bandwidths: np.ndarray, counts: np.ndarray, inverse_sums: np.ndarray) -> np.ndarray:
+        """
+        The data rates of new UEs (e.g. the pixels of a raster) that join RUs
+        :param bandwidths: The radio bandwidths of the new UEs
+        :param counts: The number of served UEs of the RU of every new UE
+        :param inverse_sums: The sum of the inverse radio bandwidths of the RU of every new UE
+        :return: The data rates (0 for the UEs without radio bandwidth)
+        """
+        bandwidths = np.asarray(bandwidths, dtype=np.float64)
+        res = np.zeros(bandwidths.shape)
+        served = bandwidths > 0
+        res[served] = self.share(bandwidths[served], np.asarray(counts)[served] + 1,
+                                 np.asarray(inverse_sums)[served] + 1 / bandwidths[served])
+        return res
+
+    def copy(self) -> 'CellLoad':
+        res = CellLoad(self.policy)
+        res.members = {RU: dict(members) for RU, members in self.members.items()}
+        res.RUs = dict(self.RUs)
+        return res
@@ -1,12 +1,17 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 
+import numpy as np
+
 from networks.QoS import QoS
 
 
 @dataclass
 class Wireless(ABC):
 
+    # If it is True, the QoS depends on the nearby RUs and their load (the RUs parameter of get_qos_from), i.e. their
+    # connected UEs or, for the models with an allocator, the resources that are available to the UE
+    depends_on_RUs = False
 
     @abstractmethod
     def get_radius(self):
@@ -16,6 +21,50 @@ class Wireless(ABC):
     def get_qos_from(self, *args, **kwargs) -> QoS:
         raise NotImplementedError
 
+    def get_qos_table(self, distances: np.ndarray, connected_UEs: np.ndarray = None,
+                      resolution: float = 0.001) -> dict:
+        """
+        Vectorized QoS of multiple locations that are connected to their closest RU
+        :param distances: An (N, M) array with the distances (in km) of N locations from M RUs
+        :param connected_UEs: The number of connected UEs of every RU
+        :param resolution: The distances are rounded to this resolution (in km), so the QoS is computed once
+        for every rounded distance. If it is None, the QoS is computed for every distinct distance
+        :return: A dict with the delay, deviation, bandwidth and error_rate arrays of the N locations. Models that
+        select the RU of every location by other criteria add the column of the selected RU (RU)
+        """
+        return self.evaluate_distances(self.get_qos_from, np.min(distances, axis=1), resolution)
+
+    @staticmethod
+    def evaluate_distances(get_qos_from, distances: np.ndarray, resolution: float = None) -> dict:
+        """
+        Computes the QoS of every distinct (rounded) distance and maps it to all distances
+        :param get_qos_from: The function that computes the QoS of a distance
+        :param distances: An array of distances in km
+        :param resolution: The resolution of the rounding in km (no rounding if it is None)
+        :return: A dict with the delay, deviation, bandwidth and error_rate arrays
+        """
+        distances = np.asarray(distances, dtype=np.float64)
+        if resolution:
+            distances = np.round(distances / resolution) * resolution
+        unique_distances, inverse = np.unique(distances, return_inverse=True)
+        qos = [get_qos_from(float(distance)) for distance in unique_distances]
+        return {name: np.array([getattr(i, f'get_{name}')() for i in qos], dtype=np.float64)[inverse]
+                for name in ['delay', 'deviation', 'bandwidth', 'error_rate']}
+
+    def get_allocator(self):
+        """
+        :return: The per-slice accounting of the RUs' resources (e.g. the antennas of MIMO) or None if the QoS does not
+        depend on shared resources
+        """
+        return None
+
+    def get_interference_radius(self):
+        """
+        :return: The radius (in km) of the co-channel RUs that interfere with the serving RU, or None if the model does
+        not consider interference. The distances of these RUs are given to get_qos_from as interfering_distances
+        """
+        return None
+
     def set_radius(self, radius: int):
         self.radius = radius
         if type(radius) == str:
@@ -0,0 +1,146 @@
+import heapq
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+
+class AntennaAllocator(object):
+    """
+    Per-RU accounting of the spatial streams of a MIMO slice. Every RU has as many streams as its antennas and a UE
+    gets up to as many streams as its antennas from the free streams of its RU. The UEs that got fewer streams wait,
+    in their allocation order, for the streams that are released when other UEs leave the RU, so every allocation
+    is O(1) and every release is re-balanced incrementally (only the waiting UEs of the RU are upgraded).
+    The free streams of the RUs are kept in a (lazy) max-heap, so the most free streams of any RU are found in O(log R)
+    """
+
+    def __init__(self, RU_antennas: int, UE_antennas: int):
+        """
+        :param RU_antennas: The antennas (streams) of every RU
+        :param UE_antennas: The antennas (maximum streams) of every UE
+        """
+        self.RU_antennas = RU_antennas
+        self.UE_antennas = UE_antennas
+        self.allocated: Dict[str, int] = {}  # the allocated streams of every RU
+        self.streams: Dict[str, Tuple[str, int]] = {}  # the RU and the streams of every UE (in allocation order)
+        self.waiting: Dict[str, OrderedDict] = {}  # the UEs of every RU with fewer streams than their antennas
+        self.free: List[Tuple[int, str]] = []  # the (negative) free streams of the RUs, including outdated entries
+
+    def __update_free(self, RU: str) -> None:
+        """
+        Pushes the current free streams of an RU to the heap (its previous entries are outdated)
+        """
+        heapq.heappush(self.free, (self.allocated[RU] - self.RU_antennas, RU))
+        if len(self.free) > 2 * len(self.allocated) + 16:  # too many outdated entries
+            self.free = [(allocated - self.RU_antennas, RU_) for RU_, allocated in self.allocated.items()]
+            heapq.heapify(self.free)
+
+    def get_maximum_free(self, RUs: int) -> int:
+        """
+        :param RUs: The number of the slice's RUs
+        :return: The most free streams of any RU (all streams if an RU has no allocation)
+        """
+        if len(self.allocated) < RUs:
+            return self.RU_antennas
+        while self.free and (self.free[0][1] not in self.allocated or
+                             self.free[0][0] != self.allocated[self.free[0][1]] - self.RU_antennas):
+            heapq.heappop(self.free)
+        return -self.free[0][0] if self.free else self.RU_antennas
+
+    def get_free(self, RU: str) -> int:
+        """
+        :param RU: The RU's identifier
+        :return: The streams of the RU that are not allocated
+        """
+        return self.RU_antennas - self.allocated.get(RU, 0)
+
+    def get_streams(self, UE: str, RU: str) -> int:
+        """
+        :param UE: The UE's identifier (None for a new UE)
+        :param RU: The RU's identifier
+        :return: The allocated streams of the UE if it is served by the RU, otherwise the streams that it would get
+        """
+        current = self.streams.get(UE)
+        if current is not None and current[0] == RU:
+            return current[1]
+        return max(0, min(self.UE_antennas, self.get_free(RU)))
+
+    def allocate(self, UE: str, RU: str) -> List[str]:
+        """
+        Allocates the streams of a UE at an RU (the ones of its previous RU are released)
+        :param UE: The UE's identifier
+        :param RU: The RU's identifier
+        :return: The UEs of the previous RU that got more streams
+        """
+        current = self.streams.get(UE)
+        if current is not None and current[0] == RU:
+            return []
+        res = self.release(UE)
+        streams = self.get_streams(UE, RU)
+        self.streams[UE] = (RU, streams)
+        self.allocated[RU] = self.allocated.get(RU, 0) + streams
+        self.__update_free(RU)
+        if streams < self.UE_antennas:
+            self.waiting.setdefault(RU, OrderedDict())[UE] = None
+        return res
+
+    def release(self, UE: str) -> List[str]:
+        """
+        Releases the streams of a UE and gives them to the waiting UEs of its RU
+        :param UE: The UE's identifier
+        :return: The UEs that got more streams
+        """
+        current = self.streams.pop(UE, None)
+        if current is None:
+            return []
+        RU, streams = current
+        self.allocated[RU] -= streams
+        waiting = self.waiting.get(RU, OrderedDict())
+        waiting.pop(UE, None)
+        res = []
+        while waiting and self.get_free(RU) > 0:
+            name = next(iter(waiting))
+            extra = min(self.UE_antennas - self.streams[name][1], self.get_free(RU))
+            self.streams[name] = (RU, self.streams[name][1] + extra)
+            self.allocated[RU] += extra
+            if self.streams[name][1] == self.UE_antennas:
+                waiting.pop(name)
+            res.append(name)
+        self.__update_free(RU)
+        return res
+
+    def remove_RU(self, RU: str) -> List[str]:
+        """
+        Drops the allocations of a removed RU (its UEs should be allocated again at other RUs)
+        :param RU: The RU's identifier
+        :return: The UEs that were served by the RU
+        """
+        res = [name for name, (RU_, _) in self.streams.items() if RU_ == RU]
+        for name in res:
+            del self.streams[name]
+        self.allocated.pop(RU, None)
+        self.waiting.pop(RU, None)
+        return res
+
+    def get_state(self) -> List[list]:
+        """
+        :return: The RU and the streams of every UE in their allocation order
+        """
+        return [[name, RU, streams] for name, (RU, streams) in self.streams.items()]
+
+    def set_state(self, state: List[list]) -> None:
+        """
+        Restores the allocations
+        :param state: The RU and the streams of every UE in their allocation order (as returned by get_state)
+        """
+        self.allocated, self.streams, self.waiting = {}, {}, {}
+        for name, RU, streams in state:
+            self.streams[name] = (RU, int(streams))
+            self.allocated[RU] = self.allocated.get(RU, 0) + int(streams)
+            if streams < self.UE_antennas:
+                self.waiting.setdefault(RU, OrderedDict())[name] = None
+        self.free = [(allocated - self.RU_antennas, RU) for RU, allocated in self.allocated.items()]
+        heapq.heapify(self.free)
+
+    def copy(self) -> 'AntennaAllocator':
+        res = AntennaAllocator(self.RU_antennas, self.UE_antennas)
+        res.set_state(self.get_state())
+        return res
@@ -0,0 +1,78 @@
+import numpy as np
+
+from networks.QoS import QoS
+from networks.connections.mimo import SISO, db_to_watt
+from networks.connections.registry import wireless_models
+
+
+@wireless_models.register
+class SINR(SISO):
+    """
+    SISO channel whose capacity and error rate depend on the signal to interference plus noise ratio. The co-channel
+    RUs within the interference radius transmit (a fraction of the time, the activity factor) with the same power
+    and gains with the serving RU, and their received powers are added to the noise
+    """
+
+    def __init__(self, transmit_power=30,  # dbm
+                 carrier_frequency=28,  # gigahrz
+                 bandwidth=100,  # megahrz
+                 UE_noise_figure=7.8,  # db
+                 RU_antennas_gain=8,  # db
+                 UE_antennas_gain=3,  # db
+                 maximum_bitrate=538.71,  # mbits per second
+                 minmum_bitrate=53.87,  # mbits per second
+                 queuing_delay=2,  # in milliseconds
+                 backend="numpy",  # numpy or ns3
+                 interference_radius=0.5,  # km
+                 activity_factor=1.0):  # the fraction of time that the interfering RUs transmit
+        SISO.__init__(self, transmit_power, carrier_frequency, bandwidth, UE_noise_figure, RU_antennas_gain,
+                      UE_antennas_gain, maximum_bitrate, minmum_bitrate, queuing_delay, backend)
+        self.interference_radius = float(interference_radius)
+        self.activity_factor = float(activity_factor)
+
+    def get_interference_radius(self) -> float:
+        return self.interference_radius
+
+    def get_interference(self, interfering_distances) -> float:
+        """
+        :param interfering_distances: The distances (in km) of the interfering RUs
+        :return: The sum of their received powers in watts
+        """
+        if interfering_distances is None or len(interfering_distances) == 0:
+            return 0.0
+        powers = db_to_watt(np.asarray(self.compute_signal(np.asarray(interfering_distances) * 1000)))
+        return self.activity_factor * float(np.sum(powers))
+
+    def get_qos_from(self, distance, RUs=None, location=None, interfering_distances=None, *args, **kwargs) -> QoS:
+        """
+        :param distance: The distance from the serving RU in km
+        :param interfering_distances: The distances (in km) of the co-channel RUs within the interference radius
+        :return: The QoS of the connection with the SINR of the location
+        """
+        distance_in_meters = distance * 1000
+        interference = self.get_interference(interfering_distances)
+        return QoS(dict(latency=dict(delay=self.queuing_delay, deviation=1),
+                        bandwidth=self.get_bandwidth_from_distance(distance_in_meters, interference),
+                        error_rate=self.get_error_rate(distance_in_meters, interference)))
+
+    def get_qos_table(self, distances: np.ndarray, connected_UEs: np.ndarray = None,
+                      resolution: float = 0.001) -> dict:
+        """
+        Vectorized QoS of multiple locations that are connected to their closest RU, while the rest RUs within the
+        interference radius interfere
+        :param distances: An (N, M) array with the distances (in km) of N locations from M RUs (all RUs within the
+        interference radius of the locations should be included)
+        :param resolution: The distances from the serving RUs are rounded to this resolution (in km)
+        :return: A dict with the delay, deviation, bandwidth and error_rate arrays of the N locations
+        """
+        distances = np.asarray(distances, dtype=np.float64)
+        closest = np.argmin(distances, axis=1)
+        rows = np.arange(len(distances))
+        interfering = distances <= self.interference_radius
+        interfering[rows, closest] = False
+        powers = np.zeros(distances.shape)
+        powers[interfering] = db_to_watt(np.asarray(self.compute_signal(distances[interfering] * 1000)))
+        serving_distances = distances[rows, closest]
+        if resolution:
+            serving_distances = np.round(serving_distances / resolution) * resolution
+        return self.get_qos_arrays(serving_distances, self.activity_factor * powers.sum(axis=1))
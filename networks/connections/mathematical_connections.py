@@ -2,6 +2,7 @@ from networks.QoS import QoS
 from networks.connections import Wireless
 from networks.connections.degradation_functions import LinearDegradationFunction, Log2DegradationFunction, \
     Log10DegradationFunction
+from networks.connections.registry import wireless_models
 from utils.general import Bins
 
 
@@ -82,6 +83,7 @@ class FunctionalDegradation(Wireless):
         return self.radius
 
 
+@wireless_models.register
 class LinearDegradation(FunctionalDegradation):
     """
     The QoS (from best to worst) follow a linear degradation rate
@@ -89,6 +91,7 @@ class LinearDegradation(FunctionalDegradation):
     degradation_function = LinearDegradationFunction
 
 
+@wireless_models.register
 class Log2Degradation(FunctionalDegradation):
     """
     The QoS (from best to worst) follow a log2 degradation rate
@@ -96,6 +99,7 @@ class Log2Degradation(FunctionalDegradation):
     degradation_function = Log2DegradationFunction
 
 
+@wireless_models.register
 class Log10Degradation(FunctionalDegradation):
     """
     The QoS (from best to worst) follow a log10 degradation rate
@@ -103,6 +107,7 @@ class Log10Degradation(FunctionalDegradation):
     degradation_function = Log10DegradationFunction
 
 
+@wireless_models.register
 class MultiRangeNetwork(Wireless):
     """
     Stepwise QoS for a network. Specifically, the user can define multiple ranges (bins) with multiple QoS parameters
@@ -134,6 +139,7 @@ class MultiRangeNetwork(Wireless):
         return self.radius
 
 
+@wireless_models.register
 class FlatWirelessNetwork(MultiRangeNetwork):
     """
     This class keeps flat QoS in a specific radio unit based on specific radius (km)
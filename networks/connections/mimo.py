@@ -1,10 +1,12 @@
 import math
 
-from ns import core, propagation, wifi
-from ns.mobility import ConstantPositionMobilityModel
+import numpy as np
 
 from networks.QoS import QoS
 from networks.connections import Wireless
+from networks.connections.allocation import AntennaAllocator
+from networks.connections.radio import radio_backends
+from networks.connections.registry import wireless_models
 from utils.location import Location
 
 
@@ -12,12 +14,22 @@ def db_to_watt(db):
     return 10 ** (db / 10.0)
 
 
+def as_output(values, distance):
+    """
+    :return: The values as float if the distance is a scalar, otherwise as array
+    """
+    return float(values) if np.ndim(distance) == 0 else values
+
+
+@wireless_models.register
 class SISO(Wireless):
+    """
+    The signal, SNR, capacity and error rate of a single-input-single-output channel (Friis propagation and DQPSK
+    error rate). The distances can be scalars or arrays, so the QoS of many locations is computed with one call.
+    The default backend is NumPy and the ns-3 models are the reference backend (backend="ns3")
+    """
 
-    # Default propagation model is NS3 Friis model
-    propagation_loss_model = propagation.FriisPropagationLossModel()
-    # Default error rate mode is set to be the NS3 wifi Dsss model
-    error_loss_model = wifi.DsssErrorRateModel()
+    class SISOException(Exception): pass
 
     def __init__(self, transmit_power=30,  # dbm
                  carrier_frequency=28,  # gigahrz
@@ -27,17 +39,21 @@ class SISO(Wireless):
                  UE_antennas_gain=3,  # db
                  maximum_bitrate=538.71,  # mbits per second
                  minmum_bitrate=53.87,  # mbits per second
-                 queuing_delay=2):  # in milliseconds
+                 queuing_delay=2,  # in milliseconds
+                 backend="numpy"):  # numpy or ns3
         self.maximum_bitrate = float(maximum_bitrate)
         self.minmum_bitrate = float(minmum_bitrate)
         self.bandwidth = float(bandwidth) * 1e6  # bandwidth in hertz
         self.carrier_frequency = float(carrier_frequency) * 1e9
-        self.propagation_loss_model.SetFrequency(self.carrier_frequency)
+        if backend not in radio_backends:
+            raise SISO.SISOException(f"{backend} is not a radio backend. The backends are {list(radio_backends)}")
+        self.radio = radio_backends[backend](self.carrier_frequency)
         self.UE_noise_figure = float(UE_noise_figure)
         self.queuing_delay = float(queuing_delay)  # The delay is static
         self.transmit_power = float(transmit_power)
         self.RU_antennas_gain = float(RU_antennas_gain)
         self.UE_antennas_gain = float(UE_antennas_gain)
+        self.radius = None  # computed on the first use
 
     def get_radius(self) -> float:
         """
@@ -46,92 +62,91 @@ class SISO(Wireless):
         the bandwidth is getting less than minimum provided bandwidth.
         :return: Radius in km
         """
-        for i in range(0, 10000):
-            bandwidth = self.get_ideal_bandwidth(i)
-            if self.minmum_bitrate > bandwidth:
-                break
-        return i / 1000
+        if self.radius is not None:
+            return self.radius
+        bandwidths = self.get_ideal_bandwidth(np.arange(10000, dtype=np.float64))  # every meter up to 10km
+        below = np.flatnonzero(self.minmum_bitrate > bandwidths)
+        self.radius = int(below[0] if len(below) else len(bandwidths) - 1) / 1000
+        return self.radius
 
-    def calculate_snr_in_db(self, distance) -> float:
+    def calculate_snr_in_db(self, distance):
         """
         Computes signal to noise ratio
-        :param distance: The distance between the receiver and transmitter
+        :param distance: The distance (or an array of distances) between the receiver and transmitter
         :return: The SNR ratio
         """
         signal = self.compute_signal(distance)
-        Nt = -174 + 10 * math.log10(self.bandwidth)  # Noise
-        snr = signal - (Nt + self.UE_noise_figure)  # Subtract noise from signal
+        snr = signal - self.get_noise()  # Subtract noise from signal
         return snr
 
-    def compute_signal(self, distance) -> float:
+    def get_noise(self) -> float:
+        """
+        :return: The thermal noise of the bandwidth along with the UE's noise figure in db
+        """
+        Nt = -174 + 10 * math.log10(self.bandwidth)  # Noise
+        return Nt + self.UE_noise_figure
+
+    def compute_signal(self, distance):
         """
         Generates the RSSI signal
-        :param distance: The distance between the receiver and transmitter
+        :param distance: The distance (or an array of distances) between the receiver and transmitter
         :return: RSSI signal power
         """
-        a, b = self.get_points_from_distance(distance)
-        negative_propagation_loss = self.propagation_loss_model.CalcRxPower(self.transmit_power, a, b)  # dbm
-        negative_propagation_loss -= 30  # to db
+        negative_propagation_loss = self.radio.get_rx_power(self.transmit_power, distance)  # dbm
+        negative_propagation_loss = negative_propagation_loss - 30  # to db
         transmit_power_to_db = self.transmit_power - 30
         RSSI = transmit_power_to_db + self.UE_antennas_gain + self.RU_antennas_gain + negative_propagation_loss
-        return RSSI
+        return as_output(RSSI, distance)
 
-    def get_snr_from_distance(self, distance) -> float:
+    def get_snr_from_distance(self, distance, interference=0.0):
         """
-        Returns the watt representation of SNR
-        :param distance: The distance between the receiver and transmitter
+        Returns the watt representation of SNR (or SINR if there is interference)
+        :param distance: The distance (or an array of distances) between the receiver and transmitter
+        :param interference: The interfering power (or an array of them) in watts
         :return: The SNR in watts
         """
         snr = self.calculate_snr_in_db(distance)
-        snr = db_to_watt(snr)
-        return snr
+        snr = db_to_watt(np.asarray(snr))
+        if np.any(interference):
+            snr = snr / (1 + np.asarray(interference) / db_to_watt(self.get_noise()))  # S / (N + I)
+        return as_output(snr, distance)
 
-    def get_ideal_bandwidth(self, distance) -> float:
+    def get_ideal_bandwidth(self, distance, interference=0.0):
         """
         Returns the ideal capacity (data rate) of the channel
-        :param distance: The distance between the receiver and transmitter
+        :param distance: The distance (or an array of distances) between the receiver and transmitter
+        :param interference: The interfering power (or an array of them) in watts
         :return: The ideal capacity
         """
-        snr = self.get_snr_from_distance(distance)
-        capacity = self.bandwidth * math.log2(1 + snr)
+        snr = self.get_snr_from_distance(distance, interference)
+        capacity = self.bandwidth * np.log2(1 + np.asarray(snr))
         capacity = capacity / 1e6
-        return capacity
+        return as_output(capacity, distance)
 
-    def get_bandwidth_from_distance(self, distance) -> float:
+    def get_bandwidth_from_distance(self, distance, interference=0.0):
         """
         Limits the data rate between the generated limits
-        :param distance: The distance between the receiver and transmitter
+        :param distance: The distance (or an array of distances) between the receiver and transmitter
+        :param interference: The interfering power (or an array of them) in watts
         :return: The data rate in mbytes per second
         """
-        capacity = self.get_ideal_bandwidth(distance)
-        fin_capacity = self.maximum_bitrate
-        if capacity >= self.minmum_bitrate and capacity <= self.maximum_bitrate:
-            fin_capacity = capacity
-        if capacity < self.minmum_bitrate:
-            fin_capacity = self.minmum_bitrate
-
-        return fin_capacity * 0.125  # to generate Mbytes per second
+        capacity = np.asarray(self.get_ideal_bandwidth(distance, interference))
+        fin_capacity = np.where(capacity < self.minmum_bitrate, self.minmum_bitrate,
+                                np.where(capacity <= self.maximum_bitrate, capacity, self.maximum_bitrate))
+        return as_output(fin_capacity * 0.125, distance)  # to generate Mbytes per second
 
-    #
-    def get_error_rate(self, distance) -> float:
+    def get_error_rate(self, distance, interference=0.0):
         """
         Returns the error rate based on error_loss_model
-        :param distance: The distance between the receiver and transmitter
+        :param distance: The distance (or an array of distances) between the receiver and transmitter
+        :param interference: The interfering power (or an array of them) in watts
         :return: Connection's error rate
         """
-        snr = self.get_snr_from_distance(distance)
+        snr = np.asarray(self.get_snr_from_distance(distance, interference))
         EbN0 = (snr * self.bandwidth / 1e6) / 2.0  # 2 bits per symbol
-        ber = self.error_loss_model.DqpskFunction(EbN0)
+        ber = self.radio.get_bit_error_rate(EbN0)
         nbits = 100
-        return 100 * (1 - math.pow((1.0 - ber), nbits))
-
-    @staticmethod
-    def get_points_from_distance(distance):
-        a = ConstantPositionMobilityModel()
-        b = ConstantPositionMobilityModel()
-        a.SetPosition(core.Vector(0, 0, 0))
-        b.SetPosition(core.Vector(distance, 0, 0))
-        return a, b
+        return as_output(100 * (1 - np.power((1.0 - ber), nbits)), distance)
 
     def get_queuing_delay(self) -> float:
         return self.queuing_delay
@@ -142,45 +157,123 @@ class SISO(Wireless):
             bandwidth=self.get_bandwidth_from_distance(distance_in_meters),
             error_rate=self.get_error_rate(distance_in_meters)))
 
+    def get_qos_arrays(self, distances: np.ndarray, interference=0.0) -> dict:
+        """
+        Vectorized version of get_qos_from (the values are rounded and limited as in the QoS objects)
+        :param distances: An array of distances in km
+        :param interference: The interfering power at every distance in watts
+        :return: A dict with the delay, deviation, bandwidth and error_rate arrays
+        """
+        distances_in_meters = np.asarray(distances, dtype=np.float64) * 1000
+        return dict(delay=np.full(distances_in_meters.shape, round(self.queuing_delay, 2)),
+                    deviation=np.full(distances_in_meters.shape, 1.0),
+                    bandwidth=np.round(self.get_bandwidth_from_distance(distances_in_meters, interference), 3),
+                    error_rate=np.minimum(self.get_error_rate(distances_in_meters, interference), 100))
+
+    def get_qos_table(self, distances: np.ndarray, connected_UEs: np.ndarray = None,
+                      resolution: float = 0.001) -> dict:
+        distances = np.min(np.asarray(distances, dtype=np.float64), axis=1)
+        if resolution:
+            distances = np.round(distances / resolution) * resolution
+        return self.get_qos_arrays(distances)
+
 
+@wireless_models.register
 class MIMO(SISO):
+
+    depends_on_RUs = True
+
     def __init__(self, transmit_power=23,  # dbm
                  carrier_frequency=28,  # gigahrz
                  bandwidth=100,  # megahrz
                  UE_noise_figure=0,  # db
                  RU_antennas_gain=8,  # db
                  UE_antennas_gain=3,  # db
-                 maximum_bitrate=538.71, minmum_bitrate=53.87, queuing_delay=2, RU_antennas=8, UE_antennas=4):
+                 maximum_bitrate=538.71, minmum_bitrate=53.87, queuing_delay=2, RU_antennas=8, UE_antennas=4,
+                 backend="numpy"):
         SISO.__init__(self, transmit_power,  # dbm
                       carrier_frequency,  # gigahrz
                       bandwidth,  # megahrz
                       UE_noise_figure,  # db
                       RU_antennas_gain,  # db
                       UE_antennas_gain,  # db
-                      maximum_bitrate, minmum_bitrate, queuing_delay)
+                      maximum_bitrate, minmum_bitrate, queuing_delay, backend)
         self.RU_antennas = int(RU_antennas)
         self.UE_antennas = int(UE_antennas)
 
-    def get_qos_from(self, distance, RUs, location: Location, *args, **kwargs) -> QoS:
-        """
-        Since in a MIMO channel the number of available antennas of an RU is crucial, we update also the RUs' sorting
-        """
-        def compute_bandwidth(obj, location, RU):  # computes the bandwidth for each RU
-            qos = SISO.get_qos_from(obj, location.distance(RU[1]))
-            connected_UEs = RU[2]
-            available_antennas = obj.RU_antennas - connected_UEs * obj.UE_antennas
-            return min([available_antennas, obj.UE_antennas]) * qos.get_bandwidth()
-
-        for RU in RUs:
-            RU.append(compute_bandwidth(self, location, RU))
-        RUs_ = sorted(RUs, key=lambda RU: RU[2], reverse=True)  # sort RUs by bandwidth
-        RU = RUs_[0]  # get the RU with the maximum available bandiwdth
-        connected_UEs = RU[2]
-        available_antennas = self.RU_antennas - (connected_UEs - 2) * self.UE_antennas
-        if available_antennas == 0:  # if there is no available antennas
-            return QoS.get_minimum_qos()  # The UE is disconnected
-        qos = SISO.get_qos_from(self, location.distance(RU[1]))  # get QoS for single-input-single-output channel
-        # compute multi-input-multi-output channel based on
-        # mimimun antennas between the available RU antennas and UE antennas
-        qos.set_bandwidth(min([available_antennas, self.UE_antennas]) * qos.get_bandwidth())
+    def get_allocator(self) -> AntennaAllocator:
+        """
+        :return: The accounting of the RUs' streams of a slice
+        """
+        return AntennaAllocator(self.RU_antennas, self.UE_antennas)
+
+    def select_RU(self, distances, RUs: list, maximum_streams: int = None) -> int:
+        """
+        Selects the RU that gives the most bandwidth (available streams x SISO bandwidth) among the RUs within the radius,
+        so a UE is not connected to a full RU while another RU in range has free streams. The RUs are scanned from the
+        closest one and the scan stops when no farther RU can give more bandwidth, since the SISO bandwidth does not
+        increase with the distance
+        :param distances: The distances (in km) of the sorted RUs (an iterable, so they can be computed lazily)
+        :param RUs: The RUs ([name, location, available streams]) sorted by distance
+        :param maximum_streams: The most free streams of any RU (e.g. by AntennaAllocator.get_maximum_free)
+        :return: The index of the selected RU (0, i.e. the closest one, if no RU in range has an available stream)
+        """
+        bound = self.UE_antennas if maximum_streams is None else min(self.UE_antennas, maximum_streams)
+        radius = self.get_radius()
+        res, bandwidth = 0, 0.0
+        for index, (distance, RU) in enumerate(zip(distances, RUs)):
+            if distance > radius:
+                break
+            siso_bandwidth = self.get_bandwidth_from_distance(distance * 1000)
+            if bandwidth >= bound * siso_bandwidth:
+                break
+            if RU[2] * siso_bandwidth > bandwidth:
+                res, bandwidth = index, RU[2] * siso_bandwidth
+        return res
+
+    def get_qos_from(self, distance, RUs=None, location: Location = None, *args, **kwargs) -> QoS:
+        """
+        Computes the QoS of a UE with the streams that are available to it at its RU. Only the serving RU is evaluated
+        (the slice selects it with select_RU)
+        :param distance: The distance from the serving RU in km
+        :param RUs: The sorted RUs ([name, location, available streams]), whose first one is the serving RU
+        (all UE antennas are available if it is None)
+        :param location: The location of the UE
+        :return: The SISO QoS with the bandwidth of the available streams (the minimum QoS if there is no stream)
+        """
+        streams = self.UE_antennas if not RUs else RUs[0][2]
+        if streams <= 0:  # if there is no available stream, the UE is disconnected
+            return QoS.get_minimum_qos()
+        qos = SISO.get_qos_from(self, distance)  # get QoS for single-input-single-output channel
+        qos.set_bandwidth(streams * qos.get_bandwidth())
         return qos
+
+    def get_qos_table(self, distances: np.ndarray, available_streams: np.ndarray = None,
+                      resolution: float = 0.001) -> dict:
+        """
+        Vectorized version of select_RU and get_qos_from, i.e. every location is connected to the RU within the radius
+        that gives it the most bandwidth (the closest one on ties)
+        :param distances: An (N, M) array with the distances (in km) of N locations from M RUs
+        :param available_streams: The streams that are available to a new UE at every RU (all UE antennas if None)
+        :param resolution: The distances are rounded to this resolution (in km) before the SISO model
+        :return: A dict with the delay, deviation, bandwidth and error_rate arrays of the N locations along with
+        their selected RU (RU, the column of distances)
+        """
+        distances = np.asarray(distances, dtype=np.float64)
+        available_streams = np.full(distances.shape[1], self.UE_antennas, dtype=np.int64) \
+            if available_streams is None else np.asarray(available_streams)
+        rounded = np.round(distances / resolution) * resolution if resolution else distances
+        unique_distances, inverse = np.unique(rounded, return_inverse=True)
+        siso_bandwidths = self.get_qos_arrays(unique_distances)['bandwidth'][inverse].reshape(distances.shape)
+        bandwidths = np.where(distances <= self.get_radius(), available_streams[None, :] * siso_bandwidths, -1.0)
+        best = np.max(bandwidths, axis=1)
+        selected = np.argmin(np.where(bandwidths == best[:, None], distances, np.inf), axis=1)
+        rows = np.arange(len(distances))
+        res = self.get_qos_arrays(rounded[rows, selected])
+        streams = available_streams[selected]
+        res['bandwidth'] = np.round(streams * res['bandwidth'], 3)
+        minimum_qos = QoS.get_minimum_qos()
+        for name in ['delay', 'deviation', 'bandwidth', 'error_rate']:
+            res[name][streams <= 0] = getattr(minimum_qos, f'get_{name}')()
+        res['RU'] = selected
+        return res
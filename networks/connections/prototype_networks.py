@@ -1,2 +1,17 @@
-from .mimo import MIMO, SISO
 from .mathematical_connections import LinearDegradation, Log2Degradation, Log10Degradation, MultiRangeNetwork, FlatWirelessNetwork
+from .registry import wireless_models
+
+# The wireless models that need ns-3 are imported when they are first used
+wireless_models.register_lazy('SISO', 'networks.connections.mimo:SISO')
+wireless_models.register_lazy('MIMO', 'networks.connections.mimo:MIMO')
+wireless_models.register_lazy('SINR', 'networks.connections.interference:SINR')
+
+
+def __getattr__(name: str):
+    if name in wireless_models:
+        return wireless_models.get_class(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(wireless_models.get_names()))
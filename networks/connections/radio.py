@@ -0,0 +1,104 @@
+import math
+
+import numpy as np
+
+# The speed of light in meters per second (the value of ns-3)
+SPEED_OF_LIGHT = 299792458.0
+
+
+def friis_rx_power(transmit_power, distances, frequency: float, system_loss: float = 1.0,
+                   minimum_loss: float = 0.0) -> np.ndarray:
+    """
+    Vectorized port of ns-3's FriisPropagationLossModel.CalcRxPower (same operations, same order)
+    :param transmit_power: The transmit power in dbm
+    :param distances: The distances between the receiver and transmitter in meters
+    :param frequency: The carrier frequency in hertz
+    :param system_loss: The system loss of the model
+    :param minimum_loss: The minimum loss in db
+    :return: The received powers in dbm
+    """
+    distances = np.asarray(distances, dtype=np.float64)
+    wavelength = SPEED_OF_LIGHT / frequency
+    numerator = wavelength * wavelength
+    with np.errstate(divide='ignore', invalid='ignore'):
+        denominator = 16 * math.pi * math.pi * distances * distances * system_loss
+        loss = -10 * np.log10(numerator / denominator)
+    return np.where(distances <= 0, transmit_power - minimum_loss, transmit_power - np.maximum(loss, minimum_loss))
+
+
+def dqpsk_function(x) -> np.ndarray:
+    """
+    Vectorized port of ns-3's DsssErrorRateModel.DqpskFunction
+    :param x: The Eb/N0 ratios
+    :return: The bit error rates
+    """
+    x = np.asarray(x, dtype=np.float64)
+    with np.errstate(divide='ignore', over='ignore', invalid='ignore'):
+        return ((math.sqrt(2.0) + 1.0) / math.sqrt(8.0 * math.pi * math.sqrt(2.0))) * (1.0 / np.sqrt(x)) * \
+            np.exp(-(2.0 - math.sqrt(2.0)) * x)
+
+
+class NumpyRadio(object):
+    """
+    The Friis propagation and the DQPSK error rate of a carrier frequency, evaluated with NumPy for arrays of values
+    """
+
+    def __init__(self, carrier_frequency: float):
+        """
+        :param carrier_frequency: The carrier frequency in hertz
+        """
+        self.carrier_frequency = carrier_frequency
+
+    def get_rx_power(self, transmit_power: float, distances) -> np.ndarray:
+        """
+        :param transmit_power: The transmit power in dbm
+        :param distances: The distances between the receiver and transmitter in meters
+        :return: The received powers in dbm
+        """
+        return friis_rx_power(transmit_power, distances, self.carrier_frequency)
+
+    def get_bit_error_rate(self, EbN0) -> np.ndarray:
+        """
+        :param EbN0: The Eb/N0 ratios
+        :return: The DQPSK bit error rates
+        """
+        return dqpsk_function(EbN0)
+
+
+class Ns3Radio(NumpyRadio):
+    """
+    The reference implementation with the ns-3 models (one call per value). Every radio has its own propagation
+    model, so radios with different carrier frequencies do not affect each other
+    """
+
+    def __init__(self, carrier_frequency: float):
+        from ns import propagation, wifi
+        NumpyRadio.__init__(self, carrier_frequency)
+        self.propagation_loss_model = propagation.FriisPropagationLossModel()
+        self.propagation_loss_model.SetFrequency(carrier_frequency)
+        self.error_loss_model = wifi.DsssErrorRateModel()
+
+    def get_rx_power(self, transmit_power: float, distances) -> np.ndarray:
+        distances = np.asarray(distances, dtype=np.float64)
+        res = [self.propagation_loss_model.CalcRxPower(transmit_power, *self.get_points_from_distance(distance))
+               for distance in distances.ravel()]
+        return np.array(res, dtype=np.float64).reshape(distances.shape)
+
+    def get_bit_error_rate(self, EbN0) -> np.ndarray:
+        EbN0 = np.asarray(EbN0, dtype=np.float64)
+        res = [self.error_loss_model.DqpskFunction(float(value)) for value in EbN0.ravel()]
+        return np.array(res, dtype=np.float64).reshape(EbN0.shape)
+
+    @staticmethod
+    def get_points_from_distance(distance: float):
+        from ns import core
+        from ns.mobility import ConstantPositionMobilityModel
+        a = ConstantPositionMobilityModel()
+        b = ConstantPositionMobilityModel()
+        a.SetPosition(core.Vector(0, 0, 0))
+        b.SetPosition(core.Vector(float(distance), 0, 0))
+        return a, b
+
+
+# The radio backends by name
+radio_backends = dict(numpy=NumpyRadio, ns3=Ns3Radio)
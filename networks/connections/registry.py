@@ -0,0 +1,151 @@
+import importlib
+import inspect
+from collections import OrderedDict
+from typing import Dict, List
+
+# The entry point group of the wireless models that are provided by other packages
+ENTRY_POINT_GROUP = 'slicer.wireless_models'
+
+
+class WirelessRegistry(object):
+    """
+    The wireless models by name. The models are registered with the register decorator, lazily (by their import
+    path, so heavy dependencies are imported on their first use) or by other packages through entry points.
+    Since the models do not change after their construction, the instances are cached by their normalized
+    parameters and they are shared by all slices (and sweeps) of the process with the same model and parameters
+    """
+
+    class WirelessRegistryException(Exception): pass
+
+    def __init__(self, maxsize: int = 128):
+        """
+        :param maxsize: The maximum number of cached instances (the least recently used ones are evicted)
+        """
+        self.classes = {}
+        self.lazy_classes = {}  # the import paths (module:attribute) of the not yet imported models
+        self.instances = OrderedDict()
+        self.maxsize = maxsize
+        self.statistics = dict(hits=0, misses=0, evictions=0)
+        self.entry_points_loaded = False
+
+    def register(self, cls=None, name: str = None):
+        """
+        Registers a wireless model, e.g. @wireless_models.register or @wireless_models.register(name='Custom')
+        :param cls: The class of the model (a subclass of Wireless)
+        :param name: The name of the model (the class' name if it is None)
+        :return: The class (so it can be used as decorator)
+        """
+        if cls is None:
+            return lambda cls: self.register(cls, name)
+        from networks.connections import Wireless
+        if not (inspect.isclass(cls) and issubclass(cls, Wireless)):
+            raise WirelessRegistry.WirelessRegistryException(f"{cls} is not a wireless model")
+        self.classes[name or cls.__name__] = cls
+        self.lazy_classes.pop(name or cls.__name__, None)
+        return cls
+
+    def register_lazy(self, name: str, path: str) -> None:
+        """
+        Registers a wireless model that is imported on its first use
+        :param name: The name of the model
+        :param path: The import path of the model's class (module:attribute)
+        """
+        if name not in self.classes:
+            self.lazy_classes[name] = path
+
+    def load_entry_points(self) -> None:
+        """
+        Registers (lazily) the wireless models of the installed packages' entry points
+        """
+        self.entry_points_loaded = True
+        try:
+            from importlib.metadata import entry_points
+            discovered = entry_points()
+            discovered = discovered.select(group=ENTRY_POINT_GROUP) if hasattr(discovered, 'select') else \
+                discovered.get(ENTRY_POINT_GROUP, [])
+        except Exception:
+            return
+        for entry_point in discovered:
+            self.register_lazy(entry_point.name, entry_point.value)
+
+    def get_names(self) -> List[str]:
+        if not self.entry_points_loaded:
+            self.load_entry_points()
+        return sorted(set(self.classes) | set(self.lazy_classes))
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.get_names()
+
+    def get_class(self, name: str):
+        """
+        :param name: The name of the wireless model
+        :return: The class of the model
+        """
+        if name not in self.classes and name not in self.lazy_classes and not self.entry_points_loaded:
+            self.load_entry_points()
+        if name in self.lazy_classes:
+            module, attribute = self.lazy_classes[name].split(':')
+            self.register(getattr(importlib.import_module(module), attribute), name)
+        if name not in self.classes:
+            raise WirelessRegistry.WirelessRegistryException(
+                f"There is no wireless model with {name} as name. The available models are {self.get_names()}")
+        return self.classes[name]
+
+    def get_instance(self, name: str, parameters: Dict = None):
+        """
+        Returns the (cached) instance of a wireless model
+        :param name: The name of the wireless model
+        :param parameters: The parameters of the model
+        :return: The shared instance of the model with these parameters
+        """
+        cls = self.get_class(name)
+        parameters = parameters or {}
+        key = (name, self.normalize({**self.get_defaults(cls), **parameters}))
+        if key in self.instances:
+            self.statistics['hits'] += 1
+            self.instances.move_to_end(key)
+            return self.instances[key]
+        self.statistics['misses'] += 1
+        instance = cls(**parameters)
+        self.instances[key] = instance
+        if len(self.instances) > self.maxsize:
+            self.instances.popitem(last=False)
+            self.statistics['evictions'] += 1
+        return instance
+
+    @staticmethod
+    def get_defaults(cls) -> Dict:
+        """
+        :return: The default parameters of a model's constructor, so the omitted and the default parameters are the same
+        """
+        return {name: parameter.default for name, parameter in inspect.signature(cls.__init__).parameters.items()
+                if parameter.default is not inspect.Parameter.empty}
+
+    @staticmethod
+    def normalize(value):
+        """
+        :param value: The parameters (or a value of them)
+        :return: A hashable representation, where the dicts are sorted and the integers are the same with floats
+        """
+        if isinstance(value, dict):
+            return tuple(sorted((str(key), WirelessRegistry.normalize(item)) for key, item in value.items()))
+        if isinstance(value, (list, tuple)):
+            return tuple(WirelessRegistry.normalize(item) for item in value)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value)
+        try:
+            hash(value)
+        except TypeError:
+            return repr(value)
+        return value
+
+    def clear(self) -> None:
+        """
+        Drops the cached instances
+        """
+        self.instances = OrderedDict()
+        self.statistics = dict(hits=0, misses=0, evictions=0)
+
+
+# The wireless models of the process
+wireless_models = WirelessRegistry()
@@ -0,0 +1,105 @@
+import copy
+import time
+from typing import Callable, Dict
+
+
+class HandoverPolicy(object):
+    """
+    Decides whether a moving UE is handed over from its current RU to the closest one. Without hysteresis
+    the UE is always connected to its closest RU, while with hysteresis the current RU is kept unless the candidate
+    is better by a margin (distance and/or bandwidth) for time_to_trigger seconds, and the UE has stayed at
+    its current RU for at least min_dwell seconds. A UE that is out of the radius of its current RU
+    (or whose RU is removed) is handed over immediately
+    """
+
+    class HandoverPolicyException(Exception): pass
+
+    def __init__(self, distance_margin: float = 0.0, bandwidth_margin: float = None, time_to_trigger: float = 0.0,
+                 min_dwell: float = 0.0):
+        """
+        :param distance_margin: How much closer (in km) the candidate RU should be
+        :param bandwidth_margin: How much higher bandwidth the candidate RU should offer (not considered if it is None)
+        :param time_to_trigger: How long (in seconds) the candidate RU should be better before the handover
+        :param min_dwell: The minimum time (in seconds) between two handovers of a UE
+        """
+        if min([distance_margin, time_to_trigger, min_dwell, bandwidth_margin or 0.0]) < 0:
+            raise HandoverPolicy.HandoverPolicyException("The parameters of the handover policy should not be negative")
+        self.distance_margin = float(distance_margin)
+        self.bandwidth_margin = None if bandwidth_margin is None else float(bandwidth_margin)
+        self.time_to_trigger = float(time_to_trigger)
+        self.min_dwell = float(min_dwell)
+        self.handovers = {}  # the number of handovers of every UE
+        self.last_handovers = {}  # the time of the last handover of every UE
+        self.pending = {}  # the candidate RU of every UE and since when it is better than the current one
+
+    def get_params(self) -> Dict[str, float]:
+        return dict(distance_margin=self.distance_margin, bandwidth_margin=self.bandwidth_margin,
+                    time_to_trigger=self.time_to_trigger, min_dwell=self.min_dwell)
+
+    def has_hysteresis(self) -> bool:
+        return self.distance_margin > 0 or self.bandwidth_margin is not None or self.time_to_trigger > 0 \
+               or self.min_dwell > 0
+
+    def copy(self, with_state: bool = True) -> 'HandoverPolicy':
+        """
+        :param with_state: If it is False, the handover counts and the timers of the UEs are not copied
+        :return: A copy of the policy
+        """
+        return copy.deepcopy(self) if with_state else HandoverPolicy(**self.get_params())
+
+    def select(self, node: str, timestamp: float, current_RU: str, current_distance: float, candidate_RU: str,
+               candidate_distance: float, radius: float, get_bandwidth: Callable[[str], float] = None) -> str:
+        """
+        Selects the RU of a moving UE and counts the handover if the RU changes
+        :param node: The UE's identifier
+        :param timestamp: The time of the move in seconds (the monotonic clock if it is None)
+        :param current_RU: The RU that the UE is connected to (None if there is no such RU)
+        :param current_distance: The distance (in km) of the UE from its current RU
+        :param candidate_RU: The closest RU to the UE
+        :param candidate_distance: The distance (in km) of the UE from the closest RU
+        :param radius: The radius of the RUs in km
+        :param get_bandwidth: A function that computes the bandwidth of the UE from an RU
+        (needed only by the bandwidth margin)
+        :return: The selected RU
+        """
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        if current_RU == candidate_RU:
+            self.pending.pop(node, None)
+            return current_RU
+        if current_RU is None or current_distance is None or current_distance > radius \
+                or not self.has_hysteresis():
+            return self.handover(node, timestamp, current_RU, candidate_RU)
+        is_better = candidate_distance + self.distance_margin < current_distance
+        if is_better and self.bandwidth_margin is not None:
+            is_better = get_bandwidth(candidate_RU) >= get_bandwidth(current_RU) + self.bandwidth_margin
+        if not is_better:
+            self.pending.pop(node, None)
+            return current_RU
+        pending_RU, since = self.pending.get(node, (None, None))
+        if pending_RU != candidate_RU:
+            self.pending[node] = pending_RU, since = candidate_RU, timestamp
+        if timestamp - since < self.time_to_trigger:
+            return current_RU
+        if timestamp - self.last_handovers.get(node, -float('inf')) < self.min_dwell:
+            return current_RU
+        return self.handover(node, timestamp, current_RU, candidate_RU)
+
+    def handover(self, node: str, timestamp: float, current_RU: str, RU: str) -> str:
+        """
+        Records the handover of a UE (it is not counted if the UE had no RU)
+        :param node: The UE's identifier
+        :param timestamp: The time of the handover in seconds. If it is None (e.g. a forced handover due to
+        a change of the RUs), the time of the UE's last handover is kept, since the moves may use another clock
+        :param current_RU: The previous RU of the UE
+        :param RU: The new RU of the UE
+        :return: The new RU
+        """
+        self.pending.pop(node, None)
+        if timestamp is not None:
+            self.last_handovers[node] = timestamp
+        if current_RU is not None and current_RU != RU:
+            self.handovers[node] = self.handovers.get(node, 0) + 1
+        return RU
+
+    def get_handover_counts(self) -> Dict[str, int]:
+        return dict(self.handovers)
@@ -0,0 +1,214 @@
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+
+import numpy as np
+
+from networks.QoS import QoS
+
+# The attachment arrays of the slice whose links are generated. Workers are forked after they are set,
+# so they share them (read-only)
+_attachments = None
+
+
+def _get_block(block: tuple) -> tuple:
+    return LinkTable.get_block(_attachments, *block)
+
+
+class LinkTable(object):
+    """
+    Columnar table of the links between all pairs of a slice's nodes. Every row keeps the indices of the source and
+    the destination node and the index of the link's formatted (bidirectional) QoS values, since most links of a
+    slice share a few distinct (delay, deviation, bandwidth, error_rate) tuples. The rows are ordered by the source
+    node and then by the destination node (in the order of the slice's nodes)
+    """
+
+    class LinkTableException(Exception): pass
+
+    # The columns (and their types) of the table
+    columns = dict(from_node=np.int32, to_node=np.int32, qos=np.int32)
+
+    # The types of the nodes in the attachment arrays
+    node_types = ['UE', 'EDGE', 'CLOUD']
+
+    # Slices with fewer nodes are not split across processes, since the pool costs more than it saves
+    minimum_parallel_nodes = 100
+
+    # The maximum number of pairs of a block, which bounds the memory of the vectorized computation
+    maximum_block_pairs = 1 << 20
+
+    def __init__(self, nodes: List[str], values: List[tuple], **columns):
+        """
+        :param nodes: The labels of the nodes (the from_node and to_node columns keep indices of this list)
+        :param values: The distinct bidirectional QoS values (the qos column keeps indices of this list)
+        :param columns: The arrays of the columns
+        """
+        self.nodes = list(nodes)
+        self.values = list(values)
+        missing_columns = [name for name in self.columns if name not in columns]
+        if missing_columns:
+            raise LinkTable.LinkTableException(f"The table misses the columns {missing_columns}")
+        for name, dtype in self.columns.items():
+            setattr(self, name, np.asarray(columns[name], dtype=dtype))
+        if len({len(getattr(self, name)) for name in self.columns}) > 1:
+            raise LinkTable.LinkTableException("The columns of the table should have the same length")
+
+    def __len__(self):
+        return len(self.from_node)
+
+    def __iter__(self):
+        """
+        :return: The (from_node, to_node, values) of every link, where the values are the bidirectional QoS values
+        """
+        nodes, values = self.nodes, self.values
+        for from_node, to_node, qos in zip(self.from_node.tolist(), self.to_node.tolist(), self.qos.tolist()):
+            yield nodes[from_node], nodes[to_node], values[qos]
+
+    def get_columns(self) -> dict:
+        return {name: getattr(self, name) for name in self.columns}
+
+    @classmethod
+    def get_attachments(cls, network) -> dict:
+        """
+        Every node is connected to a single RU (or the cloud connection) and all RUs are inter-connected through
+        the midhaul, so the path QoS of a pair depends only on the attachments of its nodes
+        :param network: The slice
+        :return: The labels of the nodes and the arrays of their types, RUs and attachment QoS, along with the QoS
+        values of the midhaul and the backhaul
+        """
+        labels = list(network.get_nodes())
+        missing_nodes = [label for label in labels if label not in network.attachments]
+        if missing_nodes:
+            raise LinkTable.LinkTableException(f"The nodes {missing_nodes} are not attached to an RU")
+        attachments = [network.attachments[label] for label in labels]
+        RUs = {}
+        values = np.array([attachment[2:] for attachment in attachments], dtype=np.float64).reshape(-1, 4)
+        get_values = lambda qos: (qos.get_delay(), qos.get_deviation(), qos.get_bandwidth(), qos.get_error_rate())
+        return dict(labels=labels, type=np.array([cls.node_types.index(i[0]) for i in attachments], dtype=np.int8),
+                    RU=np.array([RUs.setdefault(i[1], len(RUs)) for i in attachments], dtype=np.int32),
+                    values=values, midhaul=get_values(network.get_midhaul()),
+                    backhaul=get_values(network.get_backhaul()))
+
+    @staticmethod
+    def merge_qos(qos: tuple, other: tuple, mask: np.ndarray = None) -> tuple:
+        """
+        Vectorized QoS.merge with the same rounding, i.e. the delays are added and rounded to 2 decimals,
+        the error rates are added and limited to 100 and the minimum bandwidth is kept
+        :param qos: The (delay, deviation, bandwidth, error_rate) arrays
+        :param other: The (delay, deviation, bandwidth, error_rate) arrays (or values) that are added
+        :param mask: Only the QoS of the pairs of the mask are merged (all of them if it is None)
+        :return: The merged arrays
+        """
+        delay, deviation, bandwidth, error_rate = qos
+        res = (np.round(delay + other[0], 2), np.round(deviation + other[1], 2), np.minimum(bandwidth, other[2]),
+               np.minimum(error_rate + other[3], 100))
+        if mask is None:
+            return res
+        return tuple(np.where(mask, new, old) for new, old in zip(res, qos))
+
+    @classmethod
+    def get_block(cls, attachments: dict, start: int, stop: int) -> tuple:
+        """
+        Computes the path QoS of a block of source nodes to all nodes with the rules of
+        SliceConceptualGraph.compute_qos_between_nodes (a change of a rule there should be made here as well), i.e. the first edge twice, the midhaul (if the nodes are
+        at different RUs) twice for paths from UEs to the core or once for the rest, the bandwidth of
+        the last edge for paths from the core to UEs and the backhaul twice for paths from the cloud
+        :param attachments: The arrays of get_attachments
+        :param start: The index of the first source node
+        :param stop: The index after the last source node
+        :return: The from_node, to_node and qos columns of the block and its distinct QoS values
+        (in order of appearance)
+        """
+        UE, CLOUD = cls.node_types.index('UE'), cls.node_types.index('CLOUD')
+        types, RUs, values = attachments['type'], attachments['RU'], attachments['values']
+        from_nodes, to_nodes = np.nonzero(np.arange(start, stop)[:, None] != np.arange(len(types))[None, :])
+        from_nodes = (from_nodes + start).astype(np.int32)
+        to_nodes = to_nodes.astype(np.int32)
+        from_types, to_types = types[from_nodes], types[to_nodes]
+        is_same_RU = RUs[from_nodes] == RUs[to_nodes]
+        is_from_UE, is_to_UE = from_types == UE, to_types == UE
+        is_from_cloud = from_types == CLOUD
+        empty = QoS()
+        empty_values = (empty.get_delay(), empty.get_deviation(), empty.get_bandwidth(), empty.get_error_rate())
+        qos = tuple(np.full(len(from_nodes), i, dtype=np.float64) for i in empty_values)
+        # every rule below names the rule of compute_qos_between_nodes that it mirrors
+        first_edge = tuple(values[from_nodes, i] for i in range(4))
+        qos = cls.merge_qos(cls.merge_qos(qos, first_edge), first_edge)  # qos + edge['qos'] + edge['qos']
+        # the rest (middle) edges of the path, i.e. the midhaul twice if the nodes are at different RUs (rest_qos)
+        midhaul = cls.merge_qos(cls.merge_qos(empty_values, attachments['midhaul']), attachments['midhaul'])
+        rest = tuple(np.where(is_same_RU, i, j) for i, j in zip(empty_values, midhaul))
+        # from_node_type == 'UE' and to_node_type != 'UE'
+        qos = cls.merge_qos(qos, rest, is_from_UE & ~is_to_UE)
+        qos = cls.merge_qos(qos, rest, is_from_UE & ~is_to_UE)
+        # from_node_type == 'UE' and to_node_type == 'UE' and len(path_graph) > 2
+        qos = cls.merge_qos(qos, rest, is_from_UE & is_to_UE & ~is_same_RU)
+        # is_core_network_nodes
+        qos = cls.merge_qos(qos, rest, ~is_from_UE & ~is_to_UE)
+        # from_node_type in ['EDGE', 'CLOUD'] and to_node_type == 'UE' (the bandwidth of the last edge)
+        qos = cls.merge_qos(qos, (0.0, 0.0, values[to_nodes, 2], 0.0), ~is_from_UE & is_to_UE)
+        # from_node_type == 'CLOUD' and to_node_type != 'CLOUD'
+        is_cloud_path = is_from_cloud & (to_types != CLOUD)
+        qos = cls.merge_qos(qos, attachments['backhaul'], is_cloud_path)
+        qos = cls.merge_qos(qos, attachments['backhaul'], is_cloud_path)
+        # from_node_type == 'CLOUD' and to_node_type == 'CLOUD', i.e. an empty QoS object (without bandwidth)
+        is_empty = (is_from_cloud & (to_types == CLOUD)).astype(np.float64)
+        # the distinct QoS rows, which are ranked by their first appearance
+        rows = np.stack(qos + (is_empty,), axis=1)
+        _, first_rows, qos_indices = np.unique(rows, axis=0, return_index=True, return_inverse=True)
+        order = np.argsort(first_rows, kind='stable')
+        ranks = np.empty(len(order), dtype=np.int32)
+        ranks[order] = np.arange(len(order), dtype=np.int32)
+        block_values = [empty.get_bidirectional_values() if is_empty else
+                        (delay / 2 if delay else None, deviation / 2 if deviation else None, bandwidth,
+                         error_rate / 2 if error_rate else None)
+                        for delay, deviation, bandwidth, error_rate, is_empty in rows[first_rows[order]].tolist()]
+        return from_nodes, to_nodes, ranks[qos_indices.reshape(-1)], block_values
+
+    @classmethod
+    def from_slice(cls, network, processes: int = None, block_size: int = None) -> 'LinkTable':
+        """
+        Generates the links between all pairs of a slice's nodes. The attachment arrays of the nodes are built once
+        and the path QoS of every block of source nodes is computed with vectorized operations. The blocks are
+        computed by a pool of forked processes, which share the attachment arrays read-only, and they are merged
+        in their order, so the table is the same with the sequential one
+        :param network: The slice
+        :param processes: The number of processes (the number of CPUs if it is None, 1 for sequential generation)
+        :param block_size: The number of source nodes of every block (4 blocks per process if it is None,
+        limited by maximum_block_pairs)
+        :return: The link table
+        """
+        global _attachments
+        attachments = cls.get_attachments(network)
+        labels = attachments['labels']
+        processes = processes or os.cpu_count() or 1
+        is_parallel = processes > 1 and len(labels) >= cls.minimum_parallel_nodes and \
+            'fork' in multiprocessing.get_all_start_methods()
+        block_size = block_size or (math.ceil(len(labels) / (4 * processes)) if is_parallel else len(labels))
+        block_size = max(1, min(block_size, cls.maximum_block_pairs // max(1, len(labels))))
+        blocks = [(start, min(start + block_size, len(labels))) for start in range(0, len(labels), block_size)]
+        if not is_parallel:
+            return cls.merge(labels, [cls.get_block(attachments, *block) for block in blocks])
+        _attachments = attachments
+        try:
+            with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('fork')) as executor:
+                results = list(executor.map(_get_block, blocks))
+        finally:
+            _attachments = None
+        return cls.merge(labels, results)
+
+    @classmethod
+    def merge(cls, labels: List[str], blocks: List[tuple]) -> 'LinkTable':
+        """
+        :param labels: The labels of the nodes
+        :param blocks: The blocks of get_block (in their order)
+        :return: One table with the rows of all blocks and their QoS values indexed once
+        """
+        values = {}
+        qos_columns = []
+        for _, _, qos, block_values in blocks:
+            mapping = np.array([values.setdefault(i, len(values)) for i in block_values], dtype=np.int32)
+            qos_columns.append(mapping[qos] if len(qos) else qos)
+        return cls(labels, list(values), from_node=np.concatenate([i[0] for i in blocks] or [[]]),
+                   to_node=np.concatenate([i[1] for i in blocks] or [[]]), qos=np.concatenate(qos_columns or [[]]))
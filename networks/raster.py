@@ -0,0 +1,248 @@
+import math
+from typing import Tuple
+
+import numpy as np
+
+from networks.QoS import QoS
+from utils.geometry import to_cartesian, chunked_distances, distances
+
+
+class QoSRaster(object):
+    """
+    QoS of the best-serving RU over a lat/lon grid. The arrays are north-up (the first row is the northern one)
+    """
+
+    # The QoS metrics of the raster
+    metrics = ['delay', 'deviation', 'bandwidth', 'error_rate']
+
+    def __init__(self, north: float, west: float, lat_step: float, lon_step: float, RUs: list = None, **arrays):
+        """
+        :param north: The latitude of the northern edge of the grid
+        :param west: The longitude of the western edge of the grid
+        :param lat_step: The height of a pixel in degrees
+        :param lon_step: The width of a pixel in degrees
+        :param RUs: The identifiers of the RUs (the RU array keeps indices of this list, -1 if there is no RU)
+        :param arrays: The 2D arrays of the metrics, the best-serving RU (RU) and its distance (distance)
+        """
+        self.RUs = list(RUs) if RUs is not None else []
+        self.north = north
+        self.west = west
+        self.lat_step = lat_step
+        self.lon_step = lon_step
+        self.arrays = arrays
+
+    def __getitem__(self, metric: str) -> np.ndarray:
+        return self.arrays[metric]
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.arrays['bandwidth'].shape
+
+    def get_bounds(self) -> Tuple[Tuple[float, float], Tuple[float, float]]:
+        """
+        :return: The south-west and north-east corners of the grid
+        """
+        rows, columns = self.shape
+        return (self.north - rows * self.lat_step, self.west), (self.north, self.west + columns * self.lon_step)
+
+    def get_transform(self) -> Tuple[float, float, float, float, float, float]:
+        """
+        :return: The affine geotransform of the grid (the same with GeoTIFF/GDAL)
+        """
+        return self.west, self.lon_step, 0.0, self.north, 0.0, -self.lat_step
+
+    def get_coordinates(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        :return: The latitudes of the rows' centers and the longitudes of the columns' centers
+        """
+        rows, columns = self.shape
+        return self.north - (np.arange(rows) + 0.5) * self.lat_step, self.west + (np.arange(columns) + 0.5) * self.lon_step
+
+    def save(self, filename: str) -> None:
+        """
+        Stores the raster along with its geotransform as compressed NumPy (.npz) file
+        :param filename: The name of the file
+        """
+        np.savez_compressed(filename, transform=np.array(self.get_transform()), RUs=np.array(self.RUs, dtype=str),
+                            **self.arrays)
+
+    @classmethod
+    def load(cls, filename: str) -> 'QoSRaster':
+        """
+        Loads a raster that is stored by the save method
+        :param filename: The name of the file
+        :return: The raster
+        """
+        with np.load(filename) as data:
+            west, lon_step, _, north, _, lat_step = data['transform'].tolist()
+            return cls(north, west, -lat_step, lon_step, data['RUs'].tolist(),
+                       **{name: data[name] for name in data.files if name not in ['transform', 'RUs']})
+
+    def to_image(self, filename: str, metric: str = 'bandwidth', cmap: str = 'viridis') -> None:
+        """
+        Stores a metric as image along with its world file (e.g. raster.png and raster.pgw),
+        so it can be positioned by GIS tools or overlaid on a map
+        :param filename: The name of the image
+        :param metric: The depicted metric
+        :param cmap: The matplotlib's colormap
+        """
+        import matplotlib.pyplot as plt
+        plt.imsave(filename, self.arrays[metric], cmap=cmap)
+        name, _, extension = filename.rpartition('.')
+        world_extension = f"{extension[0]}{extension[-1]}w" if name else 'wld'
+        west, lon_step, _, north, _, lat_step = self.get_transform()
+        with open(f"{name or filename}.{world_extension}", 'w') as f:
+            # the world file refers to the center of the upper-left pixel
+            f.write("\n".join(str(i) for i in [lon_step, 0.0, 0.0, lat_step, west + lon_step / 2, north + lat_step / 2]))
+
+
+class QoSRasterizer(object):
+    """
+    Evaluates the QoS of the best-serving RU over a global lat/lon grid. The grid is split in square tiles
+    that are computed by the vectorized (get_qos_table) models and kept in a cache, so overlapping
+    rasters of the same slice state are not computed twice. If the slice has a cell load model, the bandwidth
+    of a pixel is the share that a new UE would get at its RU
+    """
+
+    def __init__(self, network, tile_size: int = 256, chunk_size: int = 16384, max_tiles: int = 256):
+        """
+        :param network: The slice (SliceConceptualGraph)
+        :param tile_size: The rows and columns of every tile
+        :param chunk_size: The pixels whose distances from the RUs are computed at once
+        :param max_tiles: The maximum number of cached tiles
+        """
+        self.network = network
+        self.tile_size = tile_size
+        self.chunk_size = chunk_size
+        self.max_tiles = max_tiles
+        self.tiles = {}
+        self.state = None
+
+    @staticmethod
+    def get_steps(resolution: float, lat: float) -> Tuple[float, float]:
+        """
+        :param resolution: The size of a pixel in km
+        :param lat: A latitude of the area. It is rounded to degrees, so nearby areas share the same grid
+        :return: The height and width of a pixel in degrees
+        """
+        lat_step = resolution / 111.32
+        return lat_step, resolution / (111.32 * math.cos(math.radians(round(lat))))
+
+    def get_state(self) -> tuple:
+        """
+        :return: What the QoS depends on, i.e. the RUs, their connected UEs, the wireless connection, the
+        resources that are available to a new UE at every RU (if the wireless connection has an allocator)
+        and the load of every RU (if the slice has a cell load model)
+        """
+        RUs = self.network.get_RUs()
+        EDGEs = self.network.get_edge_nodes()
+        connected_UEs = tuple(len([i for i in self.network.graph.neighbors(RU) if i not in RUs and i not in EDGEs])
+                              for RU in RUs)
+        allocator = self.network.allocator
+        available = None if allocator is None else tuple(allocator.get_streams(None, RU) for RU in RUs)
+        cell_load = self.network.cell_load
+        loads = None if cell_load is None else (cell_load.policy, tuple(cell_load.get_load(RU) for RU in RUs))
+        return tuple((loc.get_lat(), loc.get_lon(), loc.get_alt()) for loc in RUs.values()), connected_UEs, \
+               id(self.network.wireless_connection), available, loads
+
+    def rasterize(self, bounds, resolution: float = 0.01, distance_resolution: float = 0.001) -> QoSRaster:
+        """
+        Generates the raster of an area
+        :param bounds: The south-west and north-east corners ((lat, lon), (lat, lon)) of the area
+        :param resolution: The size of a pixel in km (e.g. 0.01 for 10 m)
+        :param distance_resolution: The distances are rounded to this resolution (in km) before the radio models
+        :return: The raster
+        """
+        (south, west), (north, east) = bounds
+        if south >= north or west >= east:
+            raise self.network.NetworkSliceException("The bounds should be the south-west and north-east corners")
+        state = self.get_state()
+        if state != self.state:
+            self.tiles, self.state = {}, state
+        lat_step, lon_step = self.get_steps(resolution, (south + north) / 2)
+        first_row, last_row = int(math.floor(south / lat_step)), int(math.ceil(north / lat_step))
+        first_column, last_column = int(math.floor(west / lon_step)), int(math.ceil(east / lon_step))
+        size = self.tile_size
+        arrays = None
+        for tile_row in range(first_row // size, (last_row - 1) // size + 1):
+            for tile_column in range(first_column // size, (last_column - 1) // size + 1):
+                key = (lat_step, lon_step, distance_resolution, tile_row, tile_column)
+                tile = self.tiles.pop(key, None)
+                if tile is None:
+                    tile = self.compute_tile(lat_step, lon_step, tile_row, tile_column, distance_resolution)
+                self.tiles[key] = tile  # the most recently used tiles are the last ones
+                if arrays is None:
+                    arrays = {name: np.empty((last_row - first_row, last_column - first_column), dtype=array.dtype)
+                              for name, array in tile.items()}
+                # the part of the tile inside the grid (rows of tiles grow to the north)
+                rows = slice(max(first_row, tile_row * size), min(last_row, (tile_row + 1) * size))
+                columns = slice(max(first_column, tile_column * size), min(last_column, (tile_column + 1) * size))
+                for name, array in tile.items():
+                    arrays[name][rows.start - first_row:rows.stop - first_row,
+                                 columns.start - first_column:columns.stop - first_column] = \
+                        array[rows.start - tile_row * size:rows.stop - tile_row * size,
+                              columns.start - tile_column * size:columns.stop - tile_column * size]
+        while len(self.tiles) > self.max_tiles:
+            del self.tiles[next(iter(self.tiles))]
+        return QoSRaster(last_row * lat_step, first_column * lon_step, lat_step, lon_step, list(self.network.get_RUs()),
+                         **{name: array[::-1] for name, array in arrays.items()})
+
+    def compute_tile(self, lat_step: float, lon_step: float, tile_row: int, tile_column: int,
+                     distance_resolution: float = 0.001) -> dict:
+        """
+        Computes the QoS of a tile's pixels (their rows grow to the north)
+        :return: A dict with the 2D arrays of the metrics, the best-serving RU (-1 if no RU is within the radius)
+        and the distance from it (from the closest considered RU if no RU is within the radius)
+        """
+        size = self.tile_size
+        RUs = self.network.get_RUs()
+        RU_locations = list(RUs.values())
+        wireless_connection = self.network.wireless_connection
+        radius = self.network.get_radius()
+        lats = (tile_row * size + np.arange(size) + 0.5) * lat_step
+        lons = (tile_column * size + np.arange(size) + 0.5) * lon_step
+        lats, lons = [i.ravel() for i in np.meshgrid(lats, lons, indexing='ij')]
+        points = to_cartesian(lats, lons)
+        RU_points = to_cartesian([i.get_lat() for i in RU_locations], [i.get_lon() for i in RU_locations],
+                                 [i.get_alt() for i in RU_locations])
+        state = self.get_state() if self.state is None else self.state
+        # the load of every RU that the wireless connection considers
+        loads = np.array(state[1] if state[3] is None else state[3], dtype=np.int64)
+        # the served UEs and the sum of their inverse radio bandwidths at every RU
+        cell_loads = None if state[4] is None else np.array(state[4][1], dtype=np.float64).reshape(-1, 2)
+        candidates = np.arange(len(RU_locations))
+        if not wireless_connection.depends_on_RUs and len(candidates):
+            # only the RUs that may serve (within radius) or interfere with a pixel of the tile are considered
+            center = to_cartesian(lats.mean(), lons.mean())
+            half_diagonal = distances(center, points[[0, -1]]).max()
+            reach = max(radius, wireless_connection.get_interference_radius() or 0.0)
+            candidates = np.flatnonzero(distances(center, RU_points)[0] <= reach + half_diagonal)
+
+        minimum_qos = QoS.get_minimum_qos()
+        res = {name: np.full(len(points), getattr(minimum_qos, f'get_{name}')(), dtype=np.float64)
+               for name in QoSRaster.metrics}
+        res['RU'] = np.full(len(points), -1, dtype=np.int32)
+        res['distance'] = np.full(len(points), np.inf)
+        if len(candidates):
+            for start, block in chunked_distances(points, RU_points[candidates], self.chunk_size):
+                end = start + len(block)
+                closest = np.argmin(block, axis=1)
+                closest_distances = block[np.arange(len(block)), closest]
+                res['RU'][start:end] = candidates[closest]
+                res['distance'][start:end] = closest_distances
+                in_range = closest_distances <= radius
+                if not np.any(in_range): continue
+                table = wireless_connection.get_qos_table(block[in_range], loads[candidates], distance_resolution)
+                serving = candidates[closest[in_range]]
+                if 'RU' in table:  # the model selects the RU of every location (e.g. by its available resources)
+                    selected = table.pop('RU')
+                    serving = candidates[selected]
+                    res['RU'][start:end][in_range] = serving
+                    res['distance'][start:end][in_range] = block[in_range][np.arange(len(selected)), selected]
+                if cell_loads is not None:
+                    table['bandwidth'] = self.network.cell_load.share_with_new_UE(
+                        table['bandwidth'], cell_loads[serving, 0], cell_loads[serving, 1])
+                for name in QoSRaster.metrics:
+                    res[name][start:end][in_range] = table[name]
+        res['RU'][res['distance'] > radius] = -1
+        return {name: array.reshape(size, size) for name, array in res.items()}
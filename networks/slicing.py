@@ -1,10 +1,21 @@
-from typing import Dict
+import copy
+from collections import OrderedDict
+from typing import Dict, List
 
 import networkx as nx
+import numpy as np
 
 from networks.QoS import QoS
+from networks.cell_load import CellLoad
 from networks.connections import Wireless, prototype_networks
-from networks.connections.mathematical_connections import LinearDegradation
+from networks.connections.registry import wireless_models
+from networks.handover import HandoverPolicy
+from networks.links import LinkTable
+from networks.raster import QoSRaster, QoSRasterizer
+from networks.snapshot import SliceSnapshot
+from networks.timeline import QoSReplay, QoSTimeline
+from utils.geometry import to_cartesian, chunked_distances, distances, SpatialIndex
+from utils.instrumentation import instrumentation
 from utils.location import Location
 
 
@@ -16,25 +27,77 @@ class SliceConceptualGraph:
     - graph: the in-memory graph that keeps all information about the topology
     - backhaul: QoS characteristics of the RU-to-Cloud connections
     - midhaul: QoS characteristics of the RU-to-RU connections or/and Edge-to-Edge connections
+    - handover_policy: when moving UEs are handed over to another RU (hysteresis, time-to-trigger, dwell)
+    - cell_load: how the capacity of every RU is shared among its UEs (if it is None, every UE gets its radio QoS)
     """
     wireless_connection: Wireless
     graph: nx.Graph
     backhaul: QoS
     midhaul: QoS
+    handover_policy: HandoverPolicy
+    cell_load: CellLoad
+
+    # The maximum number of cached path QoS (least recently used paths are evicted)
+    path_cache_size: int = 100000
 
     class NetworkSliceException(Exception): pass
 
     def __init__(self, name, backhaul_qos, midhaul_qos, parameters, RUs=[],
-                 wireless_connection_type="LinearDegradation", **kwargs):
+                 wireless_connection_type="LinearDegradation", handover_policy: Dict = None, cell_load: Dict = None,
+                 **kwargs):
+        self.path_cache = OrderedDict()
+        self.path_cache_statistics = dict(hits=0, misses=0, evictions=0, invalidations=0)
+        self.attachments = {}
+        self.UE_index = None
+        self.RU_index = None
         self.graph = nx.Graph()
         self.graph.name = name
         self.set_backhaul(backhaul_qos)
         self.set_midhaul(midhaul_qos)
-        WirelessClass = getattr(prototype_networks, wireless_connection_type, LinearDegradation)
-        self.wireless_connection = WirelessClass(**parameters)
+        self.set_wireless_connection(wireless_connection_type, parameters)
+        self.set_handover_policy(handover_policy)
+        self.set_cell_load(cell_load)
+        self.rasterizer = QoSRasterizer(self)
         self.set_cloud_connection()
         self.set_RUs(RUs)
 
+    def set_wireless_connection(self, wireless_connection_type: str, parameters: Dict) -> None:
+        """
+        Set the degradation model of the RU-to-UE connections. The model's instance is shared with the other slices
+        that have the same model and parameters
+        :param wireless_connection_type: The name of the model in the wireless models' registry
+        :param parameters: The parameters of the model
+        """
+        self.wireless_connection = wireless_models.get_instance(wireless_connection_type, parameters)
+        self.wireless_connection_type = wireless_connection_type
+        self.parameters = parameters
+        # the slice's own accounting of the RUs' resources, since the model's instance is shared
+        self.allocator = self.wireless_connection.get_allocator()
+        self.RU_index = None  # its cells are sized by the radius of the model
+
+    def set_handover_policy(self, handover_policy: Dict = None) -> None:
+        """
+        Set the policy that decides the handovers of moving UEs
+        :param handover_policy: The parameters of the policy (distance_margin, bandwidth_margin, time_to_trigger,
+        min_dwell). If it is None, moving UEs are always connected to their closest RU
+        """
+        self.handover_policy = HandoverPolicy(**(handover_policy or {}))
+
+    def set_cell_load(self, cell_load: Dict = None) -> None:
+        """
+        Set the model that shares the capacity of every RU among its UEs. It should be set before the UEs are added
+        :param cell_load: The parameters of the model (policy: equal or proportional_fair). If it is None,
+        every UE gets the QoS of the wireless connection regardless of the other UEs of its RU
+        """
+        self.cell_load = None if cell_load is None else CellLoad(**cell_load)
+
+    def get_handover_counts(self) -> Dict[str, int]:
+        """
+        :return: The number of handovers of every UE
+        """
+        counts = self.handover_policy.get_handover_counts()
+        return {name: counts.get(name, 0) for name, data in self.graph.nodes(data=True) if data.get('type') == 'UE'}
+
     def set_cloud_connection(self) -> None:
         """
         Creates a virtual node that inter-connects the Cloud instances with the rest of RUs
@@ -67,6 +130,7 @@ class SliceConceptualGraph:
         :param backhaul_qos: Backhaul QoS in dict representation
         """
         self.backhaul = QoS(backhaul_qos)
+        self.clear_path_cache()
 
     def set_midhaul(self, midhaul_qos) -> None:
         """
@@ -74,6 +138,7 @@ class SliceConceptualGraph:
         :param midhaul_qos: Backhaul QoS in dict representation
         """
         self.midhaul = QoS(midhaul_qos)
+        self.clear_path_cache()
 
     def get_name(self) -> str:
         """
@@ -139,42 +204,148 @@ class SliceConceptualGraph:
     def add_cloud_node(self, name: str, **kwargs):
         # We connect any CLOUD node to the cloud_connection (cloud-to-RUs)
         self.graph.add_node(name, location=None, type='CLOUD')
-        self.graph.add_edge(name, 'cloud_connection', qos=self.get_backhaul())
+        self.attach(name, 'cloud_connection', self.get_backhaul())
 
     def add_edge_node(self, name: str, location: Location):
         self.graph.add_node(name, location=location, type='EDGE')
         # Edge should be colocated with RU so if RU with same location with Edge exists, we connect Edge to it
-        RU, qos = self.get_qos_for_selected_RU(location)
+        RU = self.__get_sorted_RUs(location)[0]
         selected_RU = RU[0]
         if RU[1].distance(location) != 0:  # otherwise we create a new RU at the same location
             selected_RU = self.set_RU(location.lat, location.lon, location.alt)
 
         # We connect EDGE to respective RU with the best QoS of our system
-        self.graph.add_edge(name, selected_RU, qos=QoS.get_maximum_qos())
+        self.attach(name, selected_RU, QoS.get_maximum_qos())
 
     def add_UE_node(self, name, location):
         # UE is connected to the closest RU
+        self.UE_index = None  # the positions of the UEs are changed
         self.graph.add_node(name, location=location, type='UE')
-        RU, qos = self.get_qos_for_selected_RU(location)
-        self.graph.add_edge(name, RU[0], qos=qos)
+        RU, qos = self.get_qos_for_selected_RU(location, name)
+        self.attach(name, RU[0], qos)
+
+    def attach(self, node_name: str, RU: str, qos: QoS) -> List[str]:
+        """
+        Connects a node to an RU (or the cloud connection) and keeps the attachment that the cached path QoS
+        of the node depends on. Every change of a node's connection should pass through this method.
+        If the slice has a cell load model, a UE gets its share of the RU's capacity and only the UEs of the RUs that
+        it left or joined get their new shares. If the wireless model has an allocator (e.g. the antennas of MIMO),
+        the resources of a UE within the radius are allocated at the RU and the UEs that get the released resources
+        of its previous RU are re-attached
+        :param node_name: The node's identifier
+        :param RU: The RU's identifier
+        :param qos: The QoS of the connection (the radio QoS, before the sharing of the RU's capacity)
+        :return: The other UEs whose connection changed
+        """
+        is_UE = self.graph.nodes[node_name].get('type') == 'UE'
+        res = self.__share_capacity(node_name, RU, qos) if self.cell_load is not None and is_UE else []
+        if self.cell_load is None or node_name not in self.cell_load.RUs:  # the node is not served by the RU
+            self.__link(node_name, RU, qos)
+        if self.allocator is None or not is_UE:
+            return res
+        location = self.get_node_location(node_name)
+        if self.get_node_location(RU).distance(location) <= self.get_radius():
+            upgraded = self.allocator.allocate(node_name, RU)
+        else:
+            upgraded = self.allocator.release(node_name)
+        for name in upgraded:
+            RU_ = self.attachments[name][1]
+            res += [name] + self.attach(name, RU_, self.get_qos_for_RU(self.get_node_location(name), RU_, name))
+        return list(dict.fromkeys(i for i in res if i != node_name))
+
+    def __link(self, node_name: str, RU: str, qos: QoS) -> None:
+        self.graph.add_edge(node_name, RU, qos=qos)
+        self.attachments[node_name] = (self.graph.nodes[node_name].get('type'), RU, qos.get_delay(),
+                                       qos.get_deviation(), qos.get_bandwidth(), qos.get_error_rate())
+
+    def __share_capacity(self, node_name: str, RU: str, qos: QoS) -> List[str]:
+        """
+        Updates the shares of the RUs that a UE left or joined
+        :return: The other UEs whose share changed
+        """
+        res = []
+        for RU_ in self.cell_load.attach(node_name, RU, qos):
+            for name, shared in self.cell_load.get_qos(RU_).items():
+                if name == node_name:
+                    self.__link(name, RU_, shared)
+                elif self.attachments[name][4] != shared.get_bandwidth():
+                    self.__link(name, RU_, shared)
+                    res.append(name)
+        return res
+
+    def clear_path_cache(self) -> None:
+        """
+        Invalidates all cached path QoS (e.g. when the backhaul or midhaul QoS changes)
+        """
+        if len(self.path_cache) > 0:
+            self.path_cache_statistics['invalidations'] += 1
+        self.path_cache.clear()
+
+    def get_path_cache_statistics(self) -> Dict[str, int]:
+        """
+        :return: The hits, misses, evictions and invalidations of the path QoS cache along with its size
+        """
+        return dict(self.path_cache_statistics, size=len(self.path_cache))
 
 
 
-    def get_qos_for_selected_RU(self, location: Location) -> (str, QoS):
+    def get_qos_for_selected_RU(self, location: Location, node_name: str = None) -> (str, QoS):
         """
         This method computes the QoS of a specific location
         :param location: Instance of Location class
+        :param node_name: The UE at the location (its allocated resources are kept if it stays at its RU),
+        or None for a new UE
         :return: A pair of RU-id (str) and the respective QoS
         """
-        RUs = self.__get_sorted_RUs(location)
+        RUs = self.__get_sorted_RUs(location, node_name)
         if len(RUs) == 0:
             return None
-        min_distance = RUs[0][1].distance(location)
-        if min_distance > self.get_radius():
+        if self.allocator is not None:
+            # the RU is selected by the resources that are available to the UE, not only by its distance
+            selected = self.wireless_connection.select_RU((i[1].distance(location) for i in RUs), RUs,
+                                                          self.allocator.get_maximum_free(len(RUs)))
+            RUs = [RUs[selected]] + RUs[:selected] + RUs[selected + 1:]
+        distance = RUs[0][1].distance(location)
+        if distance > self.get_radius():
             return RUs[0], QoS.get_minimum_qos()
-        qos = self.wireless_connection.get_qos_from(distance=min_distance, RUs=RUs, location=location)
+        qos = self.get_qos_from(distance=distance, RUs=RUs, location=location,
+                                interfering_distances=self.get_interfering_distances(location, RUs[0][0]))
         return RUs[0], qos
 
+    def get_qos_for_RU(self, location: Location, RU: str, node_name: str = None) -> QoS:
+        """
+        This method computes the QoS of a specific location when it is connected to a specific RU
+        (e.g. an RU that is kept due to handover hysteresis although it is not the closest one)
+        :param location: Instance of Location class
+        :param RU: The RU's identifier
+        :param node_name: The UE at the location, or None for a new UE
+        :return: The respective QoS
+        """
+        RUs = self.__get_sorted_RUs(location, node_name)
+        RUs = [i for i in RUs if i[0] == RU] + [i for i in RUs if i[0] != RU]
+        distance = RUs[0][1].distance(location)
+        if distance > self.get_radius():
+            return QoS.get_minimum_qos()
+        return self.get_qos_from(distance=distance, RUs=RUs, location=location,
+                                 interfering_distances=self.get_interfering_distances(location, RU))
+
+    def get_interfering_distances(self, location: Location, RU: str):
+        """
+        Finds the co-channel RUs that interfere with the serving RU of a location through the spatial index of the RUs,
+        so the cost depends on the density of the RUs around the location and not on their total number
+        :param location: Instance of Location class
+        :param RU: The serving RU's identifier
+        :return: The distances (in km) of the other RUs within the interference radius of the wireless model,
+        or None if the model does not consider interference
+        """
+        interference_radius = self.wireless_connection.get_interference_radius()
+        if interference_radius is None:
+            return None
+        names, index = self.get_RU_index()
+        candidates, distances = index.query_radius(
+            to_cartesian(location.get_lat(), location.get_lon(), location.get_alt()), interference_radius)
+        return distances[np.array([names[i] != RU for i in candidates], dtype=bool)]
+
     def get_RUs(self, with_cloud=False) -> Dict[str, Location]:
         """
         Returns RU nodes of the network. Since, we design the cloud-to-RUs connection as RU node,
@@ -201,13 +372,129 @@ class SliceConceptualGraph:
         """
         if 0 < len(self.get_nodes()):
             raise self.NetworkSliceException("You can not add RU after network creation")
+        return self._add_RU(lat, lon, alt)
+
+    def _add_RU(self, lat, lon, alt=None) -> str:
         key = self._get_RU_key(lat, lon, alt)
         if key in self.graph: raise self.NetworkSliceException("The RU exists")
         self.graph.add_node(key, location=Location(lat, lon, alt), type='RU')
+        self.RU_index = None
         for RU in self.get_RUs(with_cloud=True):
             self.graph.add_edge(key, RU, qos=self.get_midhaul())  # Every RU is connected with each other via midhaul
         return key
 
+    def add_RU(self, lat, lon, alt=None, timestamp: float = None) -> List[str]:
+        """
+        Introduces a new RU to a running slice (e.g. a new small cell). Only the UEs within the RU's range
+        are evaluated and they are connected to the new RU if it is closer than their current one
+        :param lat: RU's latitude
+        :param lon: RU's longitude
+        :param alt: RU's altitude
+        :param timestamp: The time of the change in seconds for the handover policy, in the clock of the moves
+        (the handovers are not timed if it is None)
+        :return: The UEs that are connected to the new RU (and the ones that got the resources they released
+        or whose interference changed)
+        """
+        key = self._add_RU(lat, lon, alt)
+        location = self.get_node_location(key)
+        names, index = self.get_UE_index()
+        candidates, distances = index.query_radius(to_cartesian(lat, lon, location.get_alt()), self.get_radius())
+        res = []
+        for name, distance in zip([names[i] for i in candidates], distances.tolist()):
+            current_RU = self.attachments[name][1]
+            if not distance < self.get_node_location(current_RU).distance(self.get_node_location(name)): continue
+            self.graph.remove_edge(name, current_RU)
+            res.append(name)
+            res += self.__reattach_UE(name, current_RU, timestamp)
+        res += self.__update_interfered_UEs(location, res)
+        return list(dict.fromkeys(res))
+
+    def remove_RU(self, RU: str, timestamp: float = None) -> List[str]:
+        """
+        Removes an RU from a running slice (e.g. an RU outage) and connects its UEs to their closest RU
+        :param RU: The RU's identifier
+        :param timestamp: The time of the change in seconds for the handover policy, in the clock of the moves
+        (the handovers are not timed if it is None)
+        :return: The UEs that are connected to another RU (and the ones whose connection changed due to them
+        or whose interference changed)
+        """
+        RUs = self.get_RUs()
+        if RU not in RUs:
+            raise self.NetworkSliceException(f"There is no RU {RU}")
+        if len(RUs) == 1:
+            raise self.NetworkSliceException("The last RU of the slice can not be removed")
+        neighbors = list(self.graph.neighbors(RU))
+        if any(self.graph.nodes[i].get('type') == 'EDGE' for i in neighbors):
+            raise self.NetworkSliceException(f"The RU {RU} hosts EDGE nodes, so it can not be removed")
+        res = [i for i in neighbors if self.graph.nodes[i].get('type') == 'UE']
+        location = self.get_node_location(RU)
+        self.graph.remove_node(RU)
+        self.RU_index = None
+        if self.allocator is not None:
+            self.allocator.remove_RU(RU)
+        if self.cell_load is not None:
+            self.cell_load.remove_RU(RU)
+        for name in list(res):
+            res += self.__reattach_UE(name, RU, timestamp)
+        res += self.__update_interfered_UEs(location, res)
+        return list(dict.fromkeys(res))
+
+    def __update_interfered_UEs(self, location: Location, updated: List[str]) -> List[str]:
+        """
+        Evaluates again the UEs within the interference radius of an added or removed RU, since the RU interferes
+        (or no longer interferes) with their connections, while they stay at their RUs
+        :param location: The location of the RU
+        :param updated: The UEs that are already connected again
+        :return: The UEs whose connection changed (along with the UEs that their attachments affected)
+        """
+        interference_radius = self.wireless_connection.get_interference_radius()
+        if interference_radius is None: return []
+        names, index = self.get_UE_index()
+        candidates, _ = index.query_radius(
+            to_cartesian(location.get_lat(), location.get_lon(), location.get_alt()), interference_radius)
+        updated = set(updated)
+        res = []
+        for name in [names[i] for i in candidates]:
+            if name in updated: continue
+            RU = self.attachments[name][1]
+            previous = self.graph.edges[name, RU]['qos']
+            others = self.attach(name, RU, self.get_qos_for_RU(self.get_node_location(name), RU, name))
+            if self.graph.edges[name, RU]['qos'] != previous:
+                res.append(name)
+            res += others
+        return res
+
+    def __reattach_UE(self, name, previous_RU, timestamp: float = None) -> List[str]:
+        # the same with adding the UE, i.e. its connection does not count in the connected UEs of the RUs
+        RU, qos = self.get_qos_for_selected_RU(self.get_node_location(name), name)
+        self.handover_policy.handover(name, timestamp, previous_RU, RU[0])
+        return self.attach(name, RU[0], qos)
+
+    def get_UE_index(self) -> (List[str], SpatialIndex):
+        """
+        Returns a spatial index of the UEs' positions. It is kept until a UE is added or moved
+        :return: The names of the UEs and the spatial index of their positions (in the same order)
+        """
+        if self.UE_index is None:
+            UEs = [(name, data['location']) for name, data in self.graph.nodes(data=True) if data.get('type') == 'UE']
+            points = to_cartesian([i.get_lat() for _, i in UEs], [i.get_lon() for _, i in UEs],
+                                  [i.get_alt() for _, i in UEs])
+            self.UE_index = [name for name, _ in UEs], SpatialIndex(points, self.get_radius() or None)
+        return self.UE_index
+
+    def get_RU_index(self) -> (List[str], SpatialIndex):
+        """
+        Returns a spatial index of the RUs' positions. It is kept until an RU is added or removed
+        :return: The names of the RUs and the spatial index of their positions (in the same order)
+        """
+        if self.RU_index is None:
+            RUs = list(self.get_RUs().items())
+            points = to_cartesian([i.get_lat() for _, i in RUs], [i.get_lon() for _, i in RUs],
+                                  [i.get_alt() for _, i in RUs])
+            cell_size = self.wireless_connection.get_interference_radius() or self.get_radius() or None
+            self.RU_index = [name for name, _ in RUs], SpatialIndex(points, cell_size)
+        return self.RU_index
+
     def get_radius(self) -> float:
         """
         :return: Radius from the wireless connection
@@ -239,41 +526,97 @@ class SliceConceptualGraph:
         if node_name in self.graph.nodes:
             return self.graph.nodes[node_name]['location']
 
-    def __get_sorted_RUs(self, location: Location) -> list[Location]:
-        """
-        Sort RUs by distance from a location
-        """
-        res = []
-        RUs = self.get_RUs()
-        EDGEs = self.get_edge_nodes()
-
-        for RU, bs_location in self.get_RUs().items():
-            if bs_location is None: continue
-            res.append([RU, bs_location, len([i for i in self.graph.neighbors(RU) if i not in RUs and i not in EDGEs])])
-        return sorted(res, key=lambda x: x[1].distance(location), reverse=False)
-
-    def set_node_location(self, node_name, lat, lon, alt=0.0) -> None:
-        """
-        Updates the node's location
+    def __get_sorted_RUs(self, location: Location, node_name: str = None) -> list[Location]:
+        """
+        Sort RUs by distance from a location (through the positions of the RUs' spatial index). Along with every RU,
+        its load is returned, i.e. its connected UEs or, if the wireless model has an allocator, the resources that are
+        available to the UE (node_name) at the RU. Models that do not depend on the RUs do not use it, so it is None
+        """
+        names, index = self.get_RU_index()
+        if len(names) == 0:
+            return []
+        RU_distances = distances(to_cartesian(location.get_lat(), location.get_lon(), location.get_alt()),
+                                 index.points)[0]
+        nodes = self.graph.nodes
+        sorted_RUs = [names[i] for i in np.argsort(RU_distances, kind='stable').tolist()]
+        if self.allocator is not None:
+            get_streams = self.allocator.get_streams
+            return [[RU, nodes[RU]['location'], get_streams(node_name, RU)] for RU in sorted_RUs]
+        if not self.wireless_connection.depends_on_RUs:
+            return [[RU, nodes[RU]['location'], None] for RU in sorted_RUs]
+        RUs, EDGEs = set(names), self.get_edge_nodes()
+        return [[RU, nodes[RU]['location'],
+                 len([i for i in self.graph.neighbors(RU) if i not in RUs and i not in EDGEs])] for RU in sorted_RUs]
+
+    def set_node_location(self, node_name, lat, lon, alt=0.0, timestamp: float = None) -> List[str]:
+        """
+        Updates the node's location. A moving UE is connected to its closest RU, unless the handover policy
+        keeps its current RU
         :param node_name: Node's identifier
         :param lat: Latitude of the new position
         :param lon: Longitude of the new position
         :param alt: Altitude of the new position
+        :param timestamp: The time of the move in seconds for the handover policy (the monotonic clock if it is None)
+        :return: The other UEs whose connection changed (e.g. they got the antennas that the UE released)
         """
-        node_location = self.get_node_location(node_name)
+        # locations may be shared with forks of the slice, so they are never altered
+        node_location = copy.copy(self.get_node_location(node_name))
         node_location.set_lat(lat)
         node_location.set_lon(lon)
         node_location.set_alt(alt)
-        edges = self.graph.edges([node_name])
-        self.graph.remove_edges_from(list(edges))
         self.graph.remove_node(node_name)
-        self.add_node(node_name, lat, lon, alt)
-        RU, qos = self.get_qos_for_selected_RU(node_location)
-        self.graph.add_edge(node_name, RU[0], qos=qos)
+        previous = self.attachments.pop(node_name, None)
+        RU_names = self.get_RU_index()[0]
+        self.__check_validity_of_node_params(RU_names, node_name, lat, lon, 'UE')
+        # the node is connected once (to its selected RU), so its allocated resources are kept if it stays at its RU
+        self.UE_index = None
+        self.graph.add_node(node_name, location=node_location, type='UE')
+        RU, qos = self.get_qos_for_selected_RU(node_location, node_name)
+        selected_RU = RU[0]
+        if previous is not None and previous[0] == 'UE':
+            previous_RU = previous[1] if previous[1] in RU_names else None
+            previous_distance = None if previous_RU is None else \
+                self.get_node_location(previous_RU).distance(node_location)
+            get_bandwidth = lambda i: (qos if i == RU[0] else
+                                       self.get_qos_for_RU(node_location, i, node_name)).get_bandwidth()
+            selected_RU = self.handover_policy.select(node_name, timestamp, previous_RU, previous_distance, RU[0],
+                                                      RU[1].distance(node_location), self.get_radius(), get_bandwidth)
+        if selected_RU != RU[0]:
+            qos = self.get_qos_for_RU(node_location, selected_RU, node_name)
+        return self.attach(node_name, selected_RU, qos)
 
     def get_qos_between_nodes(self, from_node, to_node) -> QoS:
         """
         Generates the QoS for the shortest path between two nodes.
+        Since every node is connected to a single RU (or the cloud connection) and all RUs are inter-connected,
+        the path QoS depends only on the attachments of the two nodes, so it is cached by them.
+        The returned QoS may be shared between calls, so it should not be altered
+        :param from_node: The source node of the path
+        :param to_node: The destination node of the path
+        :return: The respective QoS
+        """
+        if from_node == to_node: return
+        if from_node not in self.attachments or to_node not in self.attachments:
+            return self.compute_qos_between_nodes(from_node, to_node)
+        key = (self.attachments[from_node], self.attachments[to_node])
+        qos = self.path_cache.get(key)
+        if qos is not None:
+            self.path_cache.move_to_end(key)
+            self.path_cache_statistics['hits'] += 1
+            return qos
+        self.path_cache_statistics['misses'] += 1
+        qos = self.compute_qos_between_nodes(from_node, to_node)
+        self.path_cache[key] = qos
+        if len(self.path_cache) > self.path_cache_size:
+            self.path_cache.popitem(last=False)
+            self.path_cache_statistics['evictions'] += 1
+        return qos
+
+    def compute_qos_between_nodes(self, from_node, to_node) -> QoS:
+        """
+        Computes (without the cache) the QoS for the shortest path between two nodes.
+        LinkTable.get_block computes the same rules for all pairs at once, so a change of a rule here should be
+        made there as well (every rule names its counterpart)
         :param from_node: The source node of the path
         :param to_node: The destination node of the path
         :return: The respective QoS
@@ -282,35 +625,202 @@ class SliceConceptualGraph:
         from_node_type = self.graph.nodes(data=True)[from_node].get('type')
         to_node_type = self.graph.nodes(data=True)[to_node].get('type')
 
-        if from_node_type == 'CLOUD' and to_node_type == 'CLOUD':
+        if from_node_type == 'CLOUD' and to_node_type == 'CLOUD':  # get_block: is_empty
             return QoS()
         p = nx.shortest_path(self.graph, source=from_node, target=to_node)
         path_graph = list(nx.path_graph(p).edges())
         qos = QoS()
         ea = path_graph[0]
         edge = self.graph.edges[ea[0], ea[1]]
-        qos = qos + edge['qos'] + edge['qos']
+        qos = qos + edge['qos'] + edge['qos']  # get_block: first_edge
         is_core_network_nodes = from_node_type in ['EDGE', 'CLOUD'] and to_node_type in ['EDGE', 'CLOUD']
         rest_qos = QoS()
-        for ea in path_graph[1:-1]:
+        for ea in path_graph[1:-1]:  # get_block: rest (the midhaul, if the nodes are at different RUs)
             edge = self.graph.edges[ea[0], ea[1]]
             rest_qos = rest_qos + edge['qos'] + edge['qos']
-        if from_node_type == 'UE' and to_node_type != 'UE':
+        if from_node_type == 'UE' and to_node_type != 'UE':  # get_block: is_from_UE & ~is_to_UE
             qos = qos + rest_qos + rest_qos
-        if from_node_type == 'UE' and to_node_type == 'UE':
+        if from_node_type == 'UE' and to_node_type == 'UE':  # get_block: is_from_UE & is_to_UE & ~is_same_RU
             if len(path_graph)>2:
 
                 qos = qos + rest_qos
 
-        if is_core_network_nodes:
+        if is_core_network_nodes:  # get_block: ~is_from_UE & ~is_to_UE
             qos = qos + rest_qos
 
-        if from_node_type in ['EDGE', 'CLOUD'] and to_node_type == 'UE':
+        if from_node_type in ['EDGE', 'CLOUD'] and to_node_type == 'UE':  # get_block: ~is_from_UE & is_to_UE
             temp_qos = QoS()
             ea = path_graph[-1]
             edge = self.graph.edges[ea[0], ea[1]]
             temp_qos.set_bandwidth(edge['qos'].get_bandwidth())
             qos = qos + temp_qos
-        if from_node_type == 'CLOUD' and to_node_type != 'CLOUD':
+        if from_node_type == 'CLOUD' and to_node_type != 'CLOUD':  # get_block: is_cloud_path
             qos = qos + self.get_backhaul() + self.get_backhaul()
         return qos
+
+    def get_qos_timeline(self, times, labels, lats, lons, alts=None) -> QoSTimeline:
+        """
+        Replays (dry-run) the moves of UEs on a fork of the slice through set_node_location and records their
+        radio connections, so the slice is not altered
+        :param times: The time of every move in seconds (the moves should be ordered by time)
+        :param labels: The label of the UE of every move
+        :param lats: The new latitude of every move
+        :param lons: The new longitude of every move
+        :param alts: The new altitude of every move
+        :return: The timeline with the UEs' initial connections and a row per move
+        """
+        return QoSReplay(self).replay(times, labels, lats, lons, alts)
+
+    def get_link_table(self, processes: int = None, block_size: int = None) -> LinkTable:
+        """
+        Generates the links between all pairs of nodes, split by blocks of source nodes across forked processes
+        :param processes: The number of processes (the number of CPUs if it is None, 1 for sequential generation)
+        :param block_size: The number of source nodes of every block (4 blocks per process if it is None)
+        :return: The columnar link table (its rows are ordered by the source and the destination node)
+        """
+        return LinkTable.from_slice(self, processes, block_size)
+
+    def get_qos_raster(self, bounds, resolution: float = 0.01, distance_resolution: float = 0.001) -> QoSRaster:
+        """
+        Evaluates the QoS of the best-serving RU over a lat/lon grid (e.g. for coverage maps).
+        The raster's tiles are cached until the RUs or their connected UEs change
+        :param bounds: The south-west and north-east corners ((lat, lon), (lat, lon)) of the area
+        :param resolution: The size of a pixel in km
+        :param distance_resolution: The distances are rounded to this resolution (in km) before the radio models
+        :return: The raster with the delay, deviation, bandwidth, error_rate, RU and distance arrays
+        """
+        return self.rasterizer.rasterize(bounds, resolution, distance_resolution)
+
+    def save_snapshot(self, filename) -> None:
+        """
+        Stores a snapshot of the slice (parameters, RUs, nodes and their connections)
+        :param filename: The name (or file object) of the .npz file
+        """
+        SliceSnapshot.from_slice(self).save(filename)
+
+    @staticmethod
+    def load_snapshot(filename) -> 'SliceConceptualGraph':
+        """
+        Restores a slice from its snapshot
+        :param filename: The name (or file object) of the .npz file
+        :return: The slice
+        """
+        return SliceSnapshot.load(filename).restore()
+
+    def fork(self, backhaul_qos: Dict = None, midhaul_qos: Dict = None, wireless_connection_type: str = None,
+             parameters: Dict = None, RUs: List[Dict] = None) -> 'SliceConceptualGraph':
+        """
+        Creates a copy of the slice for what-if analysis. Only the graph structure is copied, while locations,
+        QoS objects, the wireless connection, the cached path QoS and raster tiles are shared with the slice
+        (they are never altered, only replaced). If the RUs or the wireless connection differ,
+        all UEs are re-attached in a single pass
+        :param backhaul_qos: A different backhaul QoS
+        :param midhaul_qos: A different midhaul QoS (applied also to the existing RU-to-RU connections)
+        :param wireless_connection_type: A different degradation model (its parameters should be provided too)
+        :param parameters: Different parameters of the degradation model
+        :param RUs: Extra RUs (dicts with lat, lon and alt)
+        :return: The fork of the slice
+        """
+        res = copy.copy(self)
+        res.graph = self.graph.copy()
+        res.attachments = dict(self.attachments)
+        res.handover_policy = self.handover_policy.copy()
+        res.allocator = None if self.allocator is None else self.allocator.copy()
+        res.cell_load = None if self.cell_load is None else self.cell_load.copy()
+        res.path_cache = OrderedDict(self.path_cache)
+        res.path_cache_statistics = dict(hits=0, misses=0, evictions=0, invalidations=0)
+        res.rasterizer = QoSRasterizer(res, self.rasterizer.tile_size, self.rasterizer.chunk_size,
+                                       self.rasterizer.max_tiles)
+        res.rasterizer.tiles, res.rasterizer.state = dict(self.rasterizer.tiles), self.rasterizer.state
+        if midhaul_qos is not None:
+            res.set_midhaul(midhaul_qos)
+            hubs = res.get_RUs(with_cloud=True)
+            for from_RU, to_RU, data in res.graph.edges(data=True):
+                if from_RU in hubs and to_RU in hubs:
+                    data['qos'] = res.get_midhaul()
+        if backhaul_qos is not None:
+            res.set_backhaul(backhaul_qos)
+            for name, data in res.graph.nodes(data=True):
+                if data.get('type') == 'CLOUD':
+                    res.attach(name, 'cloud_connection', res.get_backhaul())
+        if wireless_connection_type is not None or parameters is not None:
+            res.set_wireless_connection(wireless_connection_type or self.wireless_connection_type,
+                                        parameters if parameters is not None else self.parameters)
+        for RU in RUs or []:
+            res._add_RU(**RU)
+        if wireless_connection_type is not None or parameters is not None or RUs:
+            res.reattach_nodes()
+        return res
+
+    def reattach_nodes(self) -> None:
+        """
+        Connects all UEs again to their closest RU in a single pass (e.g. after a change of the RUs or the
+        wireless connection). The result is the same with adding the UEs again one by one, but the distances are
+        computed in vectorized blocks and models that depend only on distance are evaluated once per distance
+        """
+        RUs = self.get_RUs()
+        RU_names, RU_locations = list(RUs.keys()), list(RUs.values())
+        UEs = [(name, data['location']) for name, data in self.graph.nodes(data=True) if data.get('type') == 'UE']
+        if len(UEs) == 0: return
+        for name, _ in UEs:
+            self.graph.remove_edges_from([(name, neighbor) for neighbor in list(self.graph.neighbors(name))])
+        if self.allocator is not None:
+            self.allocator = self.wireless_connection.get_allocator()
+        cell_load, self.cell_load = self.cell_load, None  # the capacities are shared once all UEs are attached
+        RU_points = to_cartesian([i.get_lat() for i in RU_locations], [i.get_lon() for i in RU_locations],
+                                 [i.get_alt() for i in RU_locations])
+        points = to_cartesian([i.get_lat() for _, i in UEs], [i.get_lon() for _, i in UEs],
+                              [i.get_alt() for _, i in UEs])
+        radius = self.get_radius()
+        depends_on_RUs = self.wireless_connection.depends_on_RUs
+        interference_radius = self.wireless_connection.get_interference_radius()
+        connected_UEs = np.zeros(len(RU_names), dtype=np.int64)
+        qos_by_distance = {}
+        for start, block in chunked_distances(points, RU_points):
+            for offset, RU in enumerate(np.argmin(block, axis=1).tolist()):
+                name, location = UEs[start + offset]
+                distance = float(block[offset, RU])
+                if distance > radius:
+                    qos = QoS.get_minimum_qos()
+                elif depends_on_RUs:
+                    order = np.argsort(block[offset], kind='stable')
+                    sorted_RUs = [[RU_names[i], RU_locations[i], int(connected_UEs[i]) if self.allocator is None
+                                   else self.allocator.get_streams(name, RU_names[i])] for i in order]
+                    if self.allocator is not None:  # the same selection with get_qos_for_selected_RU
+                        selected = self.wireless_connection.select_RU(
+                            block[offset][order].tolist(), sorted_RUs, self.allocator.get_maximum_free(len(RU_names)))
+                        RU, distance = int(order[selected]), float(block[offset, order[selected]])
+                        sorted_RUs = [sorted_RUs[selected]] + sorted_RUs[:selected] + sorted_RUs[selected + 1:]
+                    qos = self.get_qos_from(distance=distance, RUs=sorted_RUs, location=location)
+                elif interference_radius is not None:
+                    interfering = block[offset] <= interference_radius
+                    interfering[RU] = False
+                    qos = self.get_qos_from(distance=distance, location=location,
+                                            interfering_distances=block[offset][interfering])
+                else:
+                    if distance not in qos_by_distance:
+                        qos_by_distance[distance] = self.get_qos_from(distance=distance)
+                    qos = qos_by_distance[distance]
+                connected_UEs[RU] += 1
+                self.attach(name, RU_names[RU], qos)
+        if cell_load is not None:
+            self.share_capacity(cell_load.get_params())
+
+    def share_capacity(self, cell_load: Dict) -> None:
+        """
+        Sets the cell load model and shares the capacity of every RU among all of its UEs at once (e.g. after
+        the UEs are attached without a cell load model), instead of updating the shares on every attach
+        :param cell_load: The parameters of the cell load model
+        """
+        self.set_cell_load(cell_load)
+        for name, attachment in list(self.attachments.items()):
+            if attachment[0] == 'UE':
+                self.cell_load.attach(name, attachment[1], self.graph.edges[name, attachment[1]]['qos'])
+        for RU in list(self.cell_load.members):
+            for name, shared in self.cell_load.get_qos(RU).items():
+                self.__link(name, RU, shared)
+
+
+instrumentation.register(SliceConceptualGraph, dict(
+    attach='attach', set_node_location='move', get_qos_between_nodes='path_qos', get_link_table='link_table',
+    _SliceConceptualGraph__get_sorted_RUs='RU_sorting', get_qos_from='radio'))
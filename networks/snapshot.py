@@ -0,0 +1,184 @@
+import io
+import json
+from collections.abc import MutableMapping
+
+import numpy as np
+
+from networks.QoS import QoS
+from utils.location import Location
+
+
+class SliceSnapshot(object):
+    """
+    Columnar snapshot of a slice, i.e. its parameters, RUs, nodes and their connections, that is stored
+    as NumPy (.npz) file. The arrays of a loaded snapshot are read on access, while the slice (and its graph)
+    is rebuilt only when it is restored
+    """
+
+    # The version of the snapshot format
+    version = 1
+
+    # The codes of the node types
+    node_types = ['UE', 'EDGE', 'CLOUD']
+
+    class SliceSnapshotException(Exception): pass
+
+    def __init__(self, data):
+        """
+        :param data: A mapping (e.g. a dict or a loaded .npz file) with the arrays of the snapshot
+        """
+        self.data = data
+        self.metadata = json.loads(str(data['metadata']))
+        if self.metadata.get('version') != self.version:
+            raise SliceSnapshot.SliceSnapshotException(
+                f"The snapshot version is {self.metadata.get('version')} but it should be {self.version}")
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.data[name]
+
+    def get_name(self) -> str:
+        return self.metadata['name']
+
+    @classmethod
+    def from_slice(cls, network) -> 'SliceSnapshot':
+        """
+        Generates the snapshot of a slice
+        :param network: The slice (SliceConceptualGraph)
+        :return: The snapshot
+        """
+        RUs = network.get_RUs()
+        RU_indices = {name: i for i, name in enumerate(RUs)}
+        nodes = list(network.attachments.items())
+        node_locations = [network.get_node_location(name) for name, _ in nodes]
+        metadata = dict(version=cls.version, name=network.get_name(),
+                        backhaul_qos=network.get_backhaul().get_params(),
+                        midhaul_qos=network.get_midhaul().get_params(),
+                        wireless_connection_type=network.wireless_connection_type, parameters=network.parameters,
+                        handover_policy=network.handover_policy.get_params())
+        if network.allocator is not None:
+            # the allocated resources of the UEs in their allocation order (e.g. the MIMO streams)
+            metadata['allocation'] = network.allocator.get_state()
+        data = {}
+        if network.cell_load is not None:
+            metadata['cell_load'] = network.cell_load.get_params()
+            # the radio QoS of the served UEs, since their connections have their share of the RU's capacity
+            members = network.cell_load.members
+            radio_qos = [members[network.cell_load.RUs[name]][name] if name in network.cell_load.RUs else None
+                         for name, _ in nodes]
+            data['node_radio_qos'] = np.array(
+                [attachment[2:] if qos is None else
+                 (qos.get_delay(), qos.get_deviation(), qos.get_bandwidth(), qos.get_error_rate())
+                 for (_, attachment), qos in zip(nodes, radio_qos)], dtype=np.float64).reshape(-1, 4)
+        return cls(dict(data,
+            metadata=np.array(json.dumps(metadata)),
+            RU_names=np.array(list(RUs), dtype=str),
+            RU_locations=cls.__get_locations(RUs.values()),
+            node_names=np.array([name for name, _ in nodes], dtype=str),
+            node_types=np.array([cls.node_types.index(attachment[0]) for _, attachment in nodes], dtype=np.int8),
+            node_locations=cls.__get_locations(node_locations),
+            # the index of the connected RU (-1 for the cloud connection)
+            node_RUs=np.array([RU_indices.get(attachment[1], -1) for _, attachment in nodes], dtype=np.int32),
+            # the delay, deviation, bandwidth and error rate of the connection
+            node_qos=np.array([attachment[2:] for _, attachment in nodes], dtype=np.float64).reshape(-1, 4)))
+
+    @staticmethod
+    def __get_locations(locations) -> np.ndarray:
+        res = [(np.nan, np.nan, np.nan) if location is None else
+               (location.lat, location.lon, np.nan if location.alt is None else location.alt)
+               for location in locations]
+        return np.array(res, dtype=np.float64).reshape(-1, 3)
+
+    @staticmethod
+    def __get_location(location) -> Location:
+        if np.isnan(location[0]): return None
+        return Location(float(location[0]), float(location[1]), None if np.isnan(location[2]) else float(location[2]))
+
+    def save(self, filename) -> None:
+        """
+        Stores the snapshot
+        :param filename: The name (or file object) of the .npz file
+        """
+        np.savez(filename, **{name: self.data[name] for name in self.data})
+
+    def to_bytes(self) -> bytes:
+        buffer = io.BytesIO()
+        self.save(buffer)
+        return buffer.getvalue()
+
+    @classmethod
+    def load(cls, filename) -> 'SliceSnapshot':
+        """
+        Loads a snapshot without reading its arrays
+        :param filename: The name (or file object) of the .npz file
+        :return: The snapshot
+        """
+        return cls(np.load(filename))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'SliceSnapshot':
+        return cls.load(io.BytesIO(data))
+
+    def restore(self):
+        """
+        Rebuilds the slice with the stored connections (the radio QoS is not computed again)
+        :return: The slice (SliceConceptualGraph)
+        """
+        from networks.slicing import SliceConceptualGraph
+        metadata = self.metadata
+        network = SliceConceptualGraph(metadata['name'], metadata['backhaul_qos'], metadata['midhaul_qos'],
+                                       metadata['parameters'], RUs=[],
+                                       wireless_connection_type=metadata['wireless_connection_type'],
+                                       handover_policy=metadata.get('handover_policy'))
+        RU_names = self['RU_names'].tolist()
+        for name, location in zip(RU_names, self['RU_locations']):
+            network.graph.add_node(name, location=self.__get_location(location), type='RU')
+        hubs = RU_names + ['cloud_connection']
+        if network.allocator is not None and 'allocation' in metadata:
+            # the allocations are restored, so the UEs keep their resources when they are attached again
+            network.allocator.set_state(metadata['allocation'])
+        # the same connections with set_RU (every RU is connected with each other and itself)
+        for i, name in enumerate(RU_names):
+            for other in hubs[i:]:
+                network.graph.add_edge(name, other, qos=network.get_midhaul())
+        # the UEs are connected with their radio QoS and the capacity of the RUs is shared at once
+        node_qos = self['node_radio_qos'] if 'cell_load' in metadata else self['node_qos']
+        for name, node_type, location, RU, qos in zip(self['node_names'].tolist(), self['node_types'].tolist(),
+                                                      self['node_locations'], self['node_RUs'].tolist(),
+                                                      node_qos.tolist()):
+            network.graph.add_node(name, location=self.__get_location(location), type=self.node_types[node_type])
+            network.attach(name, hubs[RU], QoS(dict(latency=dict(delay=qos[0], deviation=qos[1]), bandwidth=qos[2],
+                                                     error_rate=qos[3])))
+        if 'cell_load' in metadata:
+            network.share_capacity(metadata['cell_load'])
+        return network
+
+
+class LazySlices(MutableMapping):
+    """
+    A dict of slices that are kept as snapshots and restored on their first access
+    """
+
+    def __init__(self, snapshots: dict = None):
+        self.snapshots = dict(snapshots) if snapshots else {}
+        self.slices = {}
+
+    def __getitem__(self, name):
+        if name not in self.slices:
+            if name not in self.snapshots: raise KeyError(name)
+            self.slices[name] = self.snapshots.pop(name).restore()
+        return self.slices[name]
+
+    def __setitem__(self, name, network):
+        self.snapshots.pop(name, None)
+        self.slices[name] = network
+
+    def __delitem__(self, name):
+        if name not in self.slices and name not in self.snapshots: raise KeyError(name)
+        self.slices.pop(name, None)
+        self.snapshots.pop(name, None)
+
+    def __iter__(self):
+        return iter(list(self.slices) + [name for name in self.snapshots if name not in self.slices])
+
+    def __len__(self):
+        return len(set(self.slices) | set(self.snapshots))
@@ -0,0 +1,175 @@
+from typing import List
+
+import numpy as np
+
+
+class QoSTimeline(object):
+    """
+    Columnar timeline of the UEs' radio connections. Every row keeps the RU that a UE is attached to
+    and the QoS of its radio connection from a specific time (in seconds) until the next row of the UE
+    """
+
+    class QoSTimelineException(Exception): pass
+
+    # The columns (and their types) of the timeline
+    columns = dict(time=np.float64, node=np.int32, RU=np.int32, distance=np.float32, delay=np.float32,
+                   deviation=np.float32, bandwidth=np.float32, error_rate=np.float32)
+
+    def __init__(self, nodes: List[str], RUs: List[str], **columns):
+        """
+        :param nodes: The labels of the UEs (the node column keeps indices of this list)
+        :param RUs: The identifiers of the RUs (the RU column keeps indices of this list)
+        :param columns: The arrays of the columns
+        """
+        self.nodes = list(nodes)
+        self.RUs = list(RUs)
+        missing_columns = [name for name in self.columns if name not in columns]
+        if missing_columns:
+            raise QoSTimeline.QoSTimelineException(f"The timeline misses the columns {missing_columns}")
+        for name, dtype in self.columns.items():
+            setattr(self, name, np.asarray(columns[name], dtype=dtype))
+        if len({len(getattr(self, name)) for name in self.columns}) > 1:
+            raise QoSTimeline.QoSTimelineException("The columns of the timeline should have the same length")
+
+    def __len__(self):
+        return len(self.time)
+
+    def get_columns(self) -> dict:
+        return {name: getattr(self, name) for name in self.columns}
+
+    def get_node(self, label: str) -> dict:
+        """
+        :param label: The label of the UE
+        :return: The columns of the UE's rows
+        """
+        if label not in self.nodes:
+            raise QoSTimeline.QoSTimelineException(f"There is no node {label} in the timeline")
+        mask = self.node == self.nodes.index(label)
+        return {name: column[mask] for name, column in self.get_columns().items()}
+
+    def at(self, time: float) -> dict:
+        """
+        Returns the state of the slice at a specific time, i.e. the last row of every UE until then
+        :param time: The time in seconds
+        :return: The columns with a row per UE
+        """
+        rows = np.flatnonzero(self.time <= time)
+        # rows are ordered by time, so the last occurrence of every node is its current state
+        nodes, last = np.unique(self.node[rows][::-1], return_index=True)
+        rows = rows[::-1][last]
+        return {name: column[rows] for name, column in self.get_columns().items()}
+
+    def get_handover_counts(self) -> dict:
+        """
+        :return: The number of handovers (changes of the RU between consecutive rows) of every UE
+        """
+        rows = np.argsort(self.node, kind='stable')
+        nodes, RUs = self.node[rows], self.RU[rows]
+        is_handover = (nodes[1:] == nodes[:-1]) & (RUs[1:] != RUs[:-1])
+        counts = np.bincount(nodes[1:][is_handover], minlength=len(self.nodes))
+        return {name: int(counts[i]) for i, name in enumerate(self.nodes)}
+
+    def to_dataframe(self):
+        """
+        :return: A pandas DataFrame of the timeline with the labels of the UEs and the RUs
+        """
+        import pandas as pd
+        df = pd.DataFrame(self.get_columns())
+        df['node'] = pd.Categorical.from_codes(self.node, categories=self.nodes)
+        df['RU'] = pd.Categorical.from_codes(self.RU, categories=self.RUs)
+        return df
+
+    def to_parquet(self, filename: str) -> None:
+        """
+        Stores the timeline as Parquet file (needs a pandas' Parquet engine, e.g. pyarrow)
+        :param filename: The name of the file
+        """
+        self.to_dataframe().to_parquet(filename)
+
+    def save(self, filename: str) -> None:
+        """
+        Stores the timeline as compressed NumPy (.npz) file
+        :param filename: The name of the file
+        """
+        np.savez_compressed(filename, nodes=np.array(self.nodes, dtype=str), RUs=np.array(self.RUs, dtype=str),
+                            **self.get_columns())
+
+    @classmethod
+    def load(cls, filename: str) -> 'QoSTimeline':
+        """
+        Loads a timeline that is stored by the save method
+        :param filename: The name of the file
+        :return: The timeline
+        """
+        with np.load(filename) as data:
+            return cls(data['nodes'].tolist(), data['RUs'].tolist(), **{name: data[name] for name in cls.columns})
+
+
+class QoSReplay(object):
+    """
+    Replays the movements of UEs against a fork of a slice, so neither the slice is altered nor any Fogify controller
+    is contacted. Every move is applied by the fork's set_node_location (with the time of the move for its handover
+    policy), so the replay follows the same attachment rules with the slice, and the resulting connections are
+    recorded, i.e. a row for the moving UE and a row at the same time for every other UE whose connection changed
+    (e.g. it got the antennas that the moving UE released or its share of the RU's capacity changed)
+    """
+
+    def __init__(self, network):
+        """
+        :param network: The slice (SliceConceptualGraph) with its initial nodes
+        """
+        if len(network.get_RUs()) == 0:
+            raise network.NetworkSliceException("The slice has no RUs")
+        self.network = network.fork()
+        self.RUs = self.network.get_RUs()
+        self.RU_names = list(self.RUs.keys())
+        self.RU_indices = {name: i for i, name in enumerate(self.RU_names)}
+        self.nodes = [name for name, data in self.network.graph.nodes(data=True) if data.get('type') == 'UE']
+        self.node_indices = {name: i for i, name in enumerate(self.nodes)}
+
+    def get_initial_state(self) -> dict:
+        """
+        :return: The columns of the UEs' initial radio connections (at time 0)
+        """
+        rows = {name: [] for name in QoSTimeline.columns}
+        for name in self.nodes:
+            self.__append(rows, 0.0, name)
+        return rows
+
+    def replay(self, times, labels, lats, lons, alts=None) -> QoSTimeline:
+        """
+        Replays the moves of the UEs
+        :param times: The time of every move in seconds (the moves should be ordered by time)
+        :param labels: The label of the UE of every move
+        :param lats: The new latitude of every move
+        :param lons: The new longitude of every move
+        :param alts: The new altitude of every move (0.0 if it is None)
+        :return: The timeline with the initial state and a row per move (and per UE whose connection it changed)
+        """
+        times = np.asarray(times, dtype=np.float64)
+        alts = np.zeros(len(times)) if alts is None else alts
+        if np.any(np.diff(times) < 0):
+            raise self.network.NetworkSliceException("The moves should be ordered by time")
+        unknown = set(labels) - set(self.node_indices)
+        if unknown:
+            raise self.network.NetworkSliceException(f"The nodes {sorted(unknown)} are not UEs of the slice")
+
+        rows = self.get_initial_state()
+        for time, label, lat, lon, alt in zip(times.tolist(), labels, np.asarray(lats, dtype=np.float64).tolist(),
+                                              np.asarray(lons, dtype=np.float64).tolist(),
+                                              np.asarray(alts, dtype=np.float64).tolist()):
+            others = self.network.set_node_location(label, lat, lon, alt, timestamp=time)
+            for name in [label] + others:
+                self.__append(rows, time, name)
+        return QoSTimeline(self.nodes, self.RU_names, **rows)
+
+    def __append(self, rows, time, name):
+        _, RU, delay, deviation, bandwidth, error_rate = self.network.attachments[name]
+        rows['time'].append(time)
+        rows['node'].append(self.node_indices[name])
+        rows['RU'].append(self.RU_indices[RU])
+        rows['distance'].append(self.RUs[RU].distance(self.network.get_node_location(name)))
+        rows['delay'].append(delay)
+        rows['deviation'].append(deviation)
+        rows['bandwidth'].append(bandwidth)
+        rows['error_rate'].append(error_rate)
@@ -1,7 +1,12 @@
 import copy
+import os
+import shutil
+import tempfile
 import unittest
 from pathlib import Path
 
+import numpy as np
+
 from SlicerSDK import SlicerSDK
 from usecases.dublin_buses_experiment import BusExperiment
 
@@ -53,3 +58,70 @@ class TestDublinBusesExperiment(unittest.TestCase):
             self.assertEqual(len(experiment.RUs), 100)
             res[bsoverlap] = copy.deepcopy(experiment.RUs)
         self.assertNotEquals(res['max_density'], res['min_density'])
+
+    def test_local_density_RUs(self):
+        res = {}
+        for bsoverlap in ['max_local_density', 'min_local_density']:
+            experiment = BusExperiment(self.slicerSDK, traces_filename="all.csv", bus_stops_filename="stops.csv",
+                                       num_of_RUs=5, ru_overlap=bsoverlap)
+            self.assertEqual(len(experiment.RUs), 5)
+            res[bsoverlap] = [RU['stop_id'] for RU in experiment.RUs]
+        self.assertNotEqual(res['max_local_density'], res['min_local_density'])
+
+    def test_kmeans_and_coverage_RUs(self):
+        for bsoverlap in ['kmeans', 'coverage']:
+            experiment = BusExperiment(self.slicerSDK, traces_filename="all.csv", bus_stops_filename="stops.csv",
+                                       num_of_RUs=20, ru_overlap=bsoverlap)
+            self.assertEqual(len(experiment.RUs), 20)
+            self.assertEqual(len({RU['stop_id'] for RU in experiment.RUs}), 20)
+
+    def test_trace_cache(self):
+        experiment = BusExperiment(self.slicerSDK, traces_filename="all.csv", bus_stops_filename="stops.csv",
+                                   num_of_buses=10)
+        with tempfile.TemporaryDirectory() as cache_dir:
+            for _ in range(2):
+                cached_experiment = BusExperiment(self.slicerSDK, traces_filename="all.csv",
+                                                  bus_stops_filename="stops.csv", num_of_buses=10,
+                                                  trace_cache_dir=cache_dir, trace_chunk_size=100)
+                self.assertEqual(len(os.listdir(cache_dir)), 1)
+                self.assertEqual(list(cached_experiment.traces), list(experiment.traces))
+                for trace_id, trace in experiment.traces.items():
+                    self.assertEqual(cached_experiment.traces[trace_id].tolist(), trace.tolist())
+            # the cached records are not copied
+            self.assertFalse(cached_experiment.trace_df['Lat'].to_numpy().flags.writeable)
+            # a modified traces file is filtered again
+            traces_filename = os.path.join(cache_dir, "traces.csv")
+            shutil.copy("all.csv", traces_filename)
+            BusExperiment(self.slicerSDK, traces_filename=traces_filename, bus_stops_filename="stops.csv",
+                          num_of_buses=10, trace_cache_dir=cache_dir)
+            stat = os.stat(traces_filename)
+            os.utime(traces_filename, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+            BusExperiment(self.slicerSDK, traces_filename=traces_filename, bus_stops_filename="stops.csv",
+                          num_of_buses=10, trace_cache_dir=cache_dir)
+            self.assertEqual(len([i for i in os.listdir(cache_dir) if i.endswith('.npy')]), 3)
+
+    def test_mobility_scenario(self):
+        experiment = BusExperiment(self.slicerSDK, traces_filename="all.csv", bus_stops_filename="stops.csv",
+                                   num_of_buses=10, scenario_tick=5)
+        experiment.generate_experiment()
+        actions = experiment.mobility_scenario['actions']
+        self.assertIn(experiment.mobility_scenario, self.slicerSDK.scenarios)
+        self.assertEqual([action['position'] for action in actions], list(range(len(actions))))
+        self.assertTrue(all([action['time'] % 5 == 0 and action['time'] > 0 for action in actions]))
+        for action in actions:
+            labels = [node['label'] for node in action['action']['parameters']['nodes']]
+            self.assertEqual(len(labels), len(set(labels)))
+        report = experiment.get_scenario_report()
+        self.assertEqual(report['actions'], len(actions))
+        self.assertLessEqual(report['moves'], sum([len(trace) - 1 for trace in experiment.traces.values()]))
+        self.assertGreater(report['bytes'], 0)
+
+    def test_dry_run(self):
+        experiment = BusExperiment(self.slicerSDK, traces_filename="all.csv", bus_stops_filename="stops.csv",
+                                   num_of_buses=10, scenario_tick=5)
+        experiment.generate_experiment()
+        timeline = self.slicerSDK.dry_run('mobility_scenario')[experiment.slice_name]
+        report = experiment.get_scenario_report()
+        self.assertEqual(len(timeline), len(timeline.nodes) + report['moves'])
+        self.assertEqual(timeline.time[-1], sum([action['time'] for action in experiment.mobility_scenario['actions']]))
+        self.assertTrue(np.all(np.diff(timeline.time) >= 0))
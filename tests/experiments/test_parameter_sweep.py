@@ -0,0 +1,50 @@
+import unittest
+from pathlib import Path
+
+from SlicerSDK import SlicerSDK
+from usecases.dublin_buses_experiment import BusExperiment
+from usecases.sweep import ParameterSweep
+from usecases.template import Template
+
+file_path = f"{Path(__file__).parent.absolute()}/docker-compose-dublin.yaml"
+
+
+class TestParameterSweep(unittest.TestCase):
+
+    def setUp(self):
+        self.experiment = BusExperiment(SlicerSDK("http://controller:5000", file_path), traces_filename="all.csv",
+                                        bus_stops_filename="stops.csv", num_of_buses=5, seed=1)
+        self.grid = {'num_of_RUs': [3, 10], 'ru_overlap': ['kmeans', 'coverage'],
+                     ('wireless_connection_type', 'parameters'): [
+                         ('FlatWirelessNetwork', {'radius': 200}), ('MultiRangeNetwork', {'radius': 500, 'bins': {
+                             '0.5km': dict(latency=dict(delay=1, deviation=1), bandwidth=50, error_rate=0)}})]}
+
+    def test_configurations(self):
+        configurations = ParameterSweep(self.experiment, self.grid).get_configurations()
+        self.assertEqual(len(configurations), 8)
+        self.assertEqual(configurations[0], {'num_of_RUs': 3, 'ru_overlap': 'kmeans',
+                                             'wireless_connection_type': 'FlatWirelessNetwork',
+                                             'parameters': {'radius': 200}})
+
+    def test_run(self):
+        sequential = ParameterSweep(self.experiment, self.grid, processes=1).run()
+        parallel = ParameterSweep(self.experiment, self.grid, processes=2).run()
+        self.assertEqual(len(parallel), 8)
+        self.assertNotIn('error', parallel.columns)
+        self.assertEqual(list(parallel['RUs']), [3, 3, 3, 3, 10, 10, 10, 10])
+        self.assertEqual(list(parallel['links']), list(sequential['links']))
+        self.assertEqual(list(parallel['mean_delay']), list(sequential['mean_delay']))
+        self.assertEqual(self.experiment.slicer_sdk.slices, {})
+
+    def test_template_without_clone(self):
+        class Experiment(Template):
+            def generate_experiment(self):
+                pass
+
+        with self.assertRaises(ParameterSweep.ParameterSweepException) as context:
+            ParameterSweep(Experiment(), self.grid)
+        self.assertIn('Experiment does not implement clone', str(context.exception))
+
+    def test_clone_of_loading_parameters(self):
+        with self.assertRaises(ValueError):
+            self.experiment.clone(self.experiment.slicer_sdk, bounding_box=((0, 0), (1, 1)))
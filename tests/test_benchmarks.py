@@ -0,0 +1,85 @@
+import json
+import os
+import tempfile
+import unittest
+
+from benchmarks.city import SyntheticCity
+from benchmarks.controller import LocalSlicerSDK
+from benchmarks.suite import BenchmarkSuite, CASES, main, parse_sizes
+
+
+class TestBenchmarks(unittest.TestCase):
+
+    def test_city(self):
+        city = SyntheticCity(num_of_RUs=10, num_of_UEs=25, seed=1)
+        self.assertEqual(len(city.get_RUs()), 10)
+        self.assertEqual(len({(i['lat'], i['lon']) for i in city.get_RUs()}), 10)
+        (south, west), (north, east) = city.get_bounds()
+        for UE in city.get_UEs():
+            self.assertTrue(south <= UE['lat'] <= north and west <= UE['lon'] <= east)
+        self.assertEqual(city.get_UEs(), SyntheticCity(num_of_RUs=10, num_of_UEs=25, seed=1).get_UEs())
+        self.assertEqual(len(city.get_model()['x-fogify']['topology']), 27)
+
+    def test_local_controller(self):
+        city = SyntheticCity(num_of_RUs=4, num_of_UEs=5)
+        slicer_sdk = LocalSlicerSDK(city.get_model())
+        slicer_sdk.generate_slices()
+        self.assertEqual(len(slicer_sdk.networks[0]['links']), 7 * 6)
+        UE = city.get_UEs(seed=1)[0]
+        slicer_sdk.move_node_to_location(city.slice_name, 'ue-0', UE['lat'], UE['lon'])
+        statistics = slicer_sdk.get_statistics()
+        # a request per node whose links are updated (the moved node and the ones whose delay towards it changed)
+        self.assertGreaterEqual(statistics['requests'], 1)
+        self.assertGreater(statistics['payload_bytes'], 0)
+
+    def test_suite(self):
+        suite = BenchmarkSuite([(4, 6)], ['LinearDegradation', 'FlatWirelessNetwork'], repeats=1, moves=2,
+                               max_pixels=10000, imports=['networks'])
+        results = suite.run()
+        self.assertEqual(len(results['results']), 1 + 2 * (len(CASES) - 1))
+        for row in results['results']:
+            self.assertNotIn('error', row)
+            self.assertLessEqual(row['min'], row['mean'])
+            self.assertGreater(row['peak_memory'], 0)
+        rows = {(row['case'], row['model']): row for row in results['results']}
+        self.assertEqual(rows['import', 'networks']['heavy_modules'], [])
+        self.assertEqual(rows['generate_slices', 'LinearDegradation']['links'], 8 * 7)
+        self.assertGreater(rows['move', 'LinearDegradation']['payload_bytes_per_move'], 0)
+        self.assertEqual(rows['batch_move', 'FlatWirelessNetwork']['requests_per_batch'], 1)
+        json.dumps(results)
+
+        suite = BenchmarkSuite([(4, 600)], ['LinearDegradation'], ['generate_slices'], max_links=1000)
+        self.assertIn('skipped', suite.run()['results'][0])
+
+    def test_import(self):
+        # the ns-3 radio models, geopy, the map UI, the API service and the plotting are imported on their first use
+        for module in ['networks', 'SlicerSDK']:
+            res = BenchmarkSuite.import_module(module, trace=True)
+            self.assertEqual(res['heavy_modules'], [])
+            self.assertGreater(res['seconds'], 0)
+            self.assertGreater(res['peak_memory'], 0)
+
+    def test_compare(self):
+        baseline = dict(results=[dict(case='build', model='SISO', RUs=10, UEs=10, min=1.0),
+                                 dict(case='move', model='SISO', RUs=10, UEs=10, min=1.0)])
+        results = dict(results=[dict(case='build', model='SISO', RUs=10, UEs=10, min=1.1),
+                                dict(case='move', model='SISO', RUs=10, UEs=10, min=2.0),
+                                dict(case='raster', model='SISO', RUs=10, UEs=10, min=2.0)])
+        regressions = BenchmarkSuite.compare(results, baseline, threshold=0.2)
+        self.assertEqual([(i['case'], i['ratio']) for i in regressions], [('move', 2.0)])
+
+    def test_main(self):
+        self.assertEqual(parse_sizes('small,100x1000'), [(10, 10), (10, 100), (100, 1000)])
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'results.json')
+            args = ['--sizes', '2x3', '--models', 'LinearDegradation', '--cases', 'build,move', '--repeats', '1',
+                    '--no-memory', '--output', output]
+            self.assertEqual(main(args), 0)
+            results = BenchmarkSuite.load(output)
+            self.assertEqual([row['case'] for row in results['results']], ['build', 'move'])
+            self.assertNotIn('peak_memory', results['results'][0])
+            self.assertEqual(main(args + ['--baseline', output, '--threshold', '1000']), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import io
+import unittest
+
+import numpy as np
+
+from networks.QoS import QoS
+from networks.cell_load import CellLoad
+from networks.slicing import SliceConceptualGraph
+from networks.snapshot import SliceSnapshot
+from utils.location import Location
+
+
+class TestCellLoad(unittest.TestCase):
+
+    def setUp(self):
+        self.backhaul_qos = {'latency': {'delay': '3.0ms', 'deviation': '1.0ms'}, 'bandwidth': '100.0mbps',
+                             'error_rate': '1.0%'}
+        self.parameters = dict(
+            best_qos={'latency': {'delay': '5.0ms', 'deviation': '2.0ms'}, 'bandwidth': '10.0mbps',
+                      'error_rate': '1.0%'},
+            worst_qos={'latency': {'delay': '100.0ms', 'deviation': '20.0ms'}, 'bandwidth': '5.0mbps',
+                       'error_rate': '2.0%'}, radius="300m")
+        self.RUs = [dict(lat=35.0, lon=33.0), dict(lat=35.004, lon=33.0)]
+        self.locations = [(35.0001, 33.0), (35.001, 33.0), (35.002, 33.004), (35.0039, 33.0)]
+
+    def get_network(self, policy):
+        network = SliceConceptualGraph("network", self.backhaul_qos, self.backhaul_qos, self.parameters,
+                                        RUs=self.RUs, cell_load=dict(policy=policy))
+        for i, (lat, lon) in enumerate(self.locations):
+            network.add_node(f'ue_{i}', lat, lon)
+        return network
+
+    def get_bandwidths(self, network):
+        return {name: attachment[4] for name, attachment in network.attachments.items()}
+
+    def get_radio_bandwidth(self, network, name):
+        RU = network.attachments[name][1]
+        return network.get_qos_for_RU(network.get_node_location(name), RU, name).get_bandwidth()
+
+    def test_policies(self):
+        qos = {name: QoS(dict(bandwidth=bandwidth)) for name, bandwidth in [('a', 10), ('b', 5), ('c', 0)]}
+        equal, fair = CellLoad('equal'), CellLoad('proportional_fair')
+        for name in ['a', 'b', 'c']:
+            equal.attach(name, 'RU', qos[name])
+            fair.attach(name, 'RU', qos[name])
+        self.assertEqual(equal.get_load('RU')[0], 2)  # the UE without bandwidth is not served
+        self.assertAlmostEqual(equal.get_load('RU')[1], 0.3)
+        self.assertEqual({name: i.get_bandwidth() for name, i in equal.get_qos('RU').items()}, dict(a=3.333, b=3.333))
+        self.assertEqual({name: i.get_bandwidth() for name, i in fair.get_qos('RU').items()}, dict(a=5, b=2.5))
+        self.assertEqual(fair.attach('a', 'other', qos['a']), ['RU', 'other'])
+        self.assertEqual(fair.get_qos('RU')['b'].get_bandwidth(), 5)
+        self.assertEqual(fair.share_with_new_UE(np.array([10, 0]), np.array([1, 1]), np.array([0.2, 0.2])).tolist(),
+                         [5, 0])
+        with self.assertRaises(CellLoad.CellLoadException):
+            CellLoad('round_robin')
+
+    def test_slice(self):
+        network = self.get_network('proportional_fair')
+        # ue_0 and ue_1 share the first RU, while ue_2 is out of the radius
+        self.assertEqual(network.attachments['ue_0'][4], np.round(self.get_radio_bandwidth(network, 'ue_0') / 2, 3))
+        self.assertEqual(network.attachments['ue_2'][4], 0)
+        self.assertEqual(network.attachments['ue_3'][4], self.get_radio_bandwidth(network, 'ue_3'))
+        # a move within the RU changes only the share of the moving UE
+        self.assertEqual(network.set_node_location('ue_1', 35.0011, 33.0), [])
+        # the UEs of the RUs that a UE leaves and joins get their new shares
+        self.assertEqual(sorted(network.set_node_location('ue_1', 35.0038, 33.0)), ['ue_0', 'ue_3'])
+        self.assertEqual(network.attachments['ue_0'][4], self.get_radio_bandwidth(network, 'ue_0'))
+        self.assertEqual(network.attachments['ue_3'][4], np.round(self.get_radio_bandwidth(network, 'ue_3') / 2, 3))
+        equal = self.get_network('equal')
+        self.assertEqual(equal.attachments['ue_0'][4], equal.attachments['ue_1'][4])
+        self.assertLess(equal.attachments['ue_0'][4], self.get_radio_bandwidth(equal, 'ue_1'))
+
+    def test_timeline(self):
+        network = self.get_network('equal')
+        moves = [(1, 'ue_1', 35.0011, 33.0), (2, 'ue_1', 35.0038, 33.0), (3, 'ue_2', 35.0015, 33.0)]
+        timeline = network.get_qos_timeline(*zip(*moves))
+        for _, label, lat, lon in moves:
+            network.set_node_location(label, lat, lon)
+        last_rows = {timeline.nodes[timeline.node[i]]: i for i in range(len(timeline))}
+        self.assertGreater(len(timeline), len(network.attachments) + len(moves))
+        for name, i in last_rows.items():
+            self.assertAlmostEqual(timeline.bandwidth[i], network.attachments[name][4], places=3)
+
+    def test_snapshot_fork_and_raster(self):
+        network = self.get_network('equal')
+        buffer = io.BytesIO()
+        network.save_snapshot(buffer)
+        buffer.seek(0)
+        restored = SliceSnapshot.load(buffer).restore()
+        self.assertEqual(self.get_bandwidths(restored), self.get_bandwidths(network))
+        self.assertEqual(restored.set_node_location('ue_2', 35.0015, 33.0),
+                         network.set_node_location('ue_2', 35.0015, 33.0))
+        # the UEs are attached again at once with the same shares
+        fork = network.fork(parameters=dict(self.parameters))
+        self.assertEqual(self.get_bandwidths(fork), self.get_bandwidths(network))
+        fork.set_node_location('ue_0', 35.0039, 33.0)
+        self.assertNotEqual(self.get_bandwidths(fork), self.get_bandwidths(network))
+        raster = network.get_qos_raster(((34.999, 32.999), (35.005, 33.001)), resolution=0.05,
+                                        distance_resolution=None)
+        lats, lons = raster.get_coordinates()
+        row, column = int(np.argmin(np.abs(lats - 35.0005))), int(np.argmin(np.abs(lons - 33.0)))
+        RU, qos = network.get_qos_for_selected_RU(Location(float(lats[row]), float(lons[column])))
+        count, inverse_sum = network.cell_load.get_load(RU[0])
+        self.assertAlmostEqual(raster['bandwidth'][row, column],
+                               1 / (inverse_sum + 1 / qos.get_bandwidth()), places=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+
+from SlicerSDK import SlicerSDK
+from networks.slicing import SliceConceptualGraph
+
+
+class TestDynamicRUs(unittest.TestCase):
+
+    def setUp(self):
+        self.backhaul_qos = {'latency': {'delay': '3.0ms', 'deviation': '1.0ms'}, 'bandwidth': '100.0mbps',
+                             'error_rate': '1.0%'}
+        self.parameters = dict(
+            best_qos={'latency': {'delay': '5.0ms', 'deviation': '2.0ms'}, 'bandwidth': '10.0mbps',
+                      'error_rate': '1.0%'},
+            worst_qos={'latency': {'delay': '100.0ms', 'deviation': '20.0ms'}, 'bandwidth': '5.0mbps',
+                       'error_rate': '2.0%'}, radius="1km")
+        self.RUs = [dict(lat=35.0, lon=33.0), dict(lat=35.01, lon=33.0)]
+        self.nodes = [('ue_0', 35.0001, 33.0), ('ue_1', 35.004, 33.0), ('ue_2', 35.0055, 33.0004),
+                      ('ue_3', 35.0098, 33.0), ('ue_4', 35.0051, 33.0006), ('ue_5', 35.0049, 33.0003)]
+
+    def get_network(self, RUs):
+        network = SliceConceptualGraph("network", self.backhaul_qos, self.backhaul_qos, self.parameters, RUs=RUs)
+        for name, lat, lon in self.nodes:
+            network.add_node(name, lat, lon)
+        network.add_node('edge', 35.0, 33.0, location_type='EDGE')
+        network.add_node('cloud', location_type='CLOUD')
+        return network
+
+    def assert_same_slices(self, network, other):
+        self.assertEqual(set(other.get_RUs()), set(network.get_RUs()))
+        self.assertEqual(other.attachments, network.attachments)
+        for from_node in network.get_nodes():
+            for to_node in network.get_nodes():
+                qos, other_qos = network.get_qos_between_nodes(from_node, to_node), \
+                                 other.get_qos_between_nodes(from_node, to_node)
+                if qos is None: continue
+                self.assertEqual(other_qos.get_formatted_bidirectional_qos(), qos.get_formatted_bidirectional_qos())
+
+    def test_add_RU(self):
+        network = self.get_network(self.RUs)
+        network.get_UE_index()
+        reattached = network.add_RU(35.005, 33.0005)
+        self.assertEqual(sorted(reattached), ['ue_1', 'ue_2', 'ue_4', 'ue_5'])
+        self.assert_same_slices(self.get_network(self.RUs + [dict(lat=35.005, lon=33.0005)]), network)
+        self.assertEqual(network.add_RU(35.02, 33.0), [])
+        with self.assertRaises(SliceConceptualGraph.NetworkSliceException):
+            network.add_RU(35.005, 33.0005)
+
+    def test_remove_RU(self):
+        network = self.get_network(self.RUs + [dict(lat=35.005, lon=33.0005)])
+        reattached = network.remove_RU('35.005-33.0005')
+        self.assertEqual(sorted(reattached), ['ue_1', 'ue_2', 'ue_4', 'ue_5'])
+        self.assert_same_slices(self.get_network(self.RUs), network)
+        # the RU recovers
+        network.add_RU(35.005, 33.0005)
+        self.assert_same_slices(self.get_network(self.RUs + [dict(lat=35.005, lon=33.0005)]), network)
+
+    def test_invalid_removals(self):
+        network = self.get_network(self.RUs)
+        with self.assertRaises(SliceConceptualGraph.NetworkSliceException):
+            network.remove_RU('35.0-33.0')  # it hosts the EDGE node
+        with self.assertRaises(SliceConceptualGraph.NetworkSliceException):
+            network.remove_RU('unknown')
+        network.remove_RU('35.01-33.0')
+        self.assertEqual(network.attachments['ue_3'][1], '35.0-33.0')
+
+    def test_UE_index(self):
+        network = self.get_network(self.RUs)
+        names, index = network.get_UE_index()
+        self.assertEqual(names, [name for name, _, _ in self.nodes])
+        self.assertIs(network.get_UE_index()[1], index)
+        network.set_node_location('ue_0', 35.0002, 33.0)
+        self.assertIsNot(network.get_UE_index()[1], index)
+
+    def test_links_of_reattached_nodes(self):
+        slicer_sdk = SlicerSDK("http://controller:5000")
+        slicer_sdk.slices["network"] = self.get_network(self.RUs)
+        updates = []
+        slicer_sdk.update_links = lambda slice, links: updates.append(links)
+        slicer_sdk.action("ADD_RU", slice="network", lat=35.005, lon=33.0005)
+        links = updates[-1]
+        nodes = len(slicer_sdk.slices["network"].get_nodes())
+        # the links from and to the 4 re-attached UEs
+        self.assertEqual(len(links), 2 * 4 * (nodes - 1) - 4 * 3)
+        self.assertEqual(len({(i['from_node'], i['to_node']) for i in links}), len(links))
+        slicer_sdk.action("REMOVE_RU", slice="network", RU='35.005-33.0005')
+        self.assertEqual(len(updates[-1]), len(links))
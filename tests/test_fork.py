@@ -0,0 +1,79 @@
+import unittest
+
+from networks.slicing import SliceConceptualGraph
+
+
+class TestSliceFork(unittest.TestCase):
+
+    def setUp(self):
+        self.backhaul_qos = {'latency': {'delay': '3.0ms', 'deviation': '1.0ms'}, 'bandwidth': '100.0mbps',
+                             'error_rate': '1.0%'}
+        self.midhaul_qos = {'latency': {'delay': '2.0ms', 'deviation': '0.5ms'}, 'bandwidth': '50.0mbps',
+                            'error_rate': '0.5%'}
+        self.parameters = dict(
+            best_qos={'latency': {'delay': '5.0ms', 'deviation': '2.0ms'}, 'bandwidth': '10.0mbps',
+                      'error_rate': '1.0%'},
+            worst_qos={'latency': {'delay': '100.0ms', 'deviation': '20.0ms'}, 'bandwidth': '5.0mbps',
+                       'error_rate': '2.0%'}, radius="1km")
+        self.RUs = [dict(lat=35.0, lon=33.0), dict(lat=35.01, lon=33.0)]
+        self.extra_RUs = [dict(lat=35.005, lon=33.0005)]
+        self.nodes = [('ue_0', 35.0001, 33.0), ('ue_1', 35.004, 33.0), ('ue_2', 35.0055, 33.0004),
+                      ('ue_3', 35.0098, 33.0), ('ue_4', 35.0051, 33.0006)]
+
+    def get_network(self, RUs, wireless_connection_type="LinearDegradation", parameters=None, **kwargs):
+        network = SliceConceptualGraph("network", self.backhaul_qos, self.midhaul_qos,
+                                       parameters if parameters is not None else self.parameters, RUs=RUs,
+                                       wireless_connection_type=wireless_connection_type)
+        for name, lat, lon in self.nodes:
+            network.add_node(name, lat, lon)
+        network.add_node('edge', 35.0, 33.0, location_type='EDGE')
+        network.add_node('cloud', location_type='CLOUD')
+        return network
+
+    def assert_same_slices(self, network, other):
+        self.assertEqual(other.get_RUs(), network.get_RUs())
+        self.assertEqual(other.get_nodes(), network.get_nodes())
+        for from_node in network.get_nodes():
+            for to_node in network.get_nodes():
+                qos, other_qos = network.get_qos_between_nodes(from_node, to_node), \
+                                 other.get_qos_between_nodes(from_node, to_node)
+                if qos is None: continue
+                self.assertEqual(other_qos.get_formatted_bidirectional_qos(), qos.get_formatted_bidirectional_qos())
+
+    def test_fork_with_RUs(self):
+        network = self.get_network(self.RUs)
+        fork = network.fork(RUs=self.extra_RUs)
+        self.assert_same_slices(self.get_network(self.RUs + self.extra_RUs), fork)
+        self.assertEqual(len(network.get_RUs()), 2)
+        self.assertEqual(fork.attachments['ue_2'][1], '35.005-33.0005')
+        self.assertEqual(network.attachments['ue_2'][1], '35.01-33.0')
+
+    def test_fork_with_wireless_connection(self):
+        parameters = dict(RU_antennas=16, UE_antennas=4)
+        self.nodes = [(name, 35.0 + (lat - 35.0) / 100, lon) for name, lat, lon in self.nodes]
+        network = self.get_network(self.RUs)
+        fork = network.fork(wireless_connection_type="MIMO", parameters=parameters)
+        self.assert_same_slices(self.get_network(self.RUs, "MIMO", parameters), fork)
+        self.assertEqual(network.wireless_connection_type, "LinearDegradation")
+
+    def test_fork_with_QoS(self):
+        network = self.get_network(self.RUs)
+        backhaul_qos = {'latency': {'delay': '30.0ms'}, 'bandwidth': '10.0mbps'}
+        midhaul_qos = {'latency': {'delay': '20.0ms'}, 'bandwidth': '5.0mbps'}
+        fork = network.fork(backhaul_qos=backhaul_qos, midhaul_qos=midhaul_qos)
+        self.assertGreater(fork.get_qos_between_nodes('cloud', 'ue_0').get_delay(),
+                           network.get_qos_between_nodes('cloud', 'ue_0').get_delay())
+        self.assertEqual(fork.get_qos_between_nodes('ue_0', 'ue_3').get_bandwidth(), 5.0)
+        self.backhaul_qos, self.midhaul_qos = backhaul_qos, midhaul_qos
+        self.assert_same_slices(self.get_network(self.RUs), fork)
+
+    def test_independence(self):
+        network = self.get_network(self.RUs)
+        fork = network.fork()
+        self.assert_same_slices(network, fork)
+        fork.set_node_location('ue_0', 35.0099, 33.0)
+        self.assertEqual(network.get_node_location('ue_0').get_lat(), 35.0001)
+        self.assertEqual(network.attachments['ue_0'][1], '35.0-33.0')
+        self.assertEqual(fork.attachments['ue_0'][1], '35.01-33.0')
+        self.assertNotIn('ue_0', fork.graph.neighbors('35.0-33.0'))
+        self.assertIn('ue_0', network.graph.neighbors('35.0-33.0'))
@@ -0,0 +1,49 @@
+import importlib.util
+import unittest
+
+import numpy as np
+
+from utils.geometry import geographic_to_cartesian, to_cartesian, distances, distance_sums, neighbour_counts
+from utils.location import Location
+
+
+class TestGeometry(unittest.TestCase):
+
+    def setUp(self):
+        self.lats = [35.14996886033924, 35.15091624851098, 35.15192942739787, 35.15396009516559]
+        self.lons = [33.410295020090246, 33.408127726284306, 33.405751258916474, 33.401346833487295]
+        self.locations = [Location(lat, lon) for lat, lon in zip(self.lats, self.lons)]
+        self.points = to_cartesian(self.lats, self.lons)
+
+    @unittest.skipUnless(importlib.util.find_spec('ns'), "the ns-3 bindings are not installed")
+    def test_to_cartesian(self):
+        for point, location in zip(self.points, self.locations):
+            vector = location.to_ns3()
+            self.assertTrue(np.allclose(point, [vector.x, vector.y, vector.z]))
+
+    @unittest.skipUnless(importlib.util.find_spec('ns'), "the ns-3 bindings are not installed")
+    def test_geographic_to_cartesian(self):
+        from ns.mobility import ConstantPositionMobilityModel
+        for location in self.locations:
+            vector = location.to_ns3()
+            for value, expected in zip(geographic_to_cartesian(location.lat, location.lon), [vector.x, vector.y, vector.z]):
+                self.assertAlmostEqual(value, expected, places=6)
+        a, b = ConstantPositionMobilityModel(), ConstantPositionMobilityModel()
+        a.SetPosition(self.locations[0].to_ns3())
+        b.SetPosition(self.locations[3].to_ns3())
+        self.assertAlmostEqual(self.locations[0].distance(self.locations[3]), a.GetDistanceFrom(b) / 1000, places=9)
+
+    def test_distances(self):
+        res = distances(self.points, self.points)
+        for i, a in enumerate(self.locations):
+            for j, b in enumerate(self.locations):
+                self.assertAlmostEqual(res[i][j], a.distance(b))
+
+    def test_distance_sums(self):
+        res = distance_sums(self.points, chunk_size=3)
+        for i, a in enumerate(self.locations):
+            self.assertAlmostEqual(res[i], sum([a.distance(b) for b in self.locations]))
+
+    def test_neighbour_counts(self):
+        self.assertEqual(list(neighbour_counts(self.points, 0.25, chunk_size=3)), [1, 2, 1, 0])
+        self.assertEqual(list(neighbour_counts(self.points, 0.0)), [0, 0, 0, 0])
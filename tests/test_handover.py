@@ -0,0 +1,158 @@
+import unittest
+
+from networks.handover import HandoverPolicy
+from networks.slicing import SliceConceptualGraph
+
+
+class TestHandover(unittest.TestCase):
+
+    def setUp(self):
+        self.backhaul_qos = {'latency': {'delay': '3.0ms', 'deviation': '1.0ms'}, 'bandwidth': '100.0mbps',
+                             'error_rate': '1.0%'}
+        self.parameters = dict(
+            best_qos={'latency': {'delay': '5.0ms', 'deviation': '2.0ms'}, 'bandwidth': '10.0mbps',
+                      'error_rate': '1.0%'},
+            worst_qos={'latency': {'delay': '100.0ms', 'deviation': '20.0ms'}, 'bandwidth': '5.0mbps',
+                       'error_rate': '2.0%'}, radius="1km")
+        self.RUs = [dict(lat=35.0, lon=33.0), dict(lat=35.01, lon=33.0)]
+        self.south_RU, self.north_RU = '35.0-33.0', '35.01-33.0'
+        # a bus that drives along the cell boundary (35.005) and then to the northern RU
+        self.route = [35.0049, 35.0051, 35.0049, 35.0052, 35.0048, 35.0051, 35.0065, 35.0066, 35.0067]
+
+    def get_network(self, handover_policy=None):
+        network = SliceConceptualGraph("network", self.backhaul_qos, self.backhaul_qos, self.parameters,
+                                       RUs=self.RUs, handover_policy=handover_policy)
+        network.add_node('bus', 35.0045, 33.0)
+        network.add_node('ue', 35.009, 33.0)
+        network.add_node('cloud', location_type='CLOUD')
+        return network
+
+    def drive(self, network, times=None):
+        res = []
+        for i, lat in enumerate(self.route):
+            network.set_node_location('bus', lat, 33.0, timestamp=i if times is None else times[i])
+            res.append(network.attachments['bus'][1])
+        return res
+
+    def test_without_hysteresis(self):
+        network = self.get_network()
+        RUs = self.drive(network)
+        self.assertEqual(RUs, [self.south_RU, self.north_RU, self.south_RU, self.north_RU, self.south_RU,
+                               self.north_RU, self.north_RU, self.north_RU, self.north_RU])
+        self.assertEqual(network.get_handover_counts(), dict(bus=5, ue=0))
+
+    def test_distance_margin(self):
+        network = self.get_network(dict(distance_margin=0.2))
+        RUs = self.drive(network)
+        # the bus is kept at its RU until the northern RU is 200 m closer
+        self.assertEqual(RUs, [self.south_RU] * 6 + [self.north_RU] * 3)
+        self.assertEqual(network.get_handover_counts(), dict(bus=1, ue=0))
+        location = network.get_node_location('bus')
+        qos = network.graph.edges['bus', self.north_RU]['qos']
+        self.assertEqual(qos.get_bandwidth(), network.get_qos_for_RU(location, self.north_RU).get_bandwidth())
+
+    def test_kept_RU_qos(self):
+        network = self.get_network(dict(distance_margin=0.2))
+        network.set_node_location('bus', 35.0051, 33.0, timestamp=0)
+        location = network.get_node_location('bus')
+        # the QoS is the one of the kept RU, although it is not the closest one
+        qos = network.graph.edges['bus', self.south_RU]['qos']
+        expected = network.get_qos_from(network.get_node_location(self.south_RU).distance(location))
+        self.assertEqual(qos.get_formated_qos(), expected.get_formated_qos())
+        self.assertFalse(network.graph.has_edge('bus', self.north_RU))
+        self.assertEqual(len([i for i in network.graph.neighbors('bus')]), 1)
+
+    def test_time_to_trigger(self):
+        network = self.get_network(dict(time_to_trigger=10))
+        self.drive(network, times=[0, 5, 12, 20, 25, 30, 40, 45, 51])
+        # the northern RU is closer from 30 to 51, so the bus is handed over at 40
+        self.assertEqual(network.get_handover_counts()['bus'], 1)
+        self.assertEqual(network.attachments['bus'][1], self.north_RU)
+        network = self.get_network(dict(time_to_trigger=30))
+        self.drive(network, times=[0, 5, 12, 20, 25, 30, 40, 45, 51])
+        self.assertEqual(network.get_handover_counts()['bus'], 0)
+        self.assertEqual(network.attachments['bus'][1], self.south_RU)
+
+    def test_min_dwell(self):
+        network = self.get_network(dict(min_dwell=2.5))
+        RUs = self.drive(network, times=[0, 1, 2, 3, 4, 5, 6, 7, 8])
+        # the first handover is not limited, while the next ones need 2.5 seconds at the RU
+        self.assertEqual(RUs, [self.south_RU, self.north_RU, self.north_RU, self.north_RU, self.south_RU,
+                               self.south_RU, self.south_RU, self.north_RU, self.north_RU])
+        self.assertEqual(network.get_handover_counts()['bus'], 3)
+
+    def test_changes_of_RUs(self):
+        new_RU = '35.0045-33.001'
+        network = self.get_network(dict(min_dwell=10))
+        network.set_node_location('bus', 35.0045, 33.0, timestamp=0)
+        # the bus is handed over to the new RU without timing the handover in another clock
+        self.assertEqual(network.add_RU(35.0045, 33.001), ['bus'])
+        self.assertNotIn('bus', network.handover_policy.last_handovers)
+        network.set_node_location('bus', 35.009, 33.0, timestamp=1000)
+        self.assertEqual(network.attachments['bus'][1], self.north_RU)
+        # in the clock of the moves, the handover of the removed RU counts in the dwell time
+        network = self.get_network(dict(min_dwell=10))
+        network.add_RU(35.0045, 33.001, timestamp=0)
+        network.set_node_location('bus', 35.0045, 33.0, timestamp=20)
+        self.assertEqual(network.remove_RU(new_RU, timestamp=1000), ['bus'])
+        self.assertEqual(network.attachments['bus'][1], self.south_RU)
+        network.set_node_location('bus', 35.009, 33.0, timestamp=1005)
+        self.assertEqual(network.attachments['bus'][1], self.south_RU)
+        network.set_node_location('bus', 35.009, 33.0, timestamp=1011)
+        self.assertEqual(network.attachments['bus'][1], self.north_RU)
+
+    def test_bandwidth_margin(self):
+        network = self.get_network(dict(bandwidth_margin=1.0))
+        RUs = self.drive(network)
+        # the bandwidth degrades 5 mbps per km, so the northern RU should be 200 m closer
+        self.assertEqual(RUs, [self.south_RU] * 6 + [self.north_RU] * 3)
+
+    def test_out_of_range(self):
+        network = self.get_network(dict(distance_margin=5.0))
+        network.set_node_location('bus', 35.0095, 33.0, timestamp=0)
+        # the southern RU is more than 1 km away, so the bus is handed over despite the margin
+        self.assertEqual(network.attachments['bus'][1], self.north_RU)
+        self.assertEqual(network.get_handover_counts()['bus'], 1)
+
+    def test_replay(self):
+        moves = [(i * 5, 'bus', lat, 33.0) for i, lat in enumerate(self.route)]
+        moves.insert(3, (12, 'ue', 35.003, 33.0))
+        times, labels, lats, lons = zip(*moves)
+        for policy in [None, dict(distance_margin=0.2), dict(time_to_trigger=10, min_dwell=5)]:
+            network = self.get_network(policy)
+            timeline = network.get_qos_timeline(times, labels, lats, lons)
+            self.assertEqual(network.get_handover_counts(), dict(bus=0, ue=0))
+            for time, label, lat, lon in moves:
+                network.set_node_location(label, lat, lon, timestamp=time)
+            self.assertEqual(timeline.get_handover_counts(), network.get_handover_counts())
+            state = timeline.at(times[-1])
+            for node, RU, bandwidth in zip(state['node'], state['RU'], state['bandwidth']):
+                self.assertEqual(network.attachments[timeline.nodes[node]][1], timeline.RUs[RU])
+                self.assertAlmostEqual(network.attachments[timeline.nodes[node]][4], bandwidth, places=4)
+
+    def test_fork_and_snapshot(self):
+        network = self.get_network(dict(distance_margin=0.2, time_to_trigger=1))
+        self.drive(network)
+        fork = network.fork()
+        fork.set_node_location('bus', 35.0, 33.0, timestamp=20)
+        self.assertEqual(fork.get_handover_counts()['bus'], 2)
+        self.assertEqual(network.get_handover_counts()['bus'], 1)
+        restored = SliceConceptualGraph.load_snapshot(self.get_snapshot(network))
+        self.assertEqual(restored.handover_policy.get_params(), network.handover_policy.get_params())
+
+    @staticmethod
+    def get_snapshot(network):
+        import io
+        buffer = io.BytesIO()
+        network.save_snapshot(buffer)
+        buffer.seek(0)
+        return buffer
+
+    def test_invalid_policy(self):
+        self.assertRaises(HandoverPolicy.HandoverPolicyException, HandoverPolicy, distance_margin=-1)
+        self.assertFalse(HandoverPolicy().has_hysteresis())
+        self.assertTrue(HandoverPolicy(bandwidth_margin=0).has_hysteresis())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import multiprocessing
+import threading
+import unittest
+from multiprocessing import Pipe
+from unittest import mock
+
+from flask import Flask
+
+from FogifySDK import FogifySDK
+from SlicerSDK import SlicerSDK
+from benchmarks.city import SyntheticCity
+from benchmarks.controller import LocalSlicerSDK
+from networks.slicing import SliceConceptualGraph
+from utils.instrumentation import Histogram, Instrumentation, instrumentation
+from utils.server import APIService, MetricsAPI
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.was_enabled = instrumentation.enabled
+        self.city = SyntheticCity(num_of_RUs=4, num_of_UEs=5)
+        self.addCleanup(SlicerSDK.set_instrumentation, self.was_enabled, True)
+
+    def test_disabled(self):
+        SlicerSDK.set_instrumentation(False, reset=True)
+        attach = SliceConceptualGraph.__dict__['attach']
+        slicer_sdk = LocalSlicerSDK(self.city.get_model())
+        slicer_sdk.generate_slices()
+        # the original methods are not wrapped, so they have no overhead
+        self.assertIs(SliceConceptualGraph.__dict__['attach'], attach)
+        self.assertEqual(SlicerSDK.get_instrumentation_metrics(), dict(enabled=False, counters={}, histograms={}))
+        SlicerSDK.set_instrumentation(True)
+        self.assertIsNot(SliceConceptualGraph.__dict__['attach'], attach)
+        SlicerSDK.set_instrumentation(False)
+        self.assertIs(SliceConceptualGraph.__dict__['attach'], attach)
+        # the monitoring metrics of the services are still read through FogifySDK's method
+        self.assertIs(SlicerSDK.get_metrics, FogifySDK.get_metrics)
+
+    def test_enabled(self):
+        SlicerSDK.set_instrumentation(True, reset=True)
+        slicer_sdk = LocalSlicerSDK(self.city.get_model())
+        slicer_sdk.generate_slices()
+        UE = self.city.get_UEs(seed=1)[0]
+        with self.assertLogs('slicer.instrumentation', level='INFO') as logs:
+            slicer_sdk.action('MOVE', slice=self.city.slice_name, instance_type='ue-0', lat=UE['lat'], lon=UE['lon'])
+        self.assertIn('sdk_move_seconds 1x', logs.output[0])
+        metrics = SlicerSDK.get_instrumentation_metrics()
+        histograms = metrics['histograms']
+        self.assertEqual(histograms['generate_slices_seconds']['count'], 1)
+        self.assertEqual(histograms['sdk_move_seconds']['count'], 1)
+        self.assertEqual(histograms['move_seconds']['count'], 1)
+        # 7 nodes are attached during the generation and the moving node is attached once to its selected RU
+        self.assertEqual(histograms['attach_seconds']['count'], 8)
+        # the links of the generation are computed by the link table and the move computes the links of its node
+        self.assertEqual(histograms['link_table_seconds']['count'], 1)
+        self.assertGreaterEqual(histograms['path_qos_seconds']['count'], 6)
+        self.assertGreater(histograms['radio_seconds']['count'], 0)
+        self.assertGreater(histograms['RU_sorting_seconds']['count'], 0)
+        self.assertEqual(histograms['update_links_seconds']['count'], 1)
+        self.assertEqual(histograms['link_payload_bytes']['count'], 1)
+        self.assertGreater(histograms['link_payload_bytes']['sum'], 0)
+        # the local stand-in of the controller does not send any request
+        self.assertNotIn('controller_round_trip_seconds', histograms)
+        self.assertGreater(metrics['counters']['links'], 0)
+        self.assertEqual(histograms['attach_seconds']['buckets']['+Inf'], 8)
+
+        text = SlicerSDK.get_instrumentation_metrics('prometheus')
+        self.assertIn('# TYPE slicer_attach_seconds histogram', text)
+        self.assertIn('slicer_attach_seconds_bucket{le="+Inf"} 8', text)
+        self.assertIn('slicer_attach_seconds_count 8', text)
+        self.assertIn('# TYPE slicer_links_total counter', text)
+
+        # the service's process resets its own copy of the metrics, so it reports the metrics of this process
+        connection, MetricsAPI.connection = Pipe()
+        MetricsAPI.lock = threading.Lock()
+        stopped = threading.Event()
+        thread = threading.Thread(target=APIService.serve_metrics, args=(connection, stopped), daemon=True)
+        thread.start()
+        context = multiprocessing.get_context('fork')
+        responses = context.Queue()
+
+        def get_metrics():
+            instrumentation.reset()
+            app = Flask(__name__)
+            app.add_url_rule('/metrics', view_func=MetricsAPI.as_view('metrics_api'), methods=['GET'])
+            response = app.test_client().get('/metrics')
+            responses.put((response.status_code, response.get_data(as_text=True)))
+
+        process = context.Process(target=get_metrics)
+        process.start()
+        status_code, text = responses.get(timeout=10)
+        process.join()
+        stopped.set()
+        thread.join()
+        self.assertEqual(status_code, 200)
+        self.assertIn('slicer_move_seconds_count 1', text)
+
+    def test_controller_round_trip(self):
+        action = FogifySDK.__dict__['action']
+        SlicerSDK.set_instrumentation(True, reset=True)
+        # only the methods of SlicerSDK are instrumented, so other users of FogifySDK are not affected
+        self.assertIs(FogifySDK.__dict__['action'], action)
+        slicer_sdk = LocalSlicerSDK(self.city.get_model())
+        response = mock.Mock()
+        response.json.return_value = {"message": "OK"}
+        with mock.patch('requests.request', return_value=response) as request:
+            SlicerSDK.action(slicer_sdk, 'COMMAND', instance_type='ue-0', command='ls')
+        self.assertEqual(request.call_count, 1)
+        self.assertEqual(SlicerSDK.get_instrumentation_metrics()['histograms']['controller_round_trip_seconds']['count'],
+                         1)
+
+    def test_log_tick(self):
+        metrics = Instrumentation()
+        metrics.observe('move_seconds', 0.5)
+        self.assertEqual(metrics.log_tick('first'), dict(move_seconds=(1, 0.5)))
+        metrics.observe('move_seconds', 0.25)
+        metrics.observe('move_seconds', 0.25)
+        self.assertEqual(metrics.log_tick('second'), dict(move_seconds=(2, 0.5)))
+        self.assertEqual(metrics.log_tick('third'), {})
+
+    def test_histogram(self):
+        histogram = Histogram([1, 10, 100])
+        for value in [0.5, 1, 5, 50, 500]:
+            histogram.observe(value)
+        self.assertEqual(histogram.get_cumulative_counts(), [2, 3, 4, 5])
+        self.assertEqual(histogram.to_dict()['buckets'], {'1': 2, '10': 3, '100': 4, '+Inf': 5})
+        self.assertEqual(histogram.to_dict()['sum'], 556.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
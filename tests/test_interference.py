@@ -0,0 +1,111 @@
+import unittest
+
+import numpy as np
+
+from networks.connections.interference import SINR
+from networks.connections.mimo import SISO
+from networks.slicing import SliceConceptualGraph
+from utils.location import Location
+
+
+class TestSINR(unittest.TestCase):
+
+    def setUp(self):
+        self.backhaul_qos = {'latency': {'delay': '3.0ms', 'deviation': '1.0ms'}, 'bandwidth': '100.0mbps',
+                             'error_rate': '1.0%'}
+        # a dense grid of small cells (about 110m apart) and a distant RU
+        self.RUs = [dict(lat=35.0 + 0.001 * i, lon=33.0 + 0.0012 * j) for i in range(3) for j in range(3)] + \
+                   [dict(lat=35.1, lon=33.1)]
+        self.network = self.get_network(dict(interference_radius=0.3))
+        for i, (lat, lon) in enumerate([(35.0002, 33.0001), (35.0011, 33.0013), (35.0999, 33.1)]):
+            self.network.add_node(f'ue_{i}', lat, lon)
+
+    def get_network(self, parameters, RUs=None):
+        return SliceConceptualGraph("network", self.backhaul_qos, self.backhaul_qos, parameters,
+                                    wireless_connection_type="SINR", RUs=self.RUs if RUs is None else RUs)
+
+    def get_bandwidth(self, network, name):
+        return network.graph.edges[name, network.attachments[name][1]]['qos'].get_bandwidth()
+
+    def test_model(self):
+        sinr, siso = SINR(), SISO()
+        self.assertEqual(sinr.get_radius(), siso.get_radius())
+        # without interfering RUs the SINR is the SNR
+        self.assertEqual(sinr.get_qos_from(0.05), siso.get_qos_from(0.05))
+        self.assertEqual(sinr.get_qos_from(0.05, interfering_distances=np.zeros(0)), siso.get_qos_from(0.05))
+        interfered = sinr.get_qos_from(0.05, interfering_distances=np.array([0.08, 0.1]))
+        self.assertLess(interfered.get_bandwidth(), siso.get_qos_from(0.05).get_bandwidth())
+        self.assertGreater(interfered.get_error_rate(), siso.get_qos_from(0.05).get_error_rate())
+        quiet = SINR(activity_factor=0.1).get_qos_from(0.05, interfering_distances=np.array([0.08, 0.1]))
+        self.assertGreater(quiet.get_bandwidth(), interfered.get_bandwidth())
+
+    def test_slice(self):
+        network = self.network
+        RUs = network.get_RUs()
+        for name in ['ue_0', 'ue_1', 'ue_2']:
+            location, RU = network.get_node_location(name), network.attachments[name][1]
+            interfering = [i.distance(location) for key, i in RUs.items()
+                           if key != RU and i.distance(location) <= 0.3]
+            self.assertTrue(np.allclose(np.sort(network.get_interfering_distances(location, RU)), sorted(interfering)))
+            expected = network.wireless_connection.get_qos_from(RUs[RU].distance(location),
+                                                                interfering_distances=np.array(interfering))
+            self.assertAlmostEqual(self.get_bandwidth(network, name), expected.get_bandwidth(), places=3)
+        # the UE of the distant RU has no interference
+        self.assertEqual(len(network.get_interfering_distances(network.get_node_location('ue_2'), '35.1-33.1')), 0)
+        self.assertLess(self.get_bandwidth(network, 'ue_1'), self.get_bandwidth(network, 'ue_2'))
+        # a new RU interferes with the UEs around it
+        bandwidth = self.get_bandwidth(network, 'ue_2')
+        self.assertEqual(network.add_RU(35.1005, 33.1), ['ue_2'])
+        location = network.get_node_location('ue_2')
+        self.assertEqual(len(network.get_interfering_distances(location, '35.1-33.1')), 1)
+        self.assertLess(self.get_bandwidth(network, 'ue_2'), bandwidth)
+
+    def test_changes_of_RUs(self):
+        network = self.network
+        UEs = {name: network.get_node_location(name) for name in ['ue_0', 'ue_1', 'ue_2']}
+
+        def assert_same_with_new_slice(RUs):
+            fresh = self.get_network(dict(interference_radius=0.3), RUs)
+            for name, location in UEs.items():
+                fresh.add_node(name, location.get_lat(), location.get_lon())
+                self.assertEqual(network.attachments[name][1], fresh.attachments[name][1])
+                self.assertAlmostEqual(self.get_bandwidth(network, name), self.get_bandwidth(fresh, name), places=3)
+
+        bandwidth = self.get_bandwidth(network, 'ue_0')
+        # the new RU interferes with ue_0 and ue_1, which stay at their RUs
+        self.assertEqual(network.add_RU(35.0006, 33.0006), ['ue_0', 'ue_1'])
+        self.assertLess(self.get_bandwidth(network, 'ue_0'), bandwidth)
+        assert_same_with_new_slice(self.RUs + [dict(lat=35.0006, lon=33.0006)])
+        self.assertEqual(network.remove_RU('35.0006-33.0006'), ['ue_0', 'ue_1'])
+        self.assertAlmostEqual(self.get_bandwidth(network, 'ue_0'), bandwidth, places=3)
+        self.assertIn('ue_0', network.remove_RU('35.001-33.0012'))
+        assert_same_with_new_slice([i for i in self.RUs if (i['lat'], i['lon']) != (35.001, 33.0012)])
+
+    def test_interference_radius(self):
+        network = self.get_network(dict(interference_radius=0.05))
+        network.add_node('ue_0', 35.0002, 33.0001)
+        self.assertGreater(self.get_bandwidth(network, 'ue_0'), self.get_bandwidth(self.network, 'ue_0'))
+
+    def test_batch_evaluations(self):
+        network = self.network
+        fork = network.fork(parameters=dict(interference_radius=0.3, activity_factor=1))
+        for name in ['ue_0', 'ue_1', 'ue_2']:
+            self.assertAlmostEqual(self.get_bandwidth(fork, name), self.get_bandwidth(network, name), places=3)
+        moves = [(1, 'ue_0', 35.0004, 33.0002), (2, 'ue_1', 35.0019, 33.0022)]
+        timeline = network.get_qos_timeline(*zip(*moves))
+        for _, label, lat, lon in moves:
+            network.set_node_location(label, lat, lon)
+        for i, (_, label, _, _) in enumerate(moves, start=3):
+            self.assertAlmostEqual(timeline.bandwidth[i], self.get_bandwidth(network, label), places=3)
+        raster = network.get_qos_raster(((34.9995, 32.9995), (35.0025, 33.003)), resolution=0.01,
+                                        distance_resolution=None)
+        lats, lons = raster.get_coordinates()
+        rng = np.random.default_rng(1)
+        for row, column in zip(rng.integers(0, raster.shape[0], 50), rng.integers(0, raster.shape[1], 50)):
+            _, qos = network.get_qos_for_selected_RU(Location(float(lats[row]), float(lons[column])))
+            self.assertAlmostEqual(raster['bandwidth'][row, column], qos.get_bandwidth(), places=2)
+            self.assertAlmostEqual(raster['error_rate'][row, column], qos.get_error_rate(), places=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import copy
+import json
+import unittest
+
+from FogifySDK.FogifySDK import ExceptionFogifySDK
+from benchmarks.city import SyntheticCity, WIRELESS_MODELS
+from benchmarks.controller import LocalSlicerSDK
+from networks.QoS import QoS
+from networks.links import LinkTable
+from networks.slicing import SliceConceptualGraph
+from utils.links import LinkSerializer
+
+
+class TestLinkSerializer(unittest.TestCase):
+
+    def setUp(self):
+        self.serializer = LinkSerializer()
+        self.qos = QoS({'latency': {'delay': '5.0ms', 'deviation': '2.0ms'}, 'bandwidth': '10.0mbps',
+                        'error_rate': '1.0%'})
+
+    def test_properties(self):
+        properties = self.serializer.get_properties(self.qos)
+        self.assertEqual(properties, self.qos.get_formatted_bidirectional_qos())
+        self.assertEqual(properties, {'latency': {'delay': '2.5ms', 'deviation': '1.0ms'}, 'bandwidth': '10.0mbps',
+                                      'error_rate': '0.5%'})
+        # the links of the same QoS share the same properties
+        self.assertIs(self.serializer.get_properties(QoS(self.qos.get_params())), properties)
+        self.assertEqual(self.serializer.get_properties(QoS(dict(bandwidth=5))), {'bandwidth': '5.0mbps'})
+        serializer = LinkSerializer(max_size=1)
+        serializer.get_properties(self.qos)
+        serializer.get_properties(QoS(dict(bandwidth=5)))
+        self.assertEqual(len(serializer.properties), 1)
+
+    def test_encode(self):
+        links = [self.serializer.get_link(f'ue_{i}', 'édge "1"', self.qos) for i in range(3)] + \
+                [self.serializer.get_link('cloud', 'ue_0', QoS(dict(bandwidth=5)))]
+        payload = dict(params=dict(network='network', links=links, instance_type='ue_0', instances=1000))
+        for obj in [links, payload, [], {}, dict(value=[1, 2.5, None, True, (1, 'a')])]:
+            encoded = self.serializer.encode(obj)
+            self.assertEqual(encoded, json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8'))
+            self.assertEqual(json.loads(encoded), json.loads(json.dumps(obj)))
+        self.assertLess(len(self.serializer.encode(payload)), len(json.dumps(payload)))
+
+    def test_sdk(self):
+        city = SyntheticCity(num_of_RUs=4, num_of_UEs=5)
+        slicer_sdk = LocalSlicerSDK(city.get_model())
+        slicer_sdk.generate_slices()
+        payloads = []
+        slicer_sdk.send_payload = lambda path, payload: payloads.append(json.loads(payload)) or {"message": "OK"}
+        UE = city.get_UEs(seed=1)[0]
+        responses = slicer_sdk.action('MOVE', slice=city.slice_name, instance_type='ue-0', lat=UE['lat'],
+                                      lon=UE['lon'])
+        self.assertEqual(len(payloads), len(responses))
+        network = slicer_sdk.slices[city.slice_name]
+        for payload in payloads:
+            params = payload['params']
+            self.assertEqual(params['network'], city.slice_name)
+            for link in params['links']:
+                self.assertEqual(link['from_node'], params['instance_type'])
+                qos = network.get_qos_between_nodes(link['from_node'], link['to_node'])
+                self.assertEqual(link['parameters']['properties'], qos.get_formatted_bidirectional_qos())
+        # a bidirectional link is sent to both of its nodes
+        slicer_sdk.update_links(city.slice_name, [dict(from_node='a', to_node='b', bidirectional=True,
+                                                       parameters=dict(properties={'bandwidth': '1.0mbps'}))])
+        self.assertEqual([i['params']['instance_type'] for i in payloads[-2:]], ['a', 'b'])
+
+
+class TestLinkTable(unittest.TestCase):
+
+    def setUp(self):
+        self.city = SyntheticCity(num_of_RUs=4, num_of_UEs=20)
+        self.slicer_sdk = LocalSlicerSDK(self.city.get_model())
+        self.slicer_sdk.link_processes = 1
+        self.slicer_sdk.generate_slices()
+        self.network = self.slicer_sdk.slices[self.city.slice_name]
+
+    def test_sequential(self):
+        table = self.network.get_link_table(processes=1)
+        nodes = list(self.network.get_nodes())
+        self.assertEqual(table.nodes, nodes)
+        self.assertEqual(len(table), len(nodes) * (len(nodes) - 1))
+        self.assertLess(len(table.values), len(table))
+        expected = [(from_node, to_node, self.network.get_qos_between_nodes(from_node, to_node))
+                    for from_node in nodes for to_node in nodes if from_node != to_node]
+        self.assertEqual([(from_node, to_node, values) for from_node, to_node, values in table],
+                         [(from_node, to_node, qos.get_bidirectional_values()) for from_node, to_node, qos in expected])
+        # the SDK adds the same links with add_link
+        links = [i for i in self.slicer_sdk.networks if i['name'] == self.city.slice_name][0]['links']
+        self.assertEqual(links, [dict(from_node=from_node, to_node=to_node, bidirectional=False,
+                                      properties=qos.get_formatted_bidirectional_qos())
+                                 for from_node, to_node, qos in expected])
+        with self.assertRaises(LinkTable.LinkTableException):
+            LinkTable(nodes, [], from_node=[0], to_node=[1])
+        # the links are added only to an existing network of the model (the same with add_link)
+        slicer_sdk = LocalSlicerSDK(self.city.get_model())
+        slicer_sdk.add_network = lambda *args, **kwargs: None
+        with self.assertRaises(ExceptionFogifySDK):
+            slicer_sdk.generate_slices()
+
+    def test_path_qos(self):
+        backhaul_qos = {'latency': {'delay': '3.0ms', 'deviation': '1.0ms'}, 'bandwidth': '100.0mbps',
+                        'error_rate': '1.0%'}
+        for wireless_connection_type, parameters in WIRELESS_MODELS.items():
+            network = SliceConceptualGraph("network", backhaul_qos, backhaul_qos, copy.deepcopy(parameters),
+                                           wireless_connection_type=wireless_connection_type,
+                                           RUs=[dict(lat=35.0, lon=33.0), dict(lat=35.01, lon=33.0)])
+            network.add_node('edge_0', 35.0, 33.0, location_type='EDGE')
+            network.add_node('edge_1', 35.01, 33.0, location_type='EDGE')
+            network.add_node('cloud_0', location_type='CLOUD')
+            network.add_node('cloud_1', location_type='CLOUD')
+            for i, lat in enumerate([35.0005, 35.004, 35.0095, 35.3, 36.0]):  # the last ones are out of range
+                network.add_node(f'ue_{i}', lat, 33.0)
+            nodes = list(network.get_nodes())
+            table = network.get_link_table(processes=1)
+            self.assertEqual([values for _, _, values in table],
+                             [network.get_qos_between_nodes(from_node, to_node).get_bidirectional_values()
+                              for from_node in nodes for to_node in nodes if from_node != to_node],
+                             wireless_connection_type)
+
+    def test_parallel(self):
+        minimum_parallel_nodes = LinkTable.minimum_parallel_nodes
+        LinkTable.minimum_parallel_nodes = 0
+        self.addCleanup(setattr, LinkTable, 'minimum_parallel_nodes', minimum_parallel_nodes)
+        sequential = self.network.get_link_table(processes=1)
+        for block_size in [None, 1, 5, 100]:
+            table = self.network.get_link_table(processes=3, block_size=block_size)
+            self.assertEqual(table.values, sequential.values)
+            for name, column in sequential.get_columns().items():
+                self.assertEqual(getattr(table, name).tolist(), column.tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
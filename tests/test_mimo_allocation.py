@@ -0,0 +1,150 @@
+import copy
+import io
+import unittest
+
+import numpy as np
+
+from networks.connections.allocation import AntennaAllocator
+from networks.connections.mimo import MIMO
+from networks.slicing import SliceConceptualGraph
+from networks.snapshot import SliceSnapshot
+from utils.location import Location
+
+
+class TestAntennaAllocator(unittest.TestCase):
+
+    def test_allocation(self):
+        allocator = AntennaAllocator(RU_antennas=6, UE_antennas=4)
+        for UE in ['a', 'b', 'c']:
+            self.assertEqual(allocator.allocate(UE, 'RU'), [])
+        self.assertEqual([allocator.get_streams(UE, 'RU') for UE in ['a', 'b', 'c']], [4, 2, 0])
+        self.assertEqual(allocator.get_streams(None, 'RU'), 0)
+        self.assertEqual(allocator.get_streams('a', 'other'), 4)
+        # the released streams are given to the waiting UEs in their allocation order
+        self.assertEqual(allocator.allocate('a', 'other'), ['b', 'c'])
+        self.assertEqual([allocator.get_streams(UE, 'RU') for UE in ['b', 'c']], [4, 2])
+        self.assertEqual(allocator.get_free('RU'), 0)
+        self.assertEqual(allocator.release('c'), [])
+        self.assertEqual(allocator.get_free('RU'), 2)
+        self.assertEqual(allocator.remove_RU('other'), ['a'])
+        self.assertEqual(allocator.get_free('other'), 6)
+
+    def test_maximum_free(self):
+        allocator = AntennaAllocator(RU_antennas=6, UE_antennas=4)
+        for UE, RU in [('a', 'RU'), ('b', 'RU'), ('c', 'other')]:
+            allocator.allocate(UE, RU)
+        self.assertEqual(allocator.get_maximum_free(3), 6)  # an RU has no allocation
+        self.assertEqual(allocator.get_maximum_free(2), 2)
+        allocator.release('c')
+        self.assertEqual(allocator.get_maximum_free(2), 6)
+        allocator.allocate('c', 'RU')
+        allocator.allocate('d', 'other')
+        self.assertEqual(allocator.get_maximum_free(2), 2)
+        allocator.remove_RU('other')
+        self.assertEqual(allocator.get_maximum_free(1), 0)
+        self.assertEqual(allocator.copy().get_maximum_free(1), 0)
+
+    def test_state(self):
+        allocator = AntennaAllocator(RU_antennas=4, UE_antennas=4)
+        for UE in ['a', 'b', 'c']:
+            allocator.allocate(UE, 'RU')
+        res = allocator.copy()
+        self.assertEqual(res.get_state(), [['a', 'RU', 4], ['b', 'RU', 0], ['c', 'RU', 0]])
+        self.assertEqual(res.release('a'), ['b'])
+        self.assertEqual(allocator.get_streams('b', 'RU'), 0)  # the copies are independent
+
+
+class TestMIMOAllocation(unittest.TestCase):
+
+    def setUp(self):
+        self.backhaul_qos = {'latency': {'delay': '3.0ms', 'deviation': '1.0ms'}, 'bandwidth': '100.0mbps',
+                             'error_rate': '1.0%'}
+        self.network = SliceConceptualGraph("network", self.backhaul_qos, self.backhaul_qos,
+                                            dict(RU_antennas=8, UE_antennas=4), wireless_connection_type="MIMO",
+                                            RUs=[dict(lat=35.0, lon=33.0), dict(lat=35.001, lon=33.0)])
+        for i, lat in enumerate([35.0001, 35.00005, 35.00015]):
+            self.network.add_node(f'ue_{i}', lat, 33.0)
+
+    def get_bandwidth(self, network, name):
+        RU = network.attachments[name][1]
+        return network.graph.edges[name, RU]['qos'].get_bandwidth()
+
+    def test_get_qos_from(self):
+        mimo = MIMO(RU_antennas=8, UE_antennas=4)
+        RUs = [['a', Location(35.0, 33.0), 2], ['b', Location(35.001, 33.0), 4]]
+        expected = copy.deepcopy(RUs)
+        qos = mimo.get_qos_from(0.01, RUs, Location(35.0001, 33.0))
+        self.assertEqual(RUs, expected)  # the RUs of the caller are not altered
+        self.assertAlmostEqual(qos.get_bandwidth(), 2 * mimo.get_qos_from(0.01, [['a', None, 1]]).get_bandwidth())
+        self.assertEqual(mimo.get_qos_from(0.01, [['a', None, 0]]).get_bandwidth(), 0)
+
+    def test_select_RU(self):
+        # the closest RU is full, so the UE is connected to the second RU within the radius
+        network = SliceConceptualGraph("network", self.backhaul_qos, self.backhaul_qos,
+                                       dict(RU_antennas=8, UE_antennas=4), wireless_connection_type="MIMO",
+                                       RUs=[dict(lat=35.0, lon=33.0), dict(lat=35.0003, lon=33.0)])
+        for i, lat in enumerate([35.0001, 35.0001, 35.00005]):
+            network.add_node(f'ue_{i}', lat, 33.0)
+        self.assertEqual([network.attachments[f'ue_{i}'][1] for i in range(3)],
+                         ['35.0-33.0', '35.0-33.0', '35.0003-33.0'])
+        self.assertEqual(network.allocator.get_streams('ue_2', '35.0003-33.0'), 4)
+        self.assertGreater(self.get_bandwidth(network, 'ue_2'), 0)
+        location = network.get_node_location('ue_2')
+        self.assertEqual(self.get_bandwidth(network, 'ue_2'),
+                         network.get_qos_for_RU(location, '35.0003-33.0', 'ue_2').get_bandwidth())
+        # the raster selects the same RU and all UEs are connected to the same RUs when they are attached again
+        raster = network.get_qos_raster(((35.00004, 32.99999), (35.00006, 33.00001)), resolution=0.001,
+                                        distance_resolution=None)
+        RUs = list(network.get_RUs())
+        self.assertEqual({RUs[i] if i >= 0 else None for i in raster['RU'].ravel().tolist()}, {'35.0003-33.0'})
+        self.assertTrue(np.all(raster['bandwidth'] > 0))
+        network.reattach_nodes()
+        self.assertEqual([network.attachments[f'ue_{i}'][1] for i in range(3)],
+                         ['35.0-33.0', '35.0-33.0', '35.0003-33.0'])
+
+    def test_rebalance(self):
+        network = self.network
+        self.assertEqual([network.allocator.get_streams(f'ue_{i}', '35.0-33.0') for i in range(3)], [4, 4, 0])
+        self.assertEqual(self.get_bandwidth(network, 'ue_2'), 0)  # there is no free antenna
+        # a move within the RU keeps the antennas of the UE
+        self.assertEqual(network.set_node_location('ue_0', 35.00011, 33.0), [])
+        self.assertEqual(network.allocator.get_streams('ue_0', '35.0-33.0'), 4)
+        # the antennas of a UE that leaves the RU are given to the waiting UE
+        self.assertEqual(network.set_node_location('ue_0', 35.001, 33.0), ['ue_2'])
+        self.assertEqual(network.allocator.get_streams('ue_2', '35.0-33.0'), 4)
+        location = network.get_node_location('ue_2')
+        self.assertEqual(self.get_bandwidth(network, 'ue_2'),
+                         network.get_qos_for_RU(location, '35.0-33.0', 'ue_2').get_bandwidth())
+        self.assertGreater(self.get_bandwidth(network, 'ue_2'), 0)
+        # a UE out of range does not hold antennas
+        network.set_node_location('ue_1', 35.5, 33.0)
+        self.assertEqual(network.allocator.get_free('35.0-33.0'), 4)
+
+    def test_timeline(self):
+        moves = [(1, 'ue_0', 35.00011, 33.0), (2, 'ue_0', 35.001, 33.0), (3, 'ue_1', 35.0009, 33.0)]
+        timeline = self.network.get_qos_timeline(*zip(*moves))
+        self.assertEqual(len(timeline), 3 + len(moves) + 1)  # ue_2 gets the antennas of ue_0 at time 2
+        rows = [(timeline.time[i], timeline.nodes[timeline.node[i]]) for i in range(3, len(timeline))]
+        self.assertEqual(rows, [(1, 'ue_0'), (2, 'ue_0'), (2, 'ue_2'), (3, 'ue_1')])
+        for _, label, lat, lon in moves:
+            self.network.set_node_location(label, lat, lon)
+        # the last row of every UE is the same with its current connection
+        last_rows = {label: i for i, (_, label) in enumerate(rows, start=3)}
+        for label, i in last_rows.items():
+            self.assertAlmostEqual(timeline.bandwidth[i], self.get_bandwidth(self.network, label), places=3)
+
+    def test_snapshot_and_fork(self):
+        fork = self.network.fork()
+        self.network.set_node_location('ue_0', 35.001, 33.0)
+        self.assertEqual(fork.allocator.get_streams('ue_2', '35.0-33.0'), 0)
+        buffer = io.BytesIO()
+        self.network.save_snapshot(buffer)
+        buffer.seek(0)
+        restored = SliceSnapshot.load(buffer).restore()
+        self.assertEqual(restored.allocator.get_state(), self.network.allocator.get_state())
+        self.assertEqual(restored.set_node_location('ue_1', 35.001, 33.0),
+                         self.network.set_node_location('ue_1', 35.001, 33.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -22,4 +22,4 @@ class TestBaseSISO(unittest.TestCase):
         self.assertEqual(self.siso_default.get_error_rate(0), 0.0)
         self.assertEqual(self.siso_default.get_error_rate(50), 0.0)
         self.assertEqual(self.siso_default.get_error_rate(70), 8.363754133711154e-08)
-        self.assertEqual(self.siso_default.get_error_rate(92), 0.0016055016320071225)
+        self.assertAlmostEqual(self.siso_default.get_error_rate(92), 0.0016055016320071225, delta=1e-12)
@@ -0,0 +1,59 @@
+import unittest
+
+from networks.slicing import SliceConceptualGraph
+
+
+class TestPathQoSCache(unittest.TestCase):
+
+    def setUp(self):
+        self.backhaul_qos = {'latency': {'delay': '3.0ms', 'deviation': '1.0ms'}, 'bandwidth': '100.0mbps',
+                             'error_rate': '1.0%'}
+        self.midhaul_qos = {'latency': {'delay': '2.0ms', 'deviation': '0.5ms'}, 'bandwidth': '50.0mbps',
+                            'error_rate': '0.5%'}
+        self.parameters = dict(radius=1000, qos={'latency': {'delay': 5, 'deviation': 1}, 'bandwidth': 20,
+                                                 'error_rate': 1})
+        RUs = [dict(lat=35.0, lon=33.0), dict(lat=35.01, lon=33.0)]
+        self.network = SliceConceptualGraph("network", self.backhaul_qos, self.midhaul_qos, self.parameters,
+                                            RUs=RUs, wireless_connection_type="FlatWirelessNetwork")
+        for i in range(4):
+            self.network.add_node(f'ue_{i}', 35.0 + 0.0001 * i, 33.0)
+        self.network.add_node('ue_4', 35.01, 33.0001)
+        self.network.add_node('edge', 35.01, 33.0, location_type='EDGE')
+        self.network.add_node('cloud', location_type='CLOUD')
+
+    def assert_same_with_computed(self):
+        for from_node in self.network.get_nodes():
+            for to_node in self.network.get_nodes():
+                self.assertEqual(self.network.get_qos_between_nodes(from_node, to_node),
+                                 self.network.compute_qos_between_nodes(from_node, to_node))
+
+    def test_cached_qos(self):
+        self.assert_same_with_computed()
+        statistics = self.network.get_path_cache_statistics()
+        # UEs of the same RU have the same attachment, so they share their paths
+        self.assertLess(statistics['misses'], 7 * 6)
+        self.assertEqual(statistics['hits'] + statistics['misses'], 7 * 6)
+        self.assertEqual(statistics['size'], statistics['misses'])
+        self.network.get_qos_between_nodes('ue_0', 'cloud')
+        self.assertEqual(self.network.get_path_cache_statistics()['hits'], statistics['hits'] + 1)
+
+    def test_set_node_location(self):
+        self.assert_same_with_computed()
+        self.network.set_node_location('ue_0', 35.0099, 33.0)
+        self.assertEqual(self.network.attachments['ue_0'][1], '35.01-33.0')
+        self.assert_same_with_computed()
+
+    def test_invalidation(self):
+        self.assert_same_with_computed()
+        self.network.set_backhaul({'latency': {'delay': '30.0ms'}, 'bandwidth': '10.0mbps'})
+        self.assertEqual(self.network.get_path_cache_statistics()['size'], 0)
+        self.assertEqual(self.network.get_path_cache_statistics()['invalidations'], 1)
+        self.assertEqual(self.network.get_qos_between_nodes('cloud', 'ue_0').get_bandwidth(), 10.0)
+        self.assert_same_with_computed()
+
+    def test_eviction(self):
+        self.network.path_cache_size = 2
+        self.assert_same_with_computed()
+        statistics = self.network.get_path_cache_statistics()
+        self.assertEqual(statistics['size'], 2)
+        self.assertEqual(statistics['evictions'], statistics['misses'] - 2)
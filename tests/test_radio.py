@@ -0,0 +1,64 @@
+import importlib.util
+import os
+import subprocess
+import sys
+import unittest
+
+import numpy as np
+
+from networks.connections.mimo import SISO, MIMO
+from networks.connections.radio import friis_rx_power
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestRadio(unittest.TestCase):
+
+    def setUp(self):
+        self.siso = SISO()
+        self.distances = np.array([0, 0.5, 1, 10, 50, 70, 92, 500, 5000], dtype=np.float64)  # in meters
+
+    @unittest.skipUnless(importlib.util.find_spec('ns'), "the ns-3 bindings are not installed")
+    def test_ns3_backend(self):
+        for cls in [SISO, MIMO]:
+            numpy_model, ns3_model = cls(), cls(backend="ns3")
+            for name in ['compute_signal', 'calculate_snr_in_db', 'get_ideal_bandwidth', 'get_bandwidth_from_distance',
+                         'get_error_rate']:
+                self.assertTrue(np.allclose(getattr(numpy_model, name)(self.distances),
+                                            getattr(ns3_model, name)(self.distances), rtol=1e-9, atol=1e-12), name)
+            self.assertEqual(numpy_model.get_radius(), ns3_model.get_radius())
+
+    def test_vectorized(self):
+        self.assertEqual(self.siso.get_ideal_bandwidth(self.distances).shape, self.distances.shape)
+        for name in ['compute_signal', 'get_bandwidth_from_distance', 'get_error_rate']:
+            res = getattr(self.siso, name)(self.distances)
+            self.assertEqual(list(res), [getattr(self.siso, name)(distance) for distance in self.distances])
+        self.assertIsInstance(self.siso.get_error_rate(50), float)
+        self.assertEqual(friis_rx_power(30, [0, -1], 28e9).tolist(), [30, 30])  # no loss without distance
+
+    def test_qos_table(self):
+        distances = np.array([[0.01, 0.05], [0.08, 0.03], [0.0704, 0.2]])
+        table = self.siso.get_qos_table(distances, resolution=None)
+        for i, distance in enumerate(distances.min(axis=1)):
+            qos = self.siso.get_qos_from(distance)
+            self.assertEqual(table['bandwidth'][i], qos.get_bandwidth())
+            self.assertEqual(table['error_rate'][i], qos.get_error_rate())
+            self.assertEqual(table['delay'][i], qos.get_delay())
+
+    def test_carrier_frequencies(self):
+        signal = self.siso.compute_signal(50)
+        other = SISO(carrier_frequency=3.5, backend="numpy")
+        self.assertEqual(self.siso.compute_signal(50), signal)  # the models do not share their frequency
+        self.assertGreater(other.compute_signal(50), signal)
+        with self.assertRaises(SISO.SISOException):
+            SISO(backend="matlab")
+
+    def test_without_ns3(self):
+        code = "import sys; sys.modules['ns'] = None; from networks.connections.mimo import MIMO; " \
+               "print(MIMO().get_radius())"
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True, cwd=ROOT)
+        self.assertEqual(float(output.stdout), MIMO().get_radius())
+
+
+if __name__ == '__main__':
+    unittest.main()
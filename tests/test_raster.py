@@ -0,0 +1,94 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from networks.raster import QoSRaster
+from networks.slicing import SliceConceptualGraph
+from utils.location import Location
+
+
+class TestQoSRaster(unittest.TestCase):
+
+    def setUp(self):
+        self.backhaul_qos = {'latency': {'delay': '3.0ms', 'deviation': '1.0ms'}, 'bandwidth': '100.0mbps',
+                             'error_rate': '1.0%'}
+        self.parameters = dict(
+            best_qos={'latency': {'delay': '5.0ms', 'deviation': '2.0ms'}, 'bandwidth': '10.0mbps',
+                      'error_rate': '1.0%'},
+            worst_qos={'latency': {'delay': '100.0ms', 'deviation': '20.0ms'}, 'bandwidth': '5.0mbps',
+                       'error_rate': '2.0%'}, radius="300m")
+        self.RUs = [dict(lat=35.0, lon=33.0), dict(lat=35.004, lon=33.0), dict(lat=35.0, lon=33.005)]
+        self.bounds = ((34.997, 32.997), (35.007, 33.008))
+
+    def get_network(self, wireless_connection_type, parameters):
+        network = SliceConceptualGraph("network", self.backhaul_qos, self.backhaul_qos, parameters, RUs=self.RUs,
+                                       wireless_connection_type=wireless_connection_type)
+        network.add_node('ue_0', 35.0001, 33.0001)
+        network.add_node('ue_1', 35.0002, 33.0)
+        network.add_node('ue_2', 35.0039, 33.0)
+        return network
+
+    def assert_same_with_slice(self, network, raster, samples=100):
+        lats, lons = raster.get_coordinates()
+        RUs = list(network.get_RUs())
+        rng = np.random.default_rng(1)
+        for row, column in zip(rng.integers(0, raster.shape[0], samples), rng.integers(0, raster.shape[1], samples)):
+            RU, qos = network.get_qos_for_selected_RU(Location(float(lats[row]), float(lons[column])))
+            if raster['RU'][row, column] >= 0:
+                self.assertEqual(RUs[raster['RU'][row, column]], RU[0])
+            self.assertAlmostEqual(raster['bandwidth'][row, column], qos.get_bandwidth(), places=2)
+            self.assertAlmostEqual(raster['delay'][row, column], qos.get_delay(), delta=0.2)
+            self.assertAlmostEqual(raster['error_rate'][row, column], qos.get_error_rate(), places=2)
+
+    def test_linear_degradation(self):
+        network = self.get_network("LinearDegradation", self.parameters)
+        raster = network.get_qos_raster(self.bounds, resolution=0.01, distance_resolution=None)
+        self.assertEqual(raster.shape, (112, 101))
+        (south, west), (north, east) = raster.get_bounds()
+        self.assertTrue(south <= 34.997 and west <= 32.997 and north >= 35.007 and east >= 33.008)
+        self.assert_same_with_slice(network, raster)
+        self.assertTrue(np.any(raster['RU'] == -1))
+        self.assertTrue(np.all(raster['bandwidth'][raster['RU'] == -1] == 0))
+
+    def test_mimo(self):
+        network = self.get_network("MIMO", dict(RU_antennas=16, UE_antennas=4))
+        raster = network.get_qos_raster(self.bounds, resolution=0.005, distance_resolution=None)
+        self.assertGreater(np.sum(raster['bandwidth'] > 0), 0)
+        self.assert_same_with_slice(network, raster)
+
+    def test_tile_cache(self):
+        network = self.get_network("LinearDegradation", self.parameters)
+        raster = network.get_qos_raster(self.bounds, resolution=0.01)
+        tiles = dict(network.rasterizer.tiles)
+        self.assertGreater(len(tiles), 0)
+        # a sub-area is composed by the cached tiles
+        partial = network.get_qos_raster(((35.0, 33.0), (35.004, 33.005)), resolution=0.01)
+        self.assertEqual(list(network.rasterizer.tiles), list(tiles))
+        lats, lons = raster.get_coordinates()
+        row = int(np.argmin(np.abs(lats - partial.get_coordinates()[0][0])))
+        column = int(np.argmin(np.abs(lons - partial.get_coordinates()[1][0])))
+        self.assertTrue(np.array_equal(partial['bandwidth'],
+                                       raster['bandwidth'][row:row + partial.shape[0], column:column + partial.shape[1]]))
+        # a moving UE changes the connected UEs of the RUs, so the tiles are computed again
+        network.set_node_location('ue_2', 35.0, 33.0049)
+        network.get_qos_raster(self.bounds, resolution=0.01)
+        self.assertIsNot(network.rasterizer.tiles[next(iter(tiles))], tiles[next(iter(tiles))])
+
+    def test_save_and_load(self):
+        raster = self.get_network("LinearDegradation", self.parameters).get_qos_raster(self.bounds, resolution=0.02)
+        with tempfile.TemporaryDirectory() as directory:
+            raster.save(os.path.join(directory, "raster.npz"))
+            loaded = QoSRaster.load(os.path.join(directory, "raster.npz"))
+            raster.to_image(os.path.join(directory, "raster.png"))
+            self.assertTrue(os.path.exists(os.path.join(directory, "raster.pgw")))
+        self.assertEqual(loaded.get_transform(), raster.get_transform())
+        self.assertEqual(loaded.RUs, raster.RUs)
+        for name in QoSRaster.metrics + ['RU', 'distance']:
+            self.assertTrue(np.array_equal(loaded[name], raster[name]))
+
+    def test_invalid_bounds(self):
+        network = self.get_network("LinearDegradation", self.parameters)
+        with self.assertRaises(SliceConceptualGraph.NetworkSliceException):
+            network.get_qos_raster(((35.01, 33.0), (35.0, 33.01)))
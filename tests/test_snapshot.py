@@ -0,0 +1,92 @@
+import io
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from SlicerSDK import SlicerSDK
+from networks.slicing import SliceConceptualGraph
+from networks.snapshot import LazySlices, SliceSnapshot
+
+
+class TestSliceSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.backhaul_qos = {'latency': {'delay': '3.0ms', 'deviation': '1.0ms'}, 'bandwidth': '100.0mbps',
+                             'error_rate': '1.0%'}
+        self.midhaul_qos = {'latency': {'delay': '2.0ms', 'deviation': '0.5ms'}, 'bandwidth': '50.0mbps',
+                            'error_rate': '0.5%'}
+        self.parameters = dict(
+            best_qos={'latency': {'delay': '5.0ms', 'deviation': '2.0ms'}, 'bandwidth': '10.0mbps',
+                      'error_rate': '1.0%'},
+            worst_qos={'latency': {'delay': '100.0ms', 'deviation': '20.0ms'}, 'bandwidth': '5.0mbps',
+                       'error_rate': '2.0%'}, radius="2km")
+        RUs = [dict(lat=35.0, lon=33.0), dict(lat=35.01, lon=33.0, alt=10)]
+        self.network = SliceConceptualGraph("network", self.backhaul_qos, self.midhaul_qos, self.parameters, RUs=RUs)
+        for i in range(5):
+            self.network.add_node(f'ue_{i}', 35.0 + 0.002 * i, 33.0)
+        self.network.add_node('edge', 35.0, 33.0, location_type='EDGE')
+        self.network.add_node('cloud', location_type='CLOUD')
+        self.network.set_node_location('ue_1', 35.009, 33.001)
+
+    def assert_same_slices(self, network, restored):
+        self.assertEqual(restored.get_name(), network.get_name())
+        self.assertEqual(restored.get_RUs(), network.get_RUs())
+        self.assertEqual(list(restored.get_RUs()), list(network.get_RUs()))
+        self.assertEqual(restored.get_nodes(), network.get_nodes())
+        self.assertEqual(restored.attachments, network.attachments)
+        self.assertEqual(set(restored.graph.edges), set(network.graph.edges))
+        for from_node in network.get_nodes():
+            for to_node in network.get_nodes():
+                qos, restored_qos = network.get_qos_between_nodes(from_node, to_node), \
+                                    restored.get_qos_between_nodes(from_node, to_node)
+                if qos is None:
+                    self.assertIsNone(restored_qos)
+                    continue
+                self.assertEqual(restored_qos.get_formatted_bidirectional_qos(), qos.get_formatted_bidirectional_qos())
+
+    def test_save_and_restore(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "network.npz")
+            self.network.save_snapshot(filename)
+            restored = SliceConceptualGraph.load_snapshot(filename)
+        self.assert_same_slices(self.network, restored)
+        # the restored slice is a regular slice
+        restored.set_node_location('ue_1', 35.0, 33.0)
+        self.network.set_node_location('ue_1', 35.0, 33.0)
+        self.assert_same_slices(self.network, restored)
+
+    def test_lazy_loading(self):
+        buffer = io.BytesIO()
+        self.network.save_snapshot(buffer)
+        snapshot = SliceSnapshot.from_bytes(buffer.getvalue())
+        self.assertEqual(snapshot.get_name(), "network")
+        self.assertEqual(list(snapshot['node_names']), list(self.network.attachments))
+        cloud = list(snapshot['node_names']).index('cloud')
+        self.assertTrue(np.all(np.isnan(snapshot['node_locations'][cloud])))  # the cloud node has no location
+        slices = LazySlices({"network": snapshot})
+        self.assertEqual(list(slices), ["network"])
+        self.assertEqual(slices.slices, {})
+        self.assert_same_slices(self.network, slices["network"])
+        self.assertIn("network", slices.slices)
+
+    def test_version(self):
+        snapshot = SliceSnapshot.from_slice(self.network)
+        data = dict(snapshot.data, metadata=np.array(str(snapshot['metadata']).replace('"version": 1', '"version": 0')))
+        with self.assertRaises(SliceSnapshot.SliceSnapshotException):
+            SliceSnapshot(data)
+
+    def test_store_and_load_sdk(self):
+        slicer_sdk = SlicerSDK("http://controller:5000")
+        slicer_sdk.slices["network"] = self.network
+        slicer_sdk.topology.append(dict(label="node"))
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "slicerSDK")
+            slicer_sdk.store(filename)
+            loaded = SlicerSDK("http://controller:5000")
+            loaded.load(filename)
+            self.assertEqual(loaded.topology, [dict(label="node")])
+            self.assertIsInstance(loaded.slices, LazySlices)
+            self.assert_same_slices(self.network, loaded.slices["network"])
+            loaded.store(filename)
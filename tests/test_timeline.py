@@ -0,0 +1,89 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from networks.slicing import SliceConceptualGraph
+from networks.timeline import QoSTimeline
+
+
+class TestQoSTimeline(unittest.TestCase):
+
+    def setUp(self):
+        self.backhaul_qos = {'latency': {'delay': '3.0ms', 'deviation': '1.0ms'}, 'bandwidth': '100.0mbps',
+                             'error_rate': '1.0%'}
+        self.parameters = dict(
+            best_qos={'latency': {'delay': '5.0ms', 'deviation': '2.0ms'}, 'bandwidth': '10.0mbps',
+                      'error_rate': '1.0%'},
+            worst_qos={'latency': {'delay': '100.0ms', 'deviation': '20.0ms'}, 'bandwidth': '5.0mbps',
+                       'error_rate': '2.0%'}, radius="2km")
+        self.RUs = [dict(lat=35.0, lon=33.0), dict(lat=35.01, lon=33.0), dict(lat=35.0, lon=33.01)]
+        self.moves = [(5, 'ue_0', 35.009, 33.0), (5, 'ue_1', 35.0005, 33.0005), (10, 'ue_0', 35.0001, 33.0092),
+                      (12, 'ue_2', 35.2, 33.2), (20, 'ue_1', 35.009, 33.0001)]
+
+    def get_network(self, wireless_connection_type, parameters):
+        network = SliceConceptualGraph("network", self.backhaul_qos, self.backhaul_qos, parameters, RUs=self.RUs,
+                                       wireless_connection_type=wireless_connection_type)
+        network.add_node('ue_0', 35.0001, 33.0001)
+        network.add_node('ue_1', 35.0002, 33.0)
+        network.add_node('ue_2', 35.0098, 33.0)
+        network.add_node('edge', 35.01, 33.0, location_type='EDGE')
+        return network
+
+    def assert_same_with_slice(self, wireless_connection_type, parameters):
+        network = self.get_network(wireless_connection_type, parameters)
+        attachments = dict(network.attachments)
+        timeline = network.get_qos_timeline(*zip(*self.moves))
+        self.assertEqual(len(timeline), 3 + len(self.moves))
+        # the moves are applied to a fork, so the slice is not altered
+        self.assertEqual(network.get_node_location('ue_0').get_lat(), 35.0001)
+        self.assertEqual(network.attachments, attachments)
+
+        for row, (_, label, lat, lon) in enumerate(self.moves, start=3):
+            network.set_node_location(label, lat, lon)
+            RU = [i for i in network.graph.neighbors(label)][0]
+            qos = network.graph.edges[label, RU]['qos']
+            self.assertEqual(timeline.nodes[timeline.node[row]], label)
+            self.assertEqual(timeline.RUs[timeline.RU[row]], RU)
+            self.assertAlmostEqual(timeline.bandwidth[row], qos.get_bandwidth(), places=3)
+            self.assertAlmostEqual(timeline.delay[row], qos.get_delay(), places=3)
+            self.assertAlmostEqual(timeline.error_rate[row], qos.get_error_rate(), places=3)
+
+    def test_linear_degradation(self):
+        self.assert_same_with_slice("LinearDegradation", self.parameters)
+
+    def test_mimo(self):
+        self.assert_same_with_slice("MIMO", dict(RU_antennas=8, UE_antennas=4))
+
+    def test_queries(self):
+        timeline = self.get_network("LinearDegradation", self.parameters).get_qos_timeline(*zip(*self.moves))
+        ue_0 = timeline.get_node('ue_0')
+        self.assertEqual(list(ue_0['time']), [0, 5, 10])
+        state = timeline.at(11)
+        self.assertEqual([timeline.nodes[i] for i in state['node']], ['ue_0', 'ue_1', 'ue_2'])
+        self.assertEqual(list(state['time']), [10, 5, 0])
+        self.assertEqual(state['bandwidth'][1], timeline.bandwidth[4])
+        self.assertEqual(timeline.at(12)['bandwidth'][2], 0)  # out of coverage
+        with self.assertRaises(QoSTimeline.QoSTimelineException):
+            timeline.get_node('edge')
+
+    def test_save_and_load(self):
+        timeline = self.get_network("LinearDegradation", self.parameters).get_qos_timeline(*zip(*self.moves))
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "timeline.npz")
+            timeline.save(filename)
+            loaded = QoSTimeline.load(filename)
+        self.assertEqual(loaded.nodes, timeline.nodes)
+        self.assertEqual(loaded.RUs, timeline.RUs)
+        for name, column in timeline.get_columns().items():
+            self.assertTrue(np.array_equal(getattr(loaded, name), column))
+        df = loaded.to_dataframe()
+        self.assertEqual(list(df['node'])[-1], 'ue_1')
+
+    def test_unknown_nodes(self):
+        network = self.get_network("LinearDegradation", self.parameters)
+        with self.assertRaises(SliceConceptualGraph.NetworkSliceException):
+            network.get_qos_timeline([1], ['edge'], [35.0], [33.0])
+        with self.assertRaises(SliceConceptualGraph.NetworkSliceException):
+            network.get_qos_timeline([2, 1], ['ue_0', 'ue_1'], [35.0, 35.0], [33.0, 33.0])
@@ -0,0 +1,121 @@
+import unittest
+
+from ipyleaflet import Circle, GeoJSON, Heatmap, Marker, MarkerCluster
+
+from networks.slicing import SliceConceptualGraph
+from utils.ui import MobilityMap
+
+
+class TestMobilityMap(unittest.TestCase):
+
+    def setUp(self):
+        backhaul_qos = {'latency': {'delay': '3.0ms', 'deviation': '1.0ms'}, 'bandwidth': '100.0mbps',
+                        'error_rate': '1.0%'}
+        parameters = dict(
+            best_qos={'latency': {'delay': '5.0ms', 'deviation': '2.0ms'}, 'bandwidth': '10.0mbps',
+                      'error_rate': '1.0%'},
+            worst_qos={'latency': {'delay': '100.0ms', 'deviation': '20.0ms'}, 'bandwidth': '5.0mbps',
+                       'error_rate': '2.0%'}, radius="1km")
+        self.network = SliceConceptualGraph("network", backhaul_qos, backhaul_qos, parameters,
+                                            RUs=[dict(lat=35.0, lon=33.0), dict(lat=35.01, lon=33.0)])
+        self.network.add_node('edge', 35.0, 33.0, location_type='EDGE')
+        for i, lat in enumerate([35.001, 35.002, 35.003]):
+            self.network.add_node(f'ue_{i}', lat, 33.0)
+        for name in ['frame_rate', 'max_markers', 'detail_zoom']:
+            self.addCleanup(setattr, MobilityMap, name, getattr(MobilityMap, name))
+
+    def get_layer_types(self, map):
+        return {type(layer) for layer in map.layers}
+
+    def get_location(self, map, label):
+        return tuple(MobilityMap.get_index(map).markers[label].location)
+
+    def test_marker_index(self):
+        map = MobilityMap.generate_map(self.network, None, mode='markers')
+        index = MobilityMap.get_index(map)
+        self.assertEqual(sorted(index.markers), ['edge', 'ue_0', 'ue_1', 'ue_2'])
+        # the EDGE node is co-located with an RU, so it is depicted as a fixed RU
+        self.assertFalse(index.markers['edge'].draggable)
+        self.assertTrue(index.markers['ue_0'].draggable)
+        # maps that were not generated by the class are indexed by their layers
+        del MobilityMap.indices[map]
+        self.assertEqual(sorted(MobilityMap.get_index(map).markers), sorted(index.markers))
+
+    def test_moves(self):
+        map = MobilityMap.generate_map(self.network, None, mode='markers')
+        # the latitude is the same, so only the longitude distinguishes the new position
+        self.network.set_node_location('ue_0', 35.001, 33.002)
+        self.network.set_node_location('ue_1', 35.0025, 33.0)
+        self.assertTrue(MobilityMap.update_map(map, self.network, ['ue_0'], force=True))
+        self.assertEqual(self.get_location(map, 'ue_0'), (35.001, 33.002))
+        self.assertEqual(self.get_location(map, 'ue_1'), (35.002, 33.0))  # its label was not given
+        self.assertTrue(MobilityMap.update_map(map, self.network, force=True))
+        self.assertEqual(self.get_location(map, 'ue_1'), (35.0025, 33.0))
+
+    def test_throttle(self):
+        MobilityMap.frame_rate = 10
+        map = MobilityMap.generate_map(self.network, None, mode='markers')
+        index = MobilityMap.get_index(map)
+        self.assertTrue(MobilityMap.update_map(map, self.network, []))
+        self.network.set_node_location('ue_2', 35.004, 33.0)
+        # the redraw is skipped within the frame, but the pending label is applied by the trailing redraw
+        self.assertFalse(MobilityMap.update_map(map, self.network, ['ue_2']))
+        self.assertEqual(index.pending, {'ue_2'})
+        self.assertEqual(self.get_location(map, 'ue_2'), (35.003, 33.0))
+        index.flush_timer.join(1)
+        self.assertEqual(self.get_location(map, 'ue_2'), (35.004, 33.0))
+        self.assertEqual(index.pending, set())
+        self.assertIsNone(index.flush_timer)
+        # a redraw within the frame cancels the trailing one
+        self.network.set_node_location('ue_2', 35.005, 33.0)
+        self.assertFalse(MobilityMap.update_map(map, self.network, ['ue_2']))
+        timer = index.flush_timer
+        self.assertTrue(MobilityMap.update_map(map, self.network, ['ue_1'], force=True))
+        self.assertTrue(timer.finished.is_set())
+        self.assertIsNone(index.flush_timer)
+        self.assertEqual(self.get_location(map, 'ue_2'), (35.005, 33.0))
+
+    def test_modes(self):
+        map = MobilityMap.generate_map(self.network, None, mode='markers')
+        self.assertEqual(len([i for i in map.layers if isinstance(i, Marker)]), 4)
+        self.assertEqual(len([i for i in map.layers if isinstance(i, Circle)]), 2)
+        map = MobilityMap.generate_map(self.network, None, mode='cluster')
+        self.assertTrue({MarkerCluster, GeoJSON} <= self.get_layer_types(map))
+        self.assertNotIn(Marker, self.get_layer_types(map))
+        self.assertEqual(len([i for i in map.layers if isinstance(i, MarkerCluster)][0].markers), 4)
+        # the slice has 4 nodes and 2 RUs
+        MobilityMap.max_markers = 6
+        map = MobilityMap.generate_map(self.network, None, mode='auto')
+        self.assertEqual(MobilityMap.get_index(map).features, {})
+        MobilityMap.max_markers = 5
+        map = MobilityMap.generate_map(self.network, None, mode='auto')
+        self.assertEqual(sorted(MobilityMap.get_index(map).features), ['ue_0', 'ue_1', 'ue_2'])
+        with self.assertRaises(ValueError):
+            MobilityMap.generate_map(self.network, None, mode='tiles')
+
+    def test_level_of_detail(self):
+        MobilityMap.detail_zoom = 12
+        map = MobilityMap.generate_map(self.network, None, mode='lod', zoom=10)
+        index = MobilityMap.get_index(map)
+        self.assertIn(index.heatmap, map.layers)
+        self.assertNotIn(index.points, map.layers)
+        self.assertEqual(len(index.heatmap.locations), 3)
+        # only the visible heatmap is sent, while the points are sent when they are depicted
+        self.network.set_node_location('ue_0', 35.0015, 33.001)
+        MobilityMap.update_map(map, self.network, ['ue_0'], force=True)
+        self.assertIn([35.0015, 33.001], index.heatmap.locations)
+        self.assertEqual(index.points.data['features'], [])
+        map.zoom = 12
+        self.assertIn(index.points, map.layers)
+        self.assertIn(index.detail_layers[0], map.layers)  # the coverage of the RUs
+        self.assertNotIn(index.heatmap, map.layers)
+        self.assertEqual(index.points.data['features'][0]['geometry']['coordinates'], [33.001, 35.0015])
+        locations = index.heatmap.locations
+        self.network.set_node_location('ue_1', 35.0025, 33.0)
+        MobilityMap.update_map(map, self.network, ['ue_1'], force=True)
+        self.assertEqual(index.points.data['features'][1]['geometry']['coordinates'], [33.0, 35.0025])
+        self.assertIs(index.heatmap.locations, locations)
+
+
+if __name__ == '__main__':
+    unittest.main()
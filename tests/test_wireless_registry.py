@@ -0,0 +1,69 @@
+import unittest
+
+from networks.connections import prototype_networks
+from networks.connections.mathematical_connections import FlatWirelessNetwork, LinearDegradation
+from networks.connections.registry import WirelessRegistry, wireless_models
+from networks.slicing import SliceConceptualGraph
+
+
+class TestWirelessRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.backhaul_qos = {'latency': {'delay': '3.0ms', 'deviation': '1.0ms'}, 'bandwidth': '100.0mbps',
+                             'error_rate': '1.0%'}
+        self.midhaul_qos = {'latency': {'delay': '2.0ms', 'deviation': '0.5ms'}, 'bandwidth': '50.0mbps',
+                            'error_rate': '0.5%'}
+        self.parameters = dict(best_qos={'latency': {'delay': '5.0ms', 'deviation': '2.0ms'}, 'bandwidth': '10.0mbps',
+                                         'error_rate': '1.0%'},
+                               worst_qos={'latency': {'delay': '100.0ms', 'deviation': '20.0ms'},
+                                          'bandwidth': '5.0mbps', 'error_rate': '2.0%'}, radius="5km")
+
+    def get_network(self, wireless_connection_type, parameters):
+        return SliceConceptualGraph("network", self.backhaul_qos, self.midhaul_qos, parameters,
+                                    RUs=[dict(lat=35.0, lon=33.0)], wireless_connection_type=wireless_connection_type)
+
+    def test_names(self):
+        for name in ['LinearDegradation', 'Log2Degradation', 'Log10Degradation', 'MultiRangeNetwork',
+                     'FlatWirelessNetwork', 'SISO', 'MIMO', 'SINR']:
+            self.assertIn(name, wireless_models)
+        self.assertIs(wireless_models.get_class('LinearDegradation'), LinearDegradation)
+        self.assertIs(prototype_networks.FlatWirelessNetwork, FlatWirelessNetwork)
+        self.assertIs(prototype_networks.SISO, wireless_models.get_class('SISO'))
+        with self.assertRaises(WirelessRegistry.WirelessRegistryException):
+            self.get_network('LinearDegradations', self.parameters)
+        with self.assertRaises(WirelessRegistry.WirelessRegistryException):
+            wireless_models.register(dict)
+
+    def test_shared_instances(self):
+        network = self.get_network('LinearDegradation', self.parameters)
+        parameters = dict(reversed(list(self.parameters.items())))
+        self.assertIs(self.get_network('LinearDegradation', parameters).wireless_connection,
+                      network.wireless_connection)
+        self.assertIsNot(self.get_network('Log2Degradation', self.parameters).wireless_connection,
+                         network.wireless_connection)
+        self.assertIsNot(self.get_network('LinearDegradation', dict(self.parameters, radius="4km")).wireless_connection,
+                         network.wireless_connection)
+        # the omitted parameters are the same with the default ones and the integers with the floats
+        flat = self.get_network('FlatWirelessNetwork', {}).wireless_connection
+        self.assertIs(self.get_network('FlatWirelessNetwork', dict(radius=500.0)).wireless_connection, flat)
+        self.assertIs(network.fork(parameters=dict(self.parameters)).wireless_connection, network.wireless_connection)
+
+    def test_register(self):
+        registry = WirelessRegistry(maxsize=2)
+
+        @registry.register(name='Flat')
+        class CustomFlat(FlatWirelessNetwork):
+            pass
+
+        registry.register_lazy('Linear', 'networks.connections.mathematical_connections:LinearDegradation')
+        self.assertEqual(registry.get_names()[:2], ['Flat', 'Linear'])
+        self.assertIs(registry.get_class('Linear'), LinearDegradation)
+        instances = [registry.get_instance('Flat', dict(radius=radius)) for radius in [100, 200, 100, 300, 200]]
+        self.assertIs(instances[0], instances[2])
+        self.assertIsNot(instances[1], instances[4])  # it was evicted by the third radius
+        self.assertEqual(registry.statistics, dict(hits=1, misses=4, evictions=2))
+        self.assertIsInstance(instances[0], CustomFlat)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,16 +1,19 @@
 import copy
+import hashlib
+import heapq
+import os
 import random
 from dataclasses import dataclass
-from datetime import datetime
 from typing import Tuple, List
 
 import numpy as np
 import pandas as pd
-from sklearn.cluster import KMeans
+import yaml
 
 from SlicerSDK import SlicerSDK
+from networks.connections.registry import wireless_models
 from usecases.template import Template
-from utils.location import Location
+from utils.geometry import to_cartesian, distance_sums, neighbour_counts, SpatialIndex
 
 
 @dataclass
@@ -38,8 +41,23 @@ class BusExperiment(Template):
     max_num_of_trace_steps: int = 60
     min_num_of_trace_steps: int = 0
     bus_ids: List[int] = None
-    ru_overlap: str = "random"  # or max_density, min_density, kmeans
+    ru_overlap: str = "random"  # or max_density, min_density, max_local_density, min_local_density, kmeans, coverage
     seed: int = None
+    density_radius: float = None  # in km, radius of local density and coverage (the slice's radius if it is None)
+    minibatch_kmeans_threshold: int = 10000  # number of stops from which kmeans runs in mini-batches
+    trace_chunk_size: int = 1000000  # number of trace records that are read and filtered at once
+    trace_cache_dir: str = None  # directory of the filtered traces' cache (no caching if it is None)
+    scenario_tick: int = 1  # in seconds, the moves of the mobility scenario are batched per tick
+
+    # The filtered trace records (and their cache) have the following columns
+    trace_record_dtype = np.dtype([('Timestamp', np.int64), ('Lat', np.float64), ('Lon', np.float64),
+                                   ('trace_id', np.int64)])
+
+    # Every trace is a structured array with the following fields
+    trace_dtype = np.dtype([('timestamp', 'datetime64[s]'), ('Lat', np.float64), ('Lon', np.float64)])
+
+    # The parameters that filter the loaded traces and stops, so clones can not alter them
+    loading_parameters = ['bounding_box', 'traces_filename', 'bus_stops_filename', 'bus_ids']
 
     def __post_init__(self):
         if self.num_of_edge > self.num_of_RUs:
@@ -53,6 +71,31 @@ class BusExperiment(Template):
             self.bus_ids = []
         random.seed(self.seed)
 
+    def clone(self, slicer_sdk: SlicerSDK, **parameters) -> 'BusExperiment':
+        """
+        Creates an experiment with different parameters (e.g. num_of_RUs, ru_overlap) that shares
+        the loaded traces and stops with this experiment
+        :param slicer_sdk: The SlicerSDK of the new experiment
+        :param parameters: The parameters that differ from this experiment
+        :return: The new experiment
+        """
+        for name, value in parameters.items():
+            if not hasattr(self, name):
+                raise ValueError(f"{name} is not a parameter of the experiment")
+            if name in self.loading_parameters and value != getattr(self, name):
+                raise ValueError(f"{name} filters the loaded traces, so it can not be altered by cloning")
+        experiment = copy.copy(self)
+        for name, value in parameters.items():
+            setattr(experiment, name, value)
+        experiment.slicer_sdk = slicer_sdk
+        if experiment.num_of_edge > experiment.num_of_RUs:
+            experiment.num_of_edge = experiment.num_of_RUs
+        experiment.fill_traces()
+        experiment.__RUs = []
+        experiment.__compute_nodes = []
+        random.seed(experiment.seed)
+        return experiment
+
     def fill_stops_dataframe(self):
         self.stop_df = pd.read_csv(self.bus_stops_filename)
         self.stop_df = self.return_for_bounds(self.stop_df)
@@ -61,10 +104,12 @@ class BusExperiment(Template):
     def RUs(self):
         records = self.stop_df.to_dict('records')
         if self.__RUs == []:
-            if self.ru_overlap in ['min_density', 'max_density']:
+            if self.ru_overlap in ['min_density', 'max_density', 'min_local_density', 'max_local_density']:
                 self.__density_based_RUs(records)
             elif self.ru_overlap == 'kmeans':
                 self.___cluster_based_RUs(records)
+            elif self.ru_overlap == 'coverage':
+                self.__coverage_based_RUs(records)
             else:
                 self.__random_based_RUs(records)
         return self.__RUs
@@ -77,30 +122,79 @@ class BusExperiment(Template):
             pass
 
     def ___cluster_based_RUs(self, records):
+        """
+        Clusters the stops with kmeans and places an RU at the nearest distinct stop of each cluster center
+        """
+        num_of_RUs = min(self.num_of_RUs, len(records))
+        if num_of_RUs == 0:
+            self.__RUs = []
+            return
+        from sklearn.cluster import KMeans, MiniBatchKMeans
         X = np.array([[RU['Lat'], RU['Lon']] for RU in records])
-        kmeans = KMeans(n_clusters=self.num_of_RUs, random_state=0).fit(X)
-        fin_res = []
-        for points in kmeans.cluster_centers_:
-            for RU in records:
-                if RU['Lat'] == points[0] and RU['Lon'] == points[1]:
-                    fin_res.append(RU)
-                    break
-        self.__RUs = fin_res
+        if len(records) > self.minibatch_kmeans_threshold:
+            kmeans = MiniBatchKMeans(n_clusters=num_of_RUs, random_state=0, n_init=3).fit(X)
+        else:
+            kmeans = KMeans(n_clusters=num_of_RUs, random_state=0, n_init=10).fit(X)
+        index = SpatialIndex(to_cartesian(X[:, 0], X[:, 1]))
+        selected = []
+        for center in to_cartesian(kmeans.cluster_centers_[:, 0], kmeans.cluster_centers_[:, 1]):
+            nearest, _ = index.nearest(center, exclude=set(selected))
+            selected.append(nearest)
+        self.__RUs = [records[i] for i in selected]
+
+    def __coverage_based_RUs(self, records):
+        """
+        Greedy maximum coverage. Every time, the RU is placed at the stop that covers (within the radius)
+        the most stops that are not covered yet
+        """
+        radius = self.__get_density_radius()
+        points = to_cartesian([RU['Lat'] for RU in records], [RU['Lon'] for RU in records])
+        index = SpatialIndex(points, radius)
+        neighbours = [index.query_radius(point, radius)[0] for point in points]
+        is_covered = np.zeros(len(records), dtype=bool)
+        # lazy greedy: the stored gains are upper bounds of the current ones, since coverage only grows
+        heap = [(-len(stop_neighbours), i) for i, stop_neighbours in enumerate(neighbours)]
+        heapq.heapify(heap)
+        selected = []
+        while heap and len(selected) < self.num_of_RUs:
+            gain, i = heapq.heappop(heap)
+            current_gain = int((~is_covered[neighbours[i]]).sum())
+            if current_gain < -gain:
+                heapq.heappush(heap, (-current_gain, i))
+                continue
+            selected.append(i)
+            is_covered[neighbours[i]] = True
+        self.__RUs = [records[i] for i in selected]
 
     def __density_based_RUs(self, records):
-        RU_dists = {}
-        for RU_1 in records:
-            RU_dists[RU_1['stop_id']] = 0
-            for RU_2 in records:
-                RU_dists[RU_1['stop_id']] += Location(RU_1['Lat'],
-                                                                        RU_1['Lon']).distance(
-                    Location(RU_2['Lat'], RU_2['Lon']))
-        records.sort(key=lambda x: RU_dists[x['stop_id']])
-        if self.ru_overlap == 'min_density':
+        """
+        Sorts the stops by their density and selects the first (min_*) or the last (max_*) ones.
+        The density is either the sum of the distances from all stops (min_density, max_density)
+        or the number of stops within the density radius (min_local_density, max_local_density)
+        """
+        points = to_cartesian([RU['Lat'] for RU in records], [RU['Lon'] for RU in records])
+        if self.ru_overlap in ['min_local_density', 'max_local_density']:
+            density = neighbour_counts(points, self.__get_density_radius())
+        else:
+            density = distance_sums(points)
+        records = [records[i] for i in np.argsort(density, kind='stable')]
+        if self.ru_overlap in ['min_density', 'min_local_density']:
             self.__RUs = records[:self.num_of_RUs]
         else:
             self.__RUs = records[-self.num_of_RUs:]
 
+    def __get_density_radius(self) -> float:
+        """
+        Returns the radius of the local density, which by default is the radius of the slice's wireless connection
+        """
+        if self.density_radius is not None:
+            return self.density_radius
+        for network in self.slicer_sdk.networks:
+            if network.get('name') != self.slice_name: continue
+            return wireless_models.get_instance(network.get('wireless_connection_type', 'LinearDegradation'),
+                                                network.get('parameters', {})).get_radius()
+        raise ValueError(f"There is no {self.slice_name} slice to retrieve the density radius from")
+
     @property
     def compute_nodes(self):
         try:
@@ -110,48 +204,70 @@ class BusExperiment(Template):
         return self.__compute_nodes
 
     def fill_trace_dataframe(self):
+        """
+        Streams the traces file in chunks and keeps only the records in the bounding box (and of the bus ids).
+        If there is a cache directory, the filtered records are stored there and the next experiments
+        with the same file and filters load them with a memory-mapped read (the columns are read-only views
+        of the mapped file, so the records are read on demand and not copied)
+        """
+        cache_filename = self.__get_trace_cache_filename()
+        if cache_filename is not None and os.path.exists(cache_filename):
+            records = np.load(cache_filename, mmap_mode='r')
+            self.trace_df = pd.DataFrame({column: records[column] for column in self.trace_record_dtype.names},
+                                         copy=False)
+            return
         header = ['Timestamp', 'LineID', 'Direction', 'PatternID', 'TimeFrame', 'JourneyID', 'Operator', 'Congestion',
                   'Lon', 'Lat', 'Delay', 'BlockID', 'VehicleID', 'StopID', 'AtStop']
-        types = {'Timestamp': np.int64, 'JourneyID': np.int32, 'Congestion': np.int8, 'Lon': np.float64,
-                 'Lat': np.float64, 'Delay': np.int8, 'VehicleID': np.int32, 'AtStop': np.int8}
-        self.trace_df = pd.read_csv(self.traces_filename, header=None, names=header, dtype=types,
-                                    parse_dates=['TimeFrame'], infer_datetime_format=True)
-        self.trace_df = self.return_for_bounds(self.trace_df)
-        self.trace_df = self.trace_df.sort_values(by=['Timestamp'])
-        self.trace_df['trace_id'] = self.trace_df['JourneyID'] + 10000 * self.trace_df["VehicleID"]
-        self.trace_df = self.return_for_bounds(self.trace_df)
+        types = {'Timestamp': np.int64, 'JourneyID': np.int32, 'Lon': np.float64, 'Lat': np.float64,
+                 'VehicleID': np.int32}
+        chunks = [pd.DataFrame(np.empty(0, dtype=self.trace_record_dtype))]
+        for chunk in pd.read_csv(self.traces_filename, header=None, names=header, usecols=list(types.keys()),
+                                 dtype=types, chunksize=self.trace_chunk_size):
+            chunk = self.return_for_bounds(chunk)
+            chunk = chunk.assign(trace_id=chunk['JourneyID'].astype(np.int64) + 10000 * chunk["VehicleID"])
+            if self.bus_ids:
+                chunk = chunk[chunk['trace_id'].isin(self.bus_ids)]
+            chunks.append(chunk[list(self.trace_record_dtype.names)])
+        self.trace_df = pd.concat(chunks, ignore_index=True).astype(dict(self.trace_record_dtype.descr))
+        self.trace_df = self.trace_df.sort_values(by=['Timestamp'], kind='mergesort')
+        if cache_filename is not None:
+            self.__store_trace_cache(cache_filename)
+
+    def __get_trace_cache_filename(self):
+        """
+        The cache is keyed by the traces file (its absolute path, size and modification time, so the file is not
+        read) and the filters' parameters
+        """
+        if self.trace_cache_dir is None:
+            return None
+        stat = os.stat(self.traces_filename)
+        bounding_box = tuple(tuple(float(i) for i in bound) for bound in self.bounding_box)
+        bus_ids = sorted(int(i) for i in self.bus_ids) if self.bus_ids else []
+        digest = hashlib.sha1(repr((os.path.abspath(self.traces_filename), stat.st_size, stat.st_mtime_ns,
+                                    bounding_box, bus_ids, self.trace_record_dtype.descr)).encode())
+        return os.path.join(self.trace_cache_dir, f"traces-{digest.hexdigest()}.npy")
+
+    def __store_trace_cache(self, cache_filename):
+        records = np.empty(len(self.trace_df), dtype=self.trace_record_dtype)
+        for column in self.trace_record_dtype.names:
+            records[column] = self.trace_df[column].to_numpy()
+        os.makedirs(self.trace_cache_dir, exist_ok=True)
+        temp_filename = f"{cache_filename}.{os.getpid()}.tmp"
+        with open(temp_filename, 'wb') as f:
+            np.save(f, records)
+        os.replace(temp_filename, cache_filename)
 
     def return_for_bounds(self, df):
         bound_a, bound_b = self.bounding_box
-        new_df = df
-        new_df = new_df[bound_a[0] < new_df['Lat']]
-        new_df = new_df[bound_b[0] > new_df['Lat']]
-        new_df = new_df[bound_a[1] < new_df['Lon']]
-        new_df = new_df[bound_b[1] > new_df['Lon']]
-        return new_df
+        mask = (bound_a[0] < df['Lat']) & (bound_b[0] > df['Lat']) & (bound_a[1] < df['Lon']) & (bound_b[1] > df['Lon'])
+        return df[mask]
 
     def fill_traces(self):
         _traces = self.__group_trace_by_id()
-        _traces = self.__update_traces_step(_traces)
+        _traces = self.__select_traces(_traces)
         self.traces = _traces
 
-    def __update_traces_step(self, _traces):
-        traces = {}
-        for trace in _traces:
-            item = _traces[trace]
-            item.sort(key=lambda x: x['timestamp'])
-            new_item = []
-            for i in range(len(item)):
-                start = item[i]
-                start['timestamp'] = datetime.fromtimestamp(int(start['timestamp'] / 1000000))
-
-                start_timestamp = start['timestamp']
-                is_at_the_same_place = False
-                if len(new_item) > 0:
-                    is_at_the_same_place = new_item[-1]['Lat'] == start['Lat'] and new_item[-1]['Lon'] == start['Lon']
-                if not is_at_the_same_place:
-                    new_item.append({'timestamp': start_timestamp, 'Lat': start['Lat'], 'Lon': start['Lon']})
-            traces[trace] = new_item
+    def __select_traces(self, traces):
         fin_traces = {}
         if self.bus_ids and len(self.bus_ids) > 0:
             for trace_id in self.bus_ids:
@@ -166,12 +282,26 @@ class BusExperiment(Template):
         return fin_traces
 
     def __group_trace_by_id(self):
-        traces = {}
-        self.trace_df = self.return_for_bounds(self.trace_df)
-        for record in self.trace_df[['Lat', 'Lon', 'trace_id', 'Timestamp']].to_dict('records'):
-            traces[record['trace_id']] = traces.get(record['trace_id'], []) + [
-                {'Lat': record['Lat'], 'Lon': record['Lon'], 'timestamp': record['Timestamp']}]
-        return traces
+        """
+        Groups the (time-sorted) records by trace id, keeping the traces in order of appearance,
+        and drops the consecutive records of a trace at the same position
+        :return: A dict of trace ids and traces, i.e. structured arrays with timestamp, Lat and Lon fields
+        """
+        codes, trace_ids = pd.factorize(self.trace_df['trace_id'])
+        order = np.argsort(codes, kind='stable')
+        codes = codes[order]
+        lats = self.trace_df['Lat'].to_numpy()[order]
+        lons = self.trace_df['Lon'].to_numpy()[order]
+        is_moved = np.ones(len(codes), dtype=bool)
+        is_moved[1:] = (codes[1:] != codes[:-1]) | (lats[1:] != lats[:-1]) | (lons[1:] != lons[:-1])
+
+        records = np.empty(int(is_moved.sum()), dtype=self.trace_dtype)
+        records['timestamp'] = (self.trace_df['Timestamp'].to_numpy()[order][is_moved] // 1000000).astype(
+            'datetime64[s]')
+        records['Lat'] = lats[is_moved]
+        records['Lon'] = lons[is_moved]
+        bounds = np.flatnonzero(np.diff(codes[is_moved])) + 1
+        return dict(zip(trace_ids.tolist(), np.split(records, bounds)))
 
     def generate_experiment(self)->SlicerSDK:
         self.__generate_experiment_RUs()
@@ -183,32 +313,53 @@ class BusExperiment(Template):
         return self.slicer_sdk
 
     def __generate_mobility_scenario(self):
-        actions = []
+        """
+        Generates a scenario with one action per tick that moves all buses with new positions in that tick.
+        The positions are bucketed (rounded up) to ticks, so only the initial positions fall into tick 0,
+        and the time of every action is its delta from the previous action
+        """
+        labels, columns = [], []
         for trace_id, trace in self.traces.items():
-            if trace == []: continue
-            initial_timestamp = trace[0]['timestamp']
-            for position, location in enumerate(trace):
-                time_ = abs(int((location['timestamp'] - initial_timestamp).seconds))
-                actions.append({'time': time_, 'instance_type': f"bus_{trace_id}", 'instances': 1,
-                                'action': {'type': 'move',
-                                           'parameters': {'slice': self.slice_name, 'lat': location['Lat'],
-                                                          'lon': location['Lon']}}})
-        actions.sort(key=lambda x: x['time'])
-        count = 0
-        new_actions = []
-        for position, action in enumerate(actions[1:]):
-            if actions[position]['time'] == 0: continue
-            new_action = copy.copy(actions[position])
-            new_action['time'] = new_action['time'] - actions[position - 1]['time']
-            same_action_same_time = new_action['time'] == 0 and new_action['instance_type'] == actions[position - 1][
-                'instance_type']
-            if same_action_same_time: continue
-            new_action['position'] = count
-
-            new_actions.append(new_action)
-            count += 1
-        scenario = {'name': 'mobility_scenario', 'actions': new_actions}
-        self.slicer_sdk.scenarios.append(scenario)
+            if len(trace) == 0: continue
+            seconds = (trace['timestamp'] - trace['timestamp'][0]).astype('timedelta64[s]').astype(np.int64)
+            columns.append((np.full(len(trace), len(labels)), seconds, trace['Lat'], trace['Lon']))
+            labels.append(f"bus_{trace_id}")
+        nodes, seconds, lats, lons = [np.concatenate(column) for column in zip(*columns)] if columns else \
+            [np.zeros(0, dtype=np.int64)] * 2 + [np.zeros(0)] * 2
+        ticks = -(-seconds // self.scenario_tick) * self.scenario_tick
+
+        # keep only the last position of every bus in each tick (the initial positions are already deployed)
+        order = np.lexsort((seconds, nodes, ticks))
+        nodes, ticks, lats, lons = nodes[order], ticks[order], lats[order], lons[order]
+        is_last = np.ones(len(ticks), dtype=bool)
+        is_last[:-1] = (ticks[1:] != ticks[:-1]) | (nodes[1:] != nodes[:-1])
+        is_moved = is_last & (ticks > 0)
+        nodes, ticks, lats, lons = nodes[is_moved], ticks[is_moved], lats[is_moved], lons[is_moved]
+
+        bounds = np.flatnonzero(np.diff(ticks)) + 1
+        actions = []
+        previous_tick = 0
+        for position, (start, end) in enumerate(zip([0] + bounds.tolist(), bounds.tolist() + [len(ticks)])):
+            if start == end: continue
+            tick = int(ticks[start])
+            moves = [dict(label=labels[node], lat=lat, lon=lon) for node, lat, lon in
+                     zip(nodes[start:end].tolist(), lats[start:end].tolist(), lons[start:end].tolist())]
+            actions.append({'time': tick - previous_tick, 'position': position, 'instances': 1,
+                            'action': {'type': 'move_nodes',
+                                       'parameters': {'slice': self.slice_name, 'nodes': moves}}})
+            previous_tick = tick
+        self.mobility_scenario = {'name': 'mobility_scenario', 'actions': actions}
+        self.slicer_sdk.scenarios.append(self.mobility_scenario)
+
+    def get_scenario_report(self) -> dict:
+        """
+        Reports the size of the generated mobility scenario
+        :return: The number of actions, the number of node moves and the size of the serialized (YAML) scenario
+        """
+        actions = self.mobility_scenario['actions']
+        return dict(actions=len(actions),
+                    moves=sum([len(action['action']['parameters']['nodes']) for action in actions]),
+                    bytes=len(yaml.dump(self.mobility_scenario).encode()))
 
     def __generate_experiment_cloud_nodes(self):
         for cloud_id in range(self.num_of_clouds):
@@ -227,10 +378,10 @@ class BusExperiment(Template):
 
     def __generate_experiment_bus_nodes(self):
         for trace_id, trace in self.traces.items():
-            if trace == []: continue
+            if len(trace) == 0: continue
             self.slicer_sdk.add_topology_node(label=f"bus_{trace_id}", service=self.bus_service, device=self.bus_device,
-                                              networks=[self.slice_name], lat=trace[0]['Lat'],
-                                              lon=trace[0]['Lon'])
+                                              networks=[self.slice_name], lat=float(trace[0]['Lat']),
+                                              lon=float(trace[0]['Lon']))
 
     def __generate_experiment_RUs(self):
         for RU in self.RUs:
@@ -0,0 +1,143 @@
+import copy
+import itertools
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from SlicerSDK import SlicerSDK
+from networks.QoS import QoS
+from usecases.template import Template
+
+# The running sweep. Workers are forked after it is set, so they share its template's loaded data (read-only)
+_sweep = None
+
+
+def _run_configuration(configuration: dict) -> dict:
+    SlicerSDK.link_processes = 1  # the configurations already run in parallel
+    return _sweep.run_configuration(_sweep.template, configuration)
+
+
+@dataclass
+class ParameterSweep:
+    """
+    Runs a use-case template for every combination of a parameter grid and reports the statistics of each slice.
+    The template loads (and filters) its data once, while every configuration is built in a process pool
+    from a clone of it. The grid may include both template parameters (e.g. num_of_RUs, ru_overlap) and
+    slice parameters (wireless_connection_type, parameters, backhaul_qos, midhaul_qos, handover_policy, cell_load).
+    The template should not be generated itself, since its SlicerSDK is the initial model of every configuration
+    """
+    template: Template
+    grid: Dict[str, list]
+    processes: int = None
+    deploy: bool = False  # if it is True, every configuration is deployed and its scenario is executed on Fogify
+
+    # The grid parameters that are applied on the slice's model instead of the template
+    slice_parameters = ['wireless_connection_type', 'parameters', 'backhaul_qos', 'midhaul_qos', 'handover_policy',
+                        'cell_load']
+
+    class ParameterSweepException(Exception): pass
+
+    def __post_init__(self):
+        # every configuration is built from a clone of the template, so a template without clone would fail
+        # in every (forked) worker instead of here
+        if type(self.template).clone is Template.clone:
+            raise ParameterSweep.ParameterSweepException(
+                f"The template {type(self.template).__name__} does not implement clone, "
+                f"so it can not be used in parameter sweeps")
+
+    def get_configurations(self) -> List[dict]:
+        """
+        Generates all combinations of the grid. A key of the grid may be a tuple of parameters that vary together,
+        e.g. {('wireless_connection_type', 'parameters'): [('SISO', {}), ('LinearDegradation', {...})]}
+        :return: The configurations
+        """
+        names = list(self.grid.keys())
+        res = []
+        for values in itertools.product(*[self.grid[name] for name in names]):
+            configuration = {}
+            for name, value in zip(names, values):
+                configuration.update(zip(name, value) if type(name) == tuple else [(name, value)])
+            res.append(configuration)
+        return res
+
+    def run(self) -> pd.DataFrame:
+        """
+        Runs all configurations. Deployments can not be shared, so deploying sweeps run sequentially
+        :return: A table with a row per configuration that includes its parameters and statistics
+        """
+        global _sweep
+        configurations = self.get_configurations()
+        if self.deploy or self.processes == 1:
+            return pd.DataFrame([self.run_configuration(self.template, c) for c in configurations])
+        _sweep = self
+        try:
+            with ProcessPoolExecutor(max_workers=self.processes,
+                                     mp_context=multiprocessing.get_context('fork')) as executor:
+                rows = list(executor.map(_run_configuration, configurations))
+        finally:
+            _sweep = None
+        return pd.DataFrame(rows)
+
+    def run_configuration(self, template: Template, configuration: dict) -> dict:
+        """
+        Builds (and optionally deploys) the slice of a configuration
+        :param template: The template that the configuration is cloned from
+        :param configuration: The parameters of the configuration
+        :return: The configuration along with the statistics of its slice (or the error that it raised)
+        """
+        row = dict(configuration)
+        try:
+            slicer_sdk = copy.deepcopy(template.slicer_sdk)
+            slice_name = template.slice_name
+            for network in slicer_sdk.networks:
+                if network.get('name') != slice_name: continue
+                for name in self.slice_parameters:
+                    if name in configuration:
+                        network[name] = copy.deepcopy(configuration[name])
+            experiment = template.clone(slicer_sdk, **{name: value for name, value in configuration.items()
+                                                       if name not in self.slice_parameters})
+            start = time.perf_counter()
+            experiment.generate_experiment()
+            row['build_time'] = time.perf_counter() - start
+            row.update(self.get_statistics(slicer_sdk, slice_name))
+            if self.deploy:
+                slicer_sdk.deploy()
+                row['start'], row['stop'] = slicer_sdk.scenario_execution('mobility_scenario')
+                slicer_sdk.undeploy()
+        except Exception as ex:
+            row['error'] = repr(ex)
+        return row
+
+    @staticmethod
+    def get_statistics(slicer_sdk: SlicerSDK, slice_name: str) -> dict:
+        """
+        Computes the statistics of the generated links and the UEs' radio connections of a slice
+        :param slicer_sdk: The SlicerSDK with the generated slice
+        :param slice_name: The name of the slice
+        :return: A dict with the statistics
+        """
+        network = slicer_sdk.slices[slice_name]
+        links = []
+        for fogify_network in slicer_sdk.networks:
+            if fogify_network.get('name') == slice_name:
+                links = fogify_network.get('links', [])
+        qos = [QoS(link['properties']) for link in links]
+        delays = np.array([i.get_delay() for i in qos])
+        bandwidths = np.array([i.get_bandwidth() for i in qos])
+        error_rates = np.array([i.get_error_rate() for i in qos])
+        radio_bandwidths = np.array([network.graph.edges[edge]['qos'].get_bandwidth()
+                                     for node, data in network.graph.nodes(data=True) if data.get('type') == 'UE'
+                                     for edge in network.graph.edges(node)])
+        stats = dict(RUs=len(network.get_RUs()), nodes=len(network.get_nodes()), links=len(links),
+                     UEs=len(radio_bandwidths), disconnected_UEs=int((radio_bandwidths <= 0).sum()))
+        for name, values in dict(delay=delays, bandwidth=bandwidths, error_rate=error_rates,
+                                 radio_bandwidth=radio_bandwidths).items():
+            stats[f'mean_{name}'] = values.mean() if len(values) else np.nan
+            stats[f'min_{name}'] = values.min() if len(values) else np.nan
+            stats[f'max_{name}'] = values.max() if len(values) else np.nan
+        return stats
@@ -14,4 +14,14 @@ class Template(ABC):
         This method should create the model in a programmable way and introduce it to the SlicerSDK
         :return: A SlicerSdk object
         """
-        pass
\ No newline at end of file
+        pass
+
+    def clone(self, slicer_sdk: SlicerSDK, **parameters) -> 'Template':
+        """
+        Creates a template with different parameters that shares any loaded data (e.g. traces) with this one.
+        Templates that support parameter sweeps should implement it (ParameterSweep rejects the ones that do not)
+        :param slicer_sdk: The SlicerSDK of the new template
+        :param parameters: The parameters that differ from this template
+        :return: The new template
+        """
+        raise NotImplementedError
@@ -0,0 +1,181 @@
+import math
+
+import numpy as np
+
+# WGS84 ellipsoid parameters (the same with ns-3 GeographicPositions.WGS84)
+EARTH_SEMIMAJOR_AXIS = 6378137.0
+EARTH_WGS84_ECCENTRICITY = 0.0818191908426215
+
+
+def geographic_to_cartesian(lat: float, lon: float, alt: float = 0.0) -> tuple:
+    """
+    Scalar version of ns-3 GeographicToCartesianCoordinates (WGS84), with the same operations in the same order
+    :param lat: Latitude in degrees
+    :param lon: Longitude in degrees
+    :param alt: Altitude in meters
+    :return: The cartesian (ECEF) coordinates (x, y, z) in meters
+    """
+    lat, lon = math.radians(lat), math.radians(lon)
+    Rn = EARTH_SEMIMAJOR_AXIS / math.sqrt(1 - pow(EARTH_WGS84_ECCENTRICITY, 2) * pow(math.sin(lat), 2))
+    x = (Rn + alt) * math.cos(lat) * math.cos(lon)
+    y = (Rn + alt) * math.cos(lat) * math.sin(lon)
+    z = ((1 - pow(EARTH_WGS84_ECCENTRICITY, 2)) * Rn + alt) * math.sin(lat)
+    return x, y, z
+
+
+def to_cartesian(lat, lon, alt=0.0) -> np.ndarray:
+    """
+    Vectorized version of ns-3 GeographicToCartesianCoordinates (WGS84)
+    :param lat: Latitudes in degrees
+    :param lon: Longitudes in degrees
+    :param alt: Altitudes in meters
+    :return: An (N, 3) array with the cartesian (ECEF) coordinates in meters
+    """
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.radians(np.asarray(lon, dtype=np.float64))
+    alt = np.nan_to_num(np.asarray(alt, dtype=np.float64))
+    e2 = EARTH_WGS84_ECCENTRICITY ** 2
+    Rn = EARTH_SEMIMAJOR_AXIS / np.sqrt(1 - e2 * np.sin(lat) ** 2)
+    x = (Rn + alt) * np.cos(lat) * np.cos(lon)
+    y = (Rn + alt) * np.cos(lat) * np.sin(lon)
+    z = ((1 - e2) * Rn + alt) * np.sin(lat)
+    return np.stack(np.broadcast_arrays(x, y, z), axis=-1).reshape(-1, 3)
+
+
+def distances(points_a: np.ndarray, points_b: np.ndarray) -> np.ndarray:
+    """
+    Computes the distances between two sets of cartesian points (the same with Location.distance)
+    :param points_a: An (N, 3) array of cartesian points in meters
+    :param points_b: An (M, 3) array of cartesian points in meters
+    :return: An (N, M) array with the distances in km
+    """
+    difference = points_a[:, np.newaxis, :] - points_b[np.newaxis, :, :]
+    return np.sqrt(np.einsum('ijk,ijk->ij', difference, difference)) / 1000
+
+
+def chunked_distances(points_a: np.ndarray, points_b: np.ndarray, chunk_size: int = 512):
+    """
+    Generates the pairwise distances in blocks of rows, so the full (N, M) matrix is never kept in memory
+    :param points_a: An (N, 3) array of cartesian points in meters
+    :param points_b: An (M, 3) array of cartesian points in meters
+    :param chunk_size: The rows of each block
+    :return: A generator of (start, block) pairs, where block holds the distances of points_a[start:start+chunk_size]
+    """
+    for start in range(0, len(points_a), chunk_size):
+        yield start, distances(points_a[start:start + chunk_size], points_b)
+
+
+def distance_sums(points: np.ndarray, chunk_size: int = 512) -> np.ndarray:
+    """
+    Computes for every point the sum of its distances from all points
+    :param points: An (N, 3) array of cartesian points in meters
+    :param chunk_size: The rows of each computed block
+    :return: An array with N sums in km
+    """
+    res = np.zeros(len(points))
+    for start, block in chunked_distances(points, points, chunk_size):
+        res[start:start + len(block)] = block.sum(axis=1)
+    return res
+
+
+def neighbour_counts(points: np.ndarray, radius: float, chunk_size: int = 512) -> np.ndarray:
+    """
+    Counts for every point its neighbours within a radius (the point itself is excluded)
+    :param points: An (N, 3) array of cartesian points in meters
+    :param radius: The radius in km
+    :param chunk_size: The rows of each computed block
+    :return: An array with N counts
+    """
+    res = np.zeros(len(points), dtype=np.int64)
+    for start, block in chunked_distances(points, points, chunk_size):
+        res[start:start + len(block)] = (block <= radius).sum(axis=1) - 1
+    return res
+
+
+class SpatialIndex(object):
+    """
+    Uniform grid over cartesian points that answers radius and nearest-neighbour queries
+    by visiting only the cells around the query point
+    """
+
+    def __init__(self, points: np.ndarray, cell_size: float = None):
+        """
+        :param points: An (N, 3) array of cartesian points in meters
+        :param cell_size: The edge of each grid cell in km (usually the radius of the queries). If it is None,
+        the cells are sized to hold about one point each, considering that the points are spread over an area
+        """
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        if cell_size is None:
+            extent = np.ptp(self.points, axis=0).max() / 1000 if len(self.points) else 0.0
+            cell_size = max(extent / np.sqrt(max(len(self.points), 1)), 0.001)
+        self.cell_size = float(cell_size) * 1000
+        if self.cell_size <= 0:
+            raise ValueError("The cell size of the spatial index should be positive")
+        self.cells = {}
+        for i, cell in enumerate(self.__get_cells(self.points)):
+            self.cells.setdefault(cell, []).append(i)
+        cells = np.array(list(self.cells.keys()), dtype=np.int64).reshape(-1, 3)
+        self.min_cell = cells.min(axis=0) if len(cells) else np.zeros(3, dtype=np.int64)
+        self.max_cell = cells.max(axis=0) if len(cells) else np.zeros(3, dtype=np.int64)
+
+    def __get_cells(self, points):
+        return [tuple(cell) for cell in np.floor(points / self.cell_size).astype(np.int64).tolist()]
+
+    def __len__(self):
+        return len(self.points)
+
+    def __get_candidates(self, cell, rings_from, rings_to):
+        res = []
+        for dx in range(-rings_to, rings_to + 1):
+            for dy in range(-rings_to, rings_to + 1):
+                for dz in range(-rings_to, rings_to + 1):
+                    if max(abs(dx), abs(dy), abs(dz)) < rings_from: continue
+                    res.extend(self.cells.get((cell[0] + dx, cell[1] + dy, cell[2] + dz), []))
+        return res
+
+    def query_radius(self, point: np.ndarray, radius: float) -> (np.ndarray, np.ndarray):
+        """
+        Finds the points within a radius
+        :param point: The cartesian query point in meters
+        :param radius: The radius in km
+        :return: The indices of the points and their distances (in km), sorted by distance
+        """
+        point = np.asarray(point, dtype=np.float64).reshape(1, 3)
+        rings = int(np.ceil(radius * 1000 / self.cell_size))
+        candidates = np.array(self.__get_candidates(self.__get_cells(point)[0], 0, rings), dtype=np.int64)
+        if len(candidates) == 0:
+            return candidates, np.zeros(0)
+        candidate_distances = distances(point, self.points[candidates])[0]
+        mask = candidate_distances <= radius
+        order = np.argsort(candidate_distances[mask], kind='stable')
+        return candidates[mask][order], candidate_distances[mask][order]
+
+    def nearest(self, point: np.ndarray, exclude: set = None) -> (int, float):
+        """
+        Finds the nearest point by searching rings of cells around the query point.
+        If the rings become larger than the grid itself, the rest of the points are searched exhaustively
+        :param point: The cartesian query point in meters
+        :param exclude: Indices of points that should not be returned
+        :return: The index of the nearest point and its distance (in km), or (None, None) if there is no point
+        """
+        exclude = exclude if exclude is not None else set()
+        point = np.asarray(point, dtype=np.float64).reshape(1, 3)
+        cell = np.array(self.__get_cells(point)[0])
+        max_rings = int(max(np.abs(cell - self.min_cell).max(), np.abs(cell - self.max_cell).max()))
+        best, best_distance = None, None
+        for rings in range(0, max_rings + 1):
+            if (2 * rings + 1) ** 3 > 2 * len(self.cells):
+                candidates = [i for i in range(len(self.points)) if i not in exclude]
+            else:
+                candidates = [i for i in self.__get_candidates(tuple(cell), rings, rings) if i not in exclude]
+            if candidates:
+                candidate_distances = distances(point, self.points[candidates])[0]
+                position = int(np.argmin(candidate_distances))
+                if best_distance is None or candidate_distances[position] < best_distance:
+                    best, best_distance = candidates[position], float(candidate_distances[position])
+            if (2 * rings + 1) ** 3 > 2 * len(self.cells):
+                break
+            # the points beyond this ring are at least `rings` cells away
+            if best_distance is not None and best_distance * 1000 <= rings * self.cell_size:
+                break
+        return best, best_distance
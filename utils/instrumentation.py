@@ -0,0 +1,181 @@
+import bisect
+import contextlib
+import functools
+import logging
+import os
+import time
+from typing import Dict, Iterable
+
+logger = logging.getLogger('slicer.instrumentation')
+
+
+class Histogram(object):
+    """
+    Cumulative histogram of observed values (the same with Prometheus' histograms)
+    """
+
+    def __init__(self, buckets: Iterable[float]):
+        """
+        :param buckets: The upper bounds of the buckets (in ascending order)
+        """
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # the last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def get_cumulative_counts(self) -> list:
+        res, total = [], 0
+        for count in self.counts:
+            total += count
+            res.append(total)
+        return res
+
+    def to_dict(self) -> dict:
+        return dict(count=self.count, sum=self.sum, mean=self.sum / self.count if self.count else 0.0,
+                    buckets=dict(zip([str(i) for i in self.buckets] + ['+Inf'], self.get_cumulative_counts())))
+
+
+class Instrumentation(object):
+    """
+    Counters and latency histograms of the hot paths (e.g. attachments, moves, path QoS and radio models).
+    The instrumented methods are registered per class and they are replaced by timed wrappers only while
+    the instrumentation is enabled, so there is no overhead when it is disabled
+    """
+
+    # The upper bounds (in seconds) of the latency buckets
+    latency_buckets = (0.000001, 0.000005, 0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5,
+                       1.0, 5.0, 10.0)
+
+    # The upper bounds (in bytes) of the size buckets
+    size_buckets = (1000, 10000, 100000, 1000000, 10000000, 100000000)
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = False
+        self.histograms: Dict[str, Histogram] = {}
+        self.counters: Dict[str, float] = {}
+        self.methods = []  # the registered (class, method's name, original method, metric)
+        self.last_tick = {}
+        if enabled:
+            self.enable()
+
+    def register(self, cls, methods: Dict[str, str]) -> None:
+        """
+        Registers the methods of a class that are timed while the instrumentation is enabled
+        :param cls: The class
+        :param methods: The names of the methods (private ones with their mangled names) and their metrics
+        """
+        for name, metric in methods.items():
+            self.methods.append((cls, name, cls.__dict__[name], metric))
+            if self.enabled:
+                setattr(cls, name, self.timed(cls.__dict__[name], metric))
+
+    def enable(self) -> None:
+        if self.enabled: return
+        for cls, name, method, metric in self.methods:
+            setattr(cls, name, self.timed(method, metric))
+        self.enabled = True
+
+    def disable(self) -> None:
+        if not self.enabled: return
+        for cls, name, method, _ in self.methods:
+            setattr(cls, name, method)
+        self.enabled = False
+
+    def reset(self) -> None:
+        self.histograms = {}
+        self.counters = {}
+        self.last_tick = {}
+
+    def timed(self, function, metric: str):
+        """
+        :param function: The timed function
+        :param metric: The metric of the function's latency (e.g. attach for the attach_seconds histogram)
+        :return: The function with a timer
+        """
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.observe(f'{metric}_seconds', time.perf_counter() - start)
+        return wrapper
+
+    def timer(self, metric: str):
+        """
+        :param metric: The metric of the block's latency
+        :return: A context manager that times a block of code (if the instrumentation is enabled)
+        """
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return self.__timer(metric)
+
+    @contextlib.contextmanager
+    def __timer(self, metric):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(f'{metric}_seconds', time.perf_counter() - start)
+
+    def observe(self, metric: str, value: float, buckets: Iterable[float] = None) -> None:
+        """
+        Adds a value to a histogram
+        :param metric: The name of the histogram
+        :param value: The value (e.g. a latency in seconds)
+        :param buckets: The buckets of a new histogram (the latency buckets if it is None)
+        """
+        if metric not in self.histograms:
+            self.histograms[metric] = Histogram(self.latency_buckets if buckets is None else buckets)
+        self.histograms[metric].observe(value)
+
+    def increment(self, metric: str, value: float = 1) -> None:
+        self.counters[metric] = self.counters.get(metric, 0) + value
+
+    def get_metrics(self) -> dict:
+        """
+        :return: The counters and the histograms (with their count, sum, mean and cumulative buckets)
+        """
+        return dict(enabled=self.enabled, counters=dict(self.counters),
+                    histograms={name: histogram.to_dict() for name, histogram in self.histograms.items()})
+
+    def to_prometheus(self, prefix: str = 'slicer') -> str:
+        """
+        :param prefix: The prefix of the metrics' names
+        :return: The metrics in Prometheus' text exposition format
+        """
+        lines = []
+        for name, value in sorted(self.counters.items()):
+            lines += [f"# TYPE {prefix}_{name}_total counter", f"{prefix}_{name}_total {value}"]
+        for name, histogram in sorted(self.histograms.items()):
+            lines.append(f"# TYPE {prefix}_{name} histogram")
+            for bound, count in zip(histogram.buckets + ['+Inf'], histogram.get_cumulative_counts()):
+                lines.append(f'{prefix}_{name}_bucket{{le="{bound}"}} {count}')
+            lines += [f"{prefix}_{name}_sum {histogram.sum}", f"{prefix}_{name}_count {histogram.count}"]
+        return "\n".join(lines) + "\n"
+
+    def log_tick(self, label: str) -> dict:
+        """
+        Logs (at INFO level) the operations and their time since the previous tick
+        :param label: The label of the tick (e.g. the executed action)
+        :return: The count and the total time (in seconds) of every operation since the previous tick
+        """
+        res = {}
+        for name, histogram in self.histograms.items():
+            count, total = self.last_tick.get(name, (0, 0.0))
+            if histogram.count > count:
+                res[name] = (histogram.count - count, histogram.sum - total)
+            self.last_tick[name] = histogram.count, histogram.sum
+        logger.info("%s: %s", label, ", ".join(f"{name} {count}x {total:.6f}" for name, (count, total) in
+                                              sorted(res.items())))
+        return res
+
+
+# The instrumentation of the process. It is enabled by the SLICER_INSTRUMENTATION environment variable
+# or SlicerSDK.set_instrumentation
+instrumentation = Instrumentation(os.environ.get('SLICER_INSTRUMENTATION', '').lower() in ['1', 'true', 'yes'])
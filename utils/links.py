@@ -0,0 +1,121 @@
+import json
+from typing import Dict, List
+
+from networks.QoS import QoS
+
+
+class LinkSerializer(object):
+    """
+    Formats and encodes the links of the slices. Most links of a slice share a few distinct QoS values, so the
+    formatted (bidirectional) properties are cached per numeric (delay, deviation, bandwidth, error_rate) tuple and
+    the links of the same QoS share one interned dict, which is encoded to JSON only once.
+    The interned dicts are shared among the links, so they should not be modified
+    """
+
+    link_keys = ('from_node', 'to_node', 'parameters', 'bidirectional')  # the order of get_link
+
+    def __init__(self, max_size: int = 100000):
+        """
+        :param max_size: The maximum number of cached QoS values (the cache is cleared when it is reached)
+        """
+        self.max_size = max_size
+        self.properties: Dict[tuple, dict] = {}  # the interned properties of every numeric tuple
+        self.fragments: Dict[int, bytes] = {}  # the encoded interned properties (by their ids)
+        self.strings: Dict[str, bytes] = {}  # the encoded strings (e.g. the labels of the nodes)
+
+    def get_properties(self, qos: QoS) -> dict:
+        """
+        :param qos: The QoS of a link
+        :return: The interned formatted bidirectional QoS
+        """
+        return self.format_values(qos.get_bidirectional_values())
+
+    def format_values(self, values: tuple) -> dict:
+        """
+        :param values: The (delay, deviation, bandwidth, error_rate) of QoS.get_bidirectional_values
+        :return: The interned formatted bidirectional QoS
+        """
+        res = self.properties.get(values)
+        if res is None:
+            if len(self.properties) >= self.max_size:
+                self.clear()
+            res = self.properties[values] = QoS.format_qos(*values)
+            self.fragments[id(res)] = self.__encode_value(res)
+        return res
+
+    def get_link(self, from_node: str, to_node: str, qos: QoS) -> dict:
+        """
+        :return: The (unidirectional) link record of the Fogify controller with the interned properties
+        """
+        return dict(from_node=from_node, to_node=to_node, parameters={'properties': self.get_properties(qos)},
+                    bidirectional=False)
+
+    def encode(self, obj) -> bytes:
+        """
+        Compact JSON encoding (the same with json.dumps without spaces) that streams the links to bytes. The interned
+        properties and the strings are not encoded again
+        :param obj: A link, a list of links or an action's payload with links
+        :return: The encoded UTF-8 bytes
+        """
+        res: List[bytes] = []
+        self.__write(obj, res)
+        return b''.join(res)
+
+    def clear(self) -> None:
+        self.properties = {}
+        self.fragments = {}
+        self.strings = {}
+
+    def __write(self, obj, res: List[bytes]) -> None:
+        if isinstance(obj, str):
+            fragment = self.strings.get(obj)
+            if fragment is None:
+                fragment = self.__encode_value(obj)
+                if len(self.strings) < self.max_size:
+                    self.strings[obj] = fragment
+            res.append(fragment)
+        elif isinstance(obj, dict):
+            fragment = self.fragments.get(id(obj))
+            if fragment is not None:
+                res.append(fragment)
+                return
+            res.append(b'{')
+            for i, (key, value) in enumerate(obj.items()):
+                if i: res.append(b',')
+                self.__write(str(key), res)
+                res.append(b':')
+                self.__write(value, res)
+            res.append(b'}')
+        elif isinstance(obj, (list, tuple)):
+            res.append(b'[')
+            for i, value in enumerate(obj):
+                if i: res.append(b',')
+                if not self.__write_link(value, res):
+                    self.__write(value, res)
+            res.append(b']')
+        else:
+            res.append(self.__encode_value(obj))
+
+    def __write_link(self, obj, res: List[bytes]) -> bool:
+        """
+        Writes a link record of get_link at once
+        :return: False if the object is not such a link
+        """
+        if type(obj) is not dict or tuple(obj) != self.link_keys: return False
+        parameters, bidirectional = obj['parameters'], obj['bidirectional']
+        if type(parameters) is not dict or len(parameters) != 1 or type(bidirectional) is not bool: return False
+        fragment = self.fragments.get(id(parameters.get('properties')))
+        from_node, to_node = obj['from_node'], obj['to_node']
+        if fragment is None or type(from_node) is not str or type(to_node) is not str: return False
+        res.append(b'{"from_node":')
+        self.__write(from_node, res)
+        res.append(b',"to_node":')
+        self.__write(to_node, res)
+        res.append(b',"parameters":{"properties":')
+        res.append(fragment)
+        res.append(b'},"bidirectional":true}' if bidirectional else b'},"bidirectional":false}')
+        return True
+
+    @staticmethod
+    def __encode_value(obj) -> bytes:
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
@@ -1,8 +1,8 @@
+import math
 from functools import lru_cache
 from typing import Optional
 
-from geopy.geocoders import Nominatim
-from ns.mobility import GeographicPositions, ConstantPositionMobilityModel
+from utils.geometry import geographic_to_cartesian
 
 
 class Location(object):
@@ -13,11 +13,13 @@ class Location(object):
     country: Optional[str]
     address: Optional[str]
 
+    # The geolocator of the locations without their own one (geopy is imported when it is first needed)
+    __default_geolocator = None
+
     class LocationException(Exception): pass
 
     def __init__(self, lat: Optional[float] = None, lon: Optional[float] = None, alt: Optional[float] = 0.0,
-                 country: Optional[str] = None, address: Optional[str] = None,
-                 geolocator: Nominatim = Nominatim(user_agent="Fogify-extension"), *args, **kwargs):
+                 country: Optional[str] = None, address: Optional[str] = None, geolocator=None, *args, **kwargs):
         self.lat = lat
         self.lon = lon
         self.alt = alt
@@ -84,16 +86,27 @@ class Location(object):
         else:
             raise Location.LocationException("You did not provide any information about the location")
 
+    def get_geolocator(self):
+        """
+        :return: The geolocator of the location or the default Nominatim geolocator
+        """
+        if self.__geolocator is not None:
+            return self.__geolocator
+        if Location.__default_geolocator is None:
+            from geopy.geocoders import Nominatim
+            Location.__default_geolocator = Nominatim(user_agent="Fogify-extension")
+        return Location.__default_geolocator
+
     @lru_cache(maxsize=None)
     def geo_reverse_country(self, lat: float, lon: float):
-        location = self.__geolocator.reverse("%s,%s" % (lat, lon))
+        location = self.get_geolocator().reverse("%s,%s" % (lat, lon))
         country = location.raw['address']['country_code']
         return country
 
     @lru_cache(maxsize=None)
     def geolocate(self, place_name: str):
         try:
-            loc = self.__geolocator.geocode(place_name)
+            loc = self.get_geolocator().geocode(place_name)
             self.lat, self.lon = loc.latitude, loc.longitude
         except:
             return None
@@ -103,13 +116,17 @@ class Location(object):
         self, self.get_lat(), self.get_lon(), self.get_alt(), self.country, self.address)
 
     def distance(self, location: "Location") -> float:
-        a = ConstantPositionMobilityModel()
-        b = ConstantPositionMobilityModel()
-        a.SetPosition(self.to_ns3())
-        b.SetPosition(location.to_ns3())
-        return a.GetDistanceFrom(b) / 1000
+        """
+        :param location: The other location
+        :return: The distance in km (the same with the distance of ns-3 mobility models, without loading ns-3)
+        """
+        a = geographic_to_cartesian(self.get_lat(), self.get_lon(), self.get_alt())
+        b = geographic_to_cartesian(location.get_lat(), location.get_lon(), location.get_alt())
+        return math.sqrt((a[0] - b[0]) * (a[0] - b[0]) + (a[1] - b[1]) * (a[1] - b[1]) +
+                         (a[2] - b[2]) * (a[2] - b[2])) / 1000
 
     def to_ns3(self):
+        from ns.mobility import GeographicPositions
         return GeographicPositions().GeographicToCartesianCoordinates(self.get_lat(), self.get_lon(), self.get_alt(),
                                                                       GeographicPositions.WGS84)
 
@@ -1,10 +1,12 @@
 import logging
-from multiprocessing import Process
+import threading
+from multiprocessing import Pipe, Process
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 from flask.views import MethodView
 from networkx.readwrite import json_graph
 
+from SlicerSDK import SlicerSDK
 from utils.general import CurrentEncoder
 
 log = logging.getLogger('werkzeug')
@@ -37,6 +39,16 @@ class NodeAPI(MethodView):
         return self.slicerSDK.move_node_to_location(network, node_id, lat, lon)
 
 
+class MetricsAPI(MethodView):
+
+    def get(self):
+        # the metrics of the SDK's process (in Prometheus' text exposition format), which are requested over the pipe
+        # since the service runs in a forked process with its own copy of the instrumentation
+        with self.lock:
+            self.connection.send(None)
+            return Response(self.connection.recv(), mimetype='text/plain; version=0.0.4')
+
+
 class APIService:
 
     class APIServiceException(Exception):
@@ -45,6 +57,24 @@ class APIService:
     def __init__(self, slicerSDK):
         self.slicerSDK = slicerSDK
         self.main_thread = None
+        self.metrics_thread = None
+        self.metrics_stopped = None
+        self.metrics_connection = None
+
+    @staticmethod
+    def serve_metrics(connection, stopped: threading.Event) -> None:
+        """
+        Answers the metrics requests of the service's process with the metrics of this (the SDK's) process
+        :param connection: The SDK's end of the pipe
+        :param stopped: It is set when the service stops
+        """
+        while not stopped.is_set():
+            try:
+                if not connection.poll(0.1): continue
+                connection.recv()
+                connection.send(SlicerSDK.get_instrumentation_metrics('prometheus'))
+            except (EOFError, OSError):
+                return
 
     def start(self):
         if self.main_thread is not None:
@@ -65,15 +95,28 @@ class APIService:
         app.json_encoder = CurrentEncoder
         app.add_url_rule('/network/<network>', view_func=network_view, methods=['GET'])
         app.add_url_rule('/network/<network>/<node_id>', view_func=node_view, methods=['GET', 'POST'])
+        self.metrics_connection, MetricsAPI.connection = Pipe()
+        MetricsAPI.lock = threading.Lock()
+        app.add_url_rule('/metrics', view_func=MetricsAPI.as_view('metrics_api'), methods=['GET'])
 
         def run_server(flask_app=None):
             flask_app.run(port=5555, host='0.0.0.0', debug=True, use_reloader=False)
 
         self.main_thread = Process(target=run_server, kwargs={'flask_app': app})
         self.main_thread.start()
+        MetricsAPI.connection.close()  # the service's end is used only by its process
+        self.metrics_stopped = threading.Event()
+        self.metrics_thread = threading.Thread(target=self.serve_metrics, daemon=True,
+                                               args=(self.metrics_connection, self.metrics_stopped))
+        self.metrics_thread.start()
 
     def stop(self):
         if self.main_thread is None: return
         self.main_thread.terminate()
         self.main_thread.join()
         self.main_thread = None
+        self.metrics_stopped.set()
+        self.metrics_thread.join()
+        self.metrics_thread = None
+        self.metrics_connection.close()
+        self.metrics_connection = None
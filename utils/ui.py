@@ -1,50 +1,128 @@
-from typing import List
+import base64
+import io
+import math
+import threading
+import time
+import weakref
+from typing import List, Dict, Iterable
 
-from ipyleaflet import Circle, AwesomeIcon
+from ipyleaflet import Circle, AwesomeIcon, MarkerCluster, GeoJSON, Heatmap, ImageOverlay
 from ipyleaflet import Map, basemaps, Marker
 from ipywidgets import HTML
 
 from networks import SliceConceptualGraph
+from networks.raster import QoSRaster
 from utils.location import Location
 
 
+class MarkerIndex(object):
+    """
+    Keeps the label-to-marker index of a map along with the labels that wait for the next redraw
+    (and the timer of the trailing redraw that applies them).
+    In level-of-detail maps, UEs are kept as GeoJSON features (label-to-feature index) instead of markers
+    """
+
+    def __init__(self, markers: Dict[str, Marker] = None):
+        self.markers = markers if markers is not None else {}
+        self.features = {}
+        self.points = None
+        self.heatmap = None
+        self.detail_layers = []
+        self.overview_layers = []
+        self.is_detailed = False  # if the detail layers are visible
+        self.stale_layers = []  # the layers of UEs whose features are not sent yet
+        self.pending = set()
+        self.last_redraw = None
+        self.flush_timer = None
+        self.lock = threading.RLock()  # the trailing redraws run in the timers' threads
+
+    def refresh_features(self) -> None:
+        """
+        Sends the patched UE features only to the visible layer of UEs (GeoJSON points when the map is detailed,
+        otherwise the heatmap), while the hidden one is refreshed when it becomes visible.
+        The data of a layer is a single widget trait, so the visible layer gets all features in one message
+        """
+        self.stale_layers = [layer for layer in [self.points, self.heatmap] if layer is not None]
+        self.refresh_visible_layer()
+
+    def refresh_visible_layer(self) -> None:
+        visible_layer = self.points if self.is_detailed else self.heatmap
+        if not any(layer is visible_layer for layer in self.stale_layers): return
+        self.stale_layers = [layer for layer in self.stale_layers if layer is not visible_layer]
+        features = list(self.features.values())
+        if visible_layer is self.points:
+            self.points.data = dict(type='FeatureCollection', features=features)
+        else:
+            self.heatmap.locations = [feature['geometry']['coordinates'][::-1] for feature in features]
+
+
 class MobilityMap(object):
+    # Maximum redraws per second for both trace replays and marker dragging
+    frame_rate: float = 5.0
+
+    # In 'auto' mode, slices with more nodes and RUs than this limit are rendered with level of detail
+    max_markers: int = 500
+
+    # Zoom level from which the level-of-detail maps depict individual UEs and RUs' coverage
+    detail_zoom: int = 15
+
+    # The marker index of every generated map
+    indices = weakref.WeakKeyDictionary()
 
     @classmethod
-    def generate_map(cls, network: SliceConceptualGraph, slicer, **kwargs) -> Map:
+    def generate_map(cls, network: SliceConceptualGraph, slicer, mode: str = 'auto', **kwargs) -> Map:
+        """
+        Generates the interactive map of a slice
+        :param network: The slice that the map depicts
+        :param slicer: The SlicerSDK that applies the movements of the dragged markers
+        :param mode: 'markers' (a marker per node), 'cluster' (clustered markers), 'lod' (GeoJSON and heatmap layers
+        switched by zoom) or 'auto' ('markers' for small slices, 'lod' otherwise)
+        :return: The interactive Map object
+        """
         radius = network.get_radius()
         RUs = network.get_RUs()
         nodes = network.get_nodes()
+        if mode == 'auto':
+            mode = 'markers' if len(nodes) + len(RUs) <= cls.max_markers else 'lod'
+        if mode not in ['markers', 'cluster', 'lod']:
+            raise ValueError(f"The mode is {mode} but it should be either 'markers', 'cluster', 'lod' or 'auto'")
         center = cls.get_center(list(nodes.values()) + list(RUs.values()))
         current_map = Map(basemap=basemaps.OpenStreetMap.Mapnik, center=(center.lat, center.lon), dragging=True,
                           **kwargs)
+        index = MarkerIndex()
+        cls.indices[current_map] = index
+
+        if mode == 'markers':
+            for _, loc in RUs.items():
+                current_map.add_layer(Circle(location=(loc.lat, loc.lon), radius=int(radius * 1000)))
+        elif mode == 'cluster':
+            current_map.add_layer(cls.get_coverage_layer(RUs.values(), radius))
+        else:
+            index.detail_layers.append(cls.get_coverage_layer(RUs.values(), radius))
 
-        for _, loc in RUs.items():
-            current_map.add_layer(Circle(location=(loc.lat, loc.lon), radius=int(radius * 1000)))
+        # A node is depicted as RU when it is co-located with one (e.g. EDGE nodes)
+        RU_positions = {(loc.get_lat(), loc.get_lon(), loc.get_alt()) for loc in RUs.values()}
+        markers = []
         for label, loc in nodes.items():
             if loc is None: continue
-            is_RU = False
-            for _, RU_loc in RUs.items():
-                if loc.distance(RU_loc) == 0:
-                    is_RU = True
-                    break
+            is_RU = (loc.get_lat(), loc.get_lon(), loc.get_alt()) in RU_positions
+            if not is_RU and mode == 'lod':
+                index.features[label] = cls.get_feature(label, loc)
+                continue
             label_popup = HTML()
             label_popup.value = label
             if is_RU:
                 RU_icon = AwesomeIcon(name='server', marker_color='red', icon_color='black', spin=False)
-                current_map.add_layer(
-                    Marker(icon=RU_icon, location=(loc.lat, loc.lon), title=label, draggable=False,
-                           popup=label_popup))
+                marker = Marker(icon=RU_icon, location=(loc.lat, loc.lon), title=label, draggable=False,
+                                popup=label_popup)
             else:
                 marker = Marker(location=(loc.lat, loc.lon), title=label, draggable=True, popup=label_popup)
                 def on_move(new_marker):
                     def func(*args, **kwargs):
-
-                        from datetime import datetime
                         last_time = getattr(on_move, 'last_time')
-                        now = datetime.now()
+                        now = time.monotonic()
 
-                        if last_time is not None and abs((last_time-now).total_seconds())<5:
+                        if last_time is not None and now - last_time < 1 / cls.frame_rate:
                             return
                         on_move.last_time = now
 
@@ -59,22 +137,155 @@ class MobilityMap(object):
 
 
                 marker.on_move(callback=on_move(marker))
-                current_map.add_layer(
-                    marker)
+            markers.append(marker)
+            index.markers[label] = marker
 
+        if mode == 'markers':
+            for marker in markers:
+                current_map.add_layer(marker)
+            return current_map
+
+        current_map.add_layer(MarkerCluster(markers=markers))
+        if mode == 'cluster':
+            return current_map
+
+        index.points = GeoJSON(data=dict(type='FeatureCollection', features=[]),
+                               point_style=dict(radius=4, color='blue', fillOpacity=0.8, weight=1))
+        index.heatmap = Heatmap(locations=[], radius=10)
+        index.refresh_features()
+        index.detail_layers.append(index.points)
+        index.overview_layers.append(index.heatmap)
+        current_map.observe(lambda change: cls.set_level_of_detail(current_map, change['new']), names='zoom')
+        cls.set_level_of_detail(current_map, current_map.zoom)
         return current_map
 
     @classmethod
-    def update_map(cls, map: Map, network: SliceConceptualGraph):
-        nodes = network.get_nodes()
-        for layer in map.layers:
-            layer_title = getattr(layer, 'title', '')
-            if layer_title in nodes:
-                new_location = (nodes[layer_title].lat, nodes[layer_title].lon)
-                has_same_lat = new_location[0] == layer.location[0]
-                has_same_lon = new_location[0] == layer.location[1]
-                if not has_same_lat or not has_same_lon:
-                    layer.location = new_location
+    def set_level_of_detail(cls, map: Map, zoom: float) -> None:
+        """
+        Depicts the detail layers (UEs' points and RUs' coverage) when the map is zoomed in,
+        otherwise only the overview layers (UEs' heatmap)
+        :param map: The interactive map
+        :param zoom: The current zoom of the map
+        """
+        index = cls.get_index(map)
+        is_detailed = zoom >= cls.detail_zoom
+        index.is_detailed = is_detailed
+        index.refresh_visible_layer()
+        visible_layers = index.detail_layers if is_detailed else index.overview_layers
+        hidden_layers = index.overview_layers if is_detailed else index.detail_layers
+        with map.hold_sync():
+            for layer in hidden_layers:
+                if layer in map.layers:
+                    map.remove_layer(layer)
+            for layer in visible_layers:
+                if layer not in map.layers:
+                    map.add_layer(layer)
+
+    @classmethod
+    def get_coverage_layer(cls, RU_locations: Iterable[Location], radius: float, vertices: int = 24) -> GeoJSON:
+        """
+        Generates a single GeoJSON layer with the coverage areas of the RUs
+        :param RU_locations: The locations of the RUs
+        :param radius: The radius of the coverage in km
+        :param vertices: The vertices of the polygon that approximates each circle
+        :return: The GeoJSON layer
+        """
+        features = []
+        for loc in RU_locations:
+            lat_step = radius / 111.32
+            lon_step = radius / (111.32 * math.cos(math.radians(loc.lat)))
+            ring = [[loc.lon + lon_step * math.cos(2 * math.pi * i / vertices),
+                     loc.lat + lat_step * math.sin(2 * math.pi * i / vertices)] for i in range(vertices + 1)]
+            features.append(dict(type='Feature', properties={}, geometry=dict(type='Polygon', coordinates=[ring])))
+        return GeoJSON(data=dict(type='FeatureCollection', features=features),
+                       style=dict(color='blue', weight=1, fillOpacity=0.1))
+
+    @staticmethod
+    def get_raster_layer(raster: QoSRaster, metric: str = 'bandwidth', cmap: str = 'viridis',
+                         opacity: float = 0.6) -> ImageOverlay:
+        """
+        Generates an image layer that depicts a metric of a QoS raster (e.g. the coverage of the RUs)
+        :param raster: The raster of the slice
+        :param metric: The depicted metric
+        :param cmap: The matplotlib's colormap
+        :param opacity: The opacity of the image
+        :return: The image layer
+        """
+        import matplotlib.pyplot as plt
+        image = io.BytesIO()
+        plt.imsave(image, raster[metric], cmap=cmap, format='png')
+        url = f"data:image/png;base64,{base64.b64encode(image.getvalue()).decode()}"
+        return ImageOverlay(url=url, bounds=raster.get_bounds(), opacity=opacity)
+
+    @staticmethod
+    def get_feature(label: str, location: Location) -> dict:
+        return dict(type='Feature', properties=dict(label=label),
+                    geometry=dict(type='Point', coordinates=[location.lon, location.lat]))
+
+    @classmethod
+    def get_index(cls, map: Map) -> MarkerIndex:
+        """
+        Returns the marker index of a map. Maps that were not generated by this class are indexed by their layers
+        :param map: The interactive map
+        :return: The respective marker index
+        """
+        if map not in cls.indices:
+            cls.indices[map] = MarkerIndex(
+                {layer.title: layer for layer in map.layers if isinstance(layer, Marker) and layer.title})
+        return cls.indices[map]
+
+    @classmethod
+    def update_map(cls, map: Map, network: SliceConceptualGraph, labels: Iterable[str] = None,
+                   force: bool = False) -> bool:
+        """
+        Moves the markers (or patches the GeoJSON features) of the map to the current positions of the nodes.
+        Redraws are throttled by the frame rate, so the labels of a skipped redraw are kept and applied by
+        a trailing redraw at the end of the frame (unless another redraw applies them first)
+        :param map: The interactive map
+        :param network: The slice that the map depicts
+        :param labels: The labels of the moved nodes (all markers are checked if it is None)
+        :param force: Redraws the map regardless of the frame rate
+        :return: True if the map is redrawn
+        """
+        index = cls.get_index(map)
+        with index.lock:
+            index.pending.update(list(index.markers) + list(index.features) if labels is None else labels)
+            now = time.monotonic()
+            if not force and index.last_redraw is not None and now - index.last_redraw < 1 / cls.frame_rate:
+                if index.flush_timer is None:
+                    index.flush_timer = threading.Timer(1 / cls.frame_rate - (now - index.last_redraw),
+                                                        cls.update_map, args=(map, network, []),
+                                                        kwargs=dict(force=True))
+                    index.flush_timer.daemon = True
+                    index.flush_timer.start()
+                return False
+            if index.flush_timer is not None:
+                index.flush_timer.cancel()
+                index.flush_timer = None
+            index.last_redraw = now
+            cls.__redraw(map, network, index)
+            return True
+
+    @staticmethod
+    def __redraw(map: Map, network: SliceConceptualGraph, index: MarkerIndex) -> None:
+        """
+        Applies the pending labels of the index
+        """
+        has_moved_features = False
+        with map.hold_sync():
+            for label in index.pending:
+                location = network.get_node_location(label)
+                if location is None: continue
+                marker = index.markers.get(label)
+                if marker is not None and tuple(marker.location) != (location.lat, location.lon):
+                    marker.location = (location.lat, location.lon)
+                feature = index.features.get(label)
+                if feature is not None and feature['geometry']['coordinates'] != [location.lon, location.lat]:
+                    feature['geometry']['coordinates'] = [location.lon, location.lat]
+                    has_moved_features = True
+            if has_moved_features:
+                index.refresh_features()
+        index.pending.clear()
 
     @staticmethod
     def get_center(locations: List[Location]):